@@ -0,0 +1,256 @@
+import logging
+import os
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db.models import QuerySet
+from rest_framework import serializers
+from rest_framework.fields import SkipField
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional: without it originals are served as before
+    Image = None
+
+# Uploaded image fields that get resized variants, per model
+IMAGE_FIELDS = {
+    'users.User': ('avatar',),
+    'organization.Country': ('avatar',),
+    'organization.Municipality': ('avatar', 'hero_image'),
+    'organization.Club': ('avatar', 'hero_image'),
+    'organization.Interest': ('avatar',),
+    'groups.Group': ('avatar',),
+    'rewards.Reward': ('image',),
+    'news.NewsArticle': ('hero_image',),
+}
+
+# Format name -> (Pillow format, file extension, save options)
+FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# Vector and animated formats are left as they are
+SKIPPED_EXTENSIONS = {'.svg', '.gif'}
+
+VERSION_KEY = 'image_derivatives:version'
+# Probes that found no variants (generation still pending, image too small) expire quickly
+EMPTY_CACHE_TIMEOUT = 60
+
+logger = logging.getLogger(__name__)
+
+
+def derivative_widths():
+    return tuple(sorted(getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', (64, 160, 480, 1080))))
+
+
+def image_models():
+    """
+    (model, field names) for every registered model.
+    """
+    return [(apps.get_model(label), fields) for label, fields in IMAGE_FIELDS.items()]
+
+
+def derivative_name(name, width, fmt):
+    """
+    clubs/avatars/logo.png -> clubs/avatars/logo.png__w160.webp, next to the original.
+    Keeping the original extension keeps logo.png and logo.jpg apart.
+    """
+    return f"{name}__w{width}.{FORMATS[fmt][1]}"
+
+
+def can_resize(name):
+    return Image is not None and bool(name) and os.path.splitext(name)[1].lower() not in SKIPPED_EXTENSIONS
+
+
+def derivative_cache_timeout():
+    return getattr(settings, 'IMAGE_DERIVATIVE_CACHE_TIMEOUT', 3600)
+
+
+def _cache_key(storage, name):
+    widths = '-'.join(map(str, derivative_widths()))
+    return f"image_derivatives:{widths}:{type(storage).__name__}:{name}"
+
+
+def invalidate_derivative_cache():
+    """
+    Drops every cached variant map, e.g. after generate_image_derivatives.
+    Entries carry the version they were stored under and older ones are ignored.
+    """
+    if not cache.add(VERSION_KEY, 2, timeout=None):
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, 2, timeout=None)
+
+
+def _cache_variants(storage, name, variants, version):
+    timeout = derivative_cache_timeout() if any(variants.values()) else EMPTY_CACHE_TIMEOUT
+    cache.set(_cache_key(storage, name), (version, variants), timeout)
+
+
+def generate_derivatives(fieldfile):
+    """
+    Writes WebP and JPEG variants of an uploaded image at every configured width
+    below its own (images are never upscaled). Returns {format: {width: name}}.
+    """
+    if not can_resize(fieldfile.name):
+        return {}
+    storage = fieldfile.storage
+    widths = derivative_widths()
+    try:
+        with storage.open(fieldfile.name, 'rb') as source:
+            image = Image.open(source)
+            # JPEGs decode at a reduced scale that still covers the largest width
+            image.draft(None, (widths[-1], widths[-1]))
+            image = ImageOps.exif_transpose(image)
+            image.load()
+    except (OSError, Image.DecompressionBombError) as exc:
+        logger.warning("Could not read image %s: %s", fieldfile.name, exc)
+        return {}
+
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    variants = {fmt: {} for fmt in FORMATS}
+    for width in widths:
+        if width >= image.width:
+            break
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS)
+        for fmt, (pil_format, _, options) in FORMATS.items():
+            frame = resized
+            if pil_format == 'JPEG' and has_alpha:
+                # JPEG has no transparency: flatten onto white
+                frame = Image.new('RGB', resized.size, (255, 255, 255))
+                frame.paste(resized, mask=resized.getchannel('A'))
+            buffer = BytesIO()
+            frame.save(buffer, pil_format, **options)
+
+            name = derivative_name(fieldfile.name, width, fmt)
+            # Fixed names, so replace instead of letting the storage pick a new one
+            if storage.exists(name):
+                storage.delete(name)
+            variants[fmt][width] = storage.save(name, ContentFile(buffer.getvalue()))
+
+    _cache_variants(storage, fieldfile.name, variants, cache.get(VERSION_KEY, 1))
+    fieldfile._derivatives = variants
+    return variants
+
+
+def _stored_names(storage, folder):
+    """
+    Names in one storage folder, or None when the storage cannot list it.
+    """
+    try:
+        return set(storage.listdir(folder)[1])
+    except NotImplementedError:
+        return None
+    except OSError:
+        return set()
+
+
+def load_derivatives(fieldfiles):
+    """
+    existing_derivatives() for many images at once: one cache read for all of them,
+    one folder listing per folder for the misses and one cache write per timeout.
+    Each map is kept on its FieldFile, so existing_derivatives() on it is then free.
+    """
+    by_key = {}
+    for fieldfile in fieldfiles:
+        if not fieldfile or hasattr(fieldfile, '_derivatives'):
+            continue
+        if not can_resize(fieldfile.name):
+            fieldfile._derivatives = {}
+            continue
+        by_key.setdefault(_cache_key(fieldfile.storage, fieldfile.name), []).append(fieldfile)
+    if not by_key:
+        return
+
+    found = cache.get_many([*by_key, VERSION_KEY])
+    version = found.get(VERSION_KEY, 1)
+    listings = {}
+    fresh = {}
+    for key, files in by_key.items():
+        entry = found.get(key)
+        if entry is not None and entry[0] == version:
+            variants = entry[1]
+        else:
+            storage, name = files[0].storage, files[0].name
+            folder = os.path.dirname(name)
+            if (id(storage), folder) not in listings:
+                listings[(id(storage), folder)] = _stored_names(storage, folder)
+            stored = listings[(id(storage), folder)]
+            variants = {fmt: {} for fmt in FORMATS}
+            for width in derivative_widths():
+                for fmt in FORMATS:
+                    variant = derivative_name(name, width, fmt)
+                    if (os.path.basename(variant) in stored) if stored is not None else storage.exists(variant):
+                        variants[fmt][width] = variant
+            timeout = derivative_cache_timeout() if any(variants.values()) else EMPTY_CACHE_TIMEOUT
+            fresh.setdefault(timeout, {})[key] = (version, variants)
+        for fieldfile in files:
+            fieldfile._derivatives = variants
+
+    for timeout, entries in fresh.items():
+        cache.set_many(entries, timeout)
+
+
+def existing_derivatives(fieldfile):
+    """
+    {format: {width: name}} for an image, from the cache or from the storage
+    (then cached; briefly when nothing was found yet).
+    """
+    if not fieldfile:
+        return {}
+    load_derivatives([fieldfile])
+    return fieldfile._derivatives
+
+
+class SrcsetField(serializers.Field):
+    """
+    Read-only map of resized variants for a file field:
+    {"webp": {"64": url, "160": url, ...}, "jpeg": {...}}.
+    Empty for SVGs, missing files and images smaller than every width.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def _page_files(self, fieldfile):
+        """
+        The same field of every object in the list being serialized, so the
+        variants of a whole page are loaded together.
+        """
+        siblings = getattr(self.parent, 'parent', None)
+        objects = getattr(siblings, 'instance', None)
+        if not isinstance(siblings, serializers.ListSerializer) or not isinstance(objects, (list, tuple, QuerySet)):
+            return [fieldfile]
+        files = [fieldfile]
+        for obj in objects:
+            try:
+                files.append(self.get_attribute(obj))
+            except (SkipField, AttributeError, KeyError):
+                continue
+        return files
+
+    def to_representation(self, fieldfile):
+        if not fieldfile:
+            return {}
+        if not hasattr(fieldfile, '_derivatives'):
+            load_derivatives(self._page_files(fieldfile))
+        request = self.context.get('request')
+        storage = fieldfile.storage
+        srcset = {}
+        for fmt, widths in existing_derivatives(fieldfile).items():
+            if not widths:
+                continue
+            srcset[fmt] = {}
+            for width, name in sorted(widths.items()):
+                url = storage.url(name)
+                srcset[fmt][str(width)] = request.build_absolute_uri(url) if request else url
+        return srcset
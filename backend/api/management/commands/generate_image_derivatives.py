@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from api.images import existing_derivatives, generate_derivatives, image_models, invalidate_derivative_cache
+
+
+class Command(BaseCommand):
+    help = 'Generates resized WebP/JPEG variants for uploaded images that have none yet (e.g. uploaded before the pipeline existed).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate variants that already exist')
+        parser.add_argument('--model', help='Only this model, e.g. organization.Club')
+
+    def handle(self, *args, **options):
+        generated = skipped = 0
+        for model, fields in image_models():
+            if options['model'] and model._meta.label.lower() != options['model'].lower():
+                continue
+            for field in fields:
+                rows = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+                for obj in rows.only('pk', field).iterator(chunk_size=500):
+                    fieldfile = getattr(obj, field)
+                    if not options['force'] and any(existing_derivatives(fieldfile).values()):
+                        skipped += 1
+                        continue
+                    if any(generate_derivatives(fieldfile).values()):
+                        generated += 1
+                self.stdout.write(f"  {model._meta.label}.{field} done")
+
+        # Every worker re-reads the variants on its next render
+        invalidate_derivative_cache()
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated variants for {generated} images ({skipped} already had them)."
+        ))
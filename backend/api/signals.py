@@ -0,0 +1,31 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save
+
+from .images import generate_derivatives, image_models
+
+
+def note_new_uploads(sender, instance, fields, **kwargs):
+    # Before save the new upload is not committed to storage yet
+    instance._new_image_uploads = [
+        name for name in fields
+        if getattr(instance, name) and not getattr(instance, name)._committed
+    ]
+
+
+def generate_for_new_uploads(sender, instance, **kwargs):
+    uploads = getattr(instance, '_new_image_uploads', None)
+    if not uploads:
+        return
+    instance._new_image_uploads = []
+    for name in uploads:
+        # Only once the row is committed, so a rolled back save leaves no variants behind
+        transaction.on_commit(partial(generate_derivatives, getattr(instance, name)), robust=True)
+
+
+def connect_image_signals():
+    for model, fields in image_models():
+        uid = f'image_derivatives:{model._meta.label}'
+        pre_save.connect(partial(note_new_uploads, fields=fields), sender=model, weak=False, dispatch_uid=uid)
+        post_save.connect(generate_for_new_uploads, sender=model, dispatch_uid=uid)
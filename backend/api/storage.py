@@ -0,0 +1,58 @@
+import hashlib
+import os
+import re
+
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import UploadedFile
+
+HASH_LENGTH = 16
+
+# photo.3f2a9c0d1e4b5a6f.jpg, and variants named after it (photo.3f2a9c0d1e4b5a6f.jpg__w160.webp)
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{%d}\.' % HASH_LENGTH)
+
+
+def is_hashed_name(name):
+    """
+    True when the file name carries a content hash, so its URL never changes content.
+    """
+    return bool(HASHED_NAME_RE.search(os.path.basename(name)))
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+class ContentHashStorage(FileSystemStorage):
+    """
+    Stores uploads as <name>.<sha256 prefix><ext>, so a URL always serves the same
+    bytes and can be cached forever (see api/media.py). Uploading identical bytes
+    twice reuses the stored file.
+
+    Files the app writes itself (e.g. image variants) keep the name they are given.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if isinstance(content, UploadedFile) and not is_hashed_name(name):
+            name = self.hashed_name(name, content_hash(content), max_length)
+            if self.exists(name):
+                return name
+        return super().save(name, content, max_length)
+
+    def hashed_name(self, name, digest, max_length=None):
+        dir_name, file_name = os.path.split(name)
+        stem, ext = os.path.splitext(file_name)
+        suffix = f".{digest}{ext.lower()}"
+        if max_length is not None:
+            # Shorten the readable part, never the hash
+            room = max_length - len(suffix) - (len(dir_name) + 1 if dir_name else 0)
+            stem = stem[:max(room, 1)]
+        return os.path.join(dir_name, f"{stem}{suffix}")
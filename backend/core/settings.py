@@ -134,11 +134,22 @@ AUTH_USER_MODEL = 'users.User'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Uploads are stored under content-hashed names (api/storage.py)
+STORAGES = {
+    'default': {'BACKEND': 'api.storage.ContentHashStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+# Let the proxy send media files: 'X-Accel-Redirect' (nginx, internal location at
+# MEDIA_SENDFILE_PREFIX aliased to MEDIA_ROOT) or 'X-Sendfile' (Apache). None: Django sends them.
+MEDIA_SENDFILE_HEADER = None
+MEDIA_SENDFILE_PREFIX = '/protected-media/'
+
 # --- DRF & AUTH CONFIGURATION ---
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ScopedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
@@ -148,12 +159,66 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 10, # How many items per page
 }
 
+# Admin dashboard stats (users/stats.py) are cached per scope for this many seconds
+# and dropped whenever users or guardian links change.
+USER_STATS_CACHE_TIMEOUT = 300
+
+# Typeahead results (users/typeahead.py) are cached per scope and query for this many seconds.
+USER_TYPEAHEAD_CACHE_TIMEOUT = 30
+
+# Worker processes for hashing passwords during bulk imports (users/passwords.py).
+# None = one per CPU.
+USER_BULK_HASH_WORKERS = None
+
+# Login audit (users/audit.py): events are queued in-process and written in bulk
+# once this many are waiting or after this many seconds. A size of 1 writes immediately.
+LOGIN_AUDIT_BUFFER_SIZE = 100
+LOGIN_AUDIT_FLUSH_INTERVAL = 5
+
+# compact_login_history rolls login rows older than this into monthly totals.
+LOGIN_HISTORY_RETENTION_DAYS = 90
+
+# Shared cache. Dashboard stats, facets, households, typeahead and image variants
+# (users/stats.py and friends) are invalidated on writes, and the invalidation must
+# reach every worker process, which the per-process LocMem default cannot do.
+# The table is created on migrate; Redis (django.core.cache.backends.redis.RedisCache)
+# is a drop-in replacement where one is available.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+    }
+}
+
+# Household graphs (users/household.py): BFS bounds and cache lifetime in seconds.
+# Link and user changes drop cached households at once.
+HOUSEHOLD_MAX_DEPTH = 4
+HOUSEHOLD_MAX_MEMBERS = 50
+HOUSEHOLD_CACHE_TIMEOUT = 600
+
+# age_out_youth: youth members this old or older leave the youth registers.
+# Keys are country codes of the preferred club's country; 'default' covers the rest.
+YOUTH_AGE_OUT_THRESHOLDS = {
+    'default': 29,
+}
+
+# ScopedJWTAuthentication keeps up to this many users per process. Saves drop an
+# entry at once; the TTL (seconds) bounds staleness from bulk UPDATEs and other workers.
+USER_AUTH_CACHE_SIZE = 1000
+USER_AUTH_CACHE_TTL = 60
+
+# Uploaded images get WebP/JPEG variants at these widths (px), next to the original.
+IMAGE_DERIVATIVE_WIDTHS = (64, 160, 480, 1080)
+# How long (seconds) the variants found for an image stay cached.
+IMAGE_DERIVATIVE_CACHE_TIMEOUT = 3600
+
 from datetime import timedelta
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('JWT',),
+    'TOKEN_OBTAIN_SERIALIZER': 'users.authentication.ScopedTokenObtainPairSerializer',
 }
 
 DJOSER = {
@@ -0,0 +1,74 @@
+from django.db.models import Q
+
+from .models import CustomFieldDefinition
+
+
+def get_admin_field_definitions(user):
+    """
+    Field definitions an admin may see and edit, based on role and scope.
+    - SUPER_ADMIN: sees ALL fields (global + municipality + club)
+    - MUNICIPALITY_ADMIN: sees global fields + fields for their municipality and its clubs
+    - CLUB_ADMIN: sees global fields + their club fields + their club's municipality fields
+    """
+    role = user.role
+    
+    if role == 'SUPER_ADMIN':
+        # Super admins see ALL fields (global + municipality + club) for editing any user
+        return CustomFieldDefinition.objects.all()
+    
+    elif role == 'MUNICIPALITY_ADMIN':
+        # Municipality admins see global fields + their municipality fields + club fields for clubs in their municipality
+        municipality = user.assigned_municipality
+        if isinstance(municipality, dict):
+            municipality_id = municipality.get('id')
+        elif hasattr(municipality, 'id'):
+            municipality_id = municipality.id
+        else:
+            municipality_id = municipality
+        
+        if municipality_id:
+            # Get all club IDs in this municipality
+            from organization.models import Club
+            club_ids = Club.objects.filter(municipality_id=municipality_id).values_list('id', flat=True)
+            
+            return CustomFieldDefinition.objects.filter(
+                Q(owner_role='SUPER_ADMIN') |  # Global fields
+                Q(owner_role='MUNICIPALITY_ADMIN', municipality_id=municipality_id) |  # Their municipality fields
+                Q(owner_role='CLUB_ADMIN', club_id__in=club_ids)  # Club fields for clubs in their municipality
+            )
+        # If no municipality assigned, only show global fields
+        return CustomFieldDefinition.objects.filter(owner_role='SUPER_ADMIN')
+    
+    elif role == 'CLUB_ADMIN':
+        # Club admins see global fields + their club fields + municipality fields for their club's municipality
+        club = user.assigned_club
+        if isinstance(club, dict):
+            club_id = club.get('id')
+        elif hasattr(club, 'id'):
+            club_id = club.id
+        else:
+            club_id = club
+        
+        if club_id:
+            # Get the club's municipality
+            from organization.models import Club
+            try:
+                club_obj = Club.objects.get(id=club_id)
+                municipality_id = club_obj.municipality_id
+                
+                return CustomFieldDefinition.objects.filter(
+                    Q(owner_role='SUPER_ADMIN') |  # Global fields
+                    Q(owner_role='CLUB_ADMIN', club_id=club_id) |  # Their club fields
+                    Q(owner_role='MUNICIPALITY_ADMIN', municipality_id=municipality_id)  # Municipality fields for their club's municipality
+                )
+            except Club.DoesNotExist:
+                # Club doesn't exist, fall back to just global and club fields
+                return CustomFieldDefinition.objects.filter(
+                    Q(owner_role='SUPER_ADMIN') |  # Global fields
+                    Q(owner_role='CLUB_ADMIN', club_id=club_id)  # Their club fields
+                )
+        # If no club assigned, only show global fields
+        return CustomFieldDefinition.objects.filter(owner_role='SUPER_ADMIN')
+    
+    # Default: no access
+    return CustomFieldDefinition.objects.none()
@@ -6,6 +6,8 @@ from django.db.models import Q
 # Import User to check roles if needed, though request.user is sufficient
 from .models import CustomFieldDefinition, CustomFieldValue
 from .serializers import CustomFieldDefinitionSerializer, CustomFieldUserViewSerializer, CustomFieldValueSerializer
+from .utils import get_admin_field_definitions
+from users.scope import AdminScope
 
 class CustomFieldDefinitionViewSet(viewsets.ModelViewSet):
     serializer_class = CustomFieldDefinitionSerializer
@@ -18,69 +20,7 @@ class CustomFieldDefinitionViewSet(viewsets.ModelViewSet):
         - MUNICIPALITY_ADMIN: sees global fields + MUNICIPALITY_ADMIN fields for their municipality
         - CLUB_ADMIN: sees global fields + CLUB_ADMIN fields for their club
         """
-        user = self.request.user
-        role = user.role
-        
-        if role == 'SUPER_ADMIN':
-            # Super admins see ALL fields (global + municipality + club) for editing any user
-            return CustomFieldDefinition.objects.all()
-        
-        elif role == 'MUNICIPALITY_ADMIN':
-            # Municipality admins see global fields + their municipality fields + club fields for clubs in their municipality
-            municipality = user.assigned_municipality
-            if isinstance(municipality, dict):
-                municipality_id = municipality.get('id')
-            elif hasattr(municipality, 'id'):
-                municipality_id = municipality.id
-            else:
-                municipality_id = municipality
-            
-            if municipality_id:
-                # Get all club IDs in this municipality
-                from organization.models import Club
-                club_ids = Club.objects.filter(municipality_id=municipality_id).values_list('id', flat=True)
-                
-                return CustomFieldDefinition.objects.filter(
-                    Q(owner_role='SUPER_ADMIN') |  # Global fields
-                    Q(owner_role='MUNICIPALITY_ADMIN', municipality_id=municipality_id) |  # Their municipality fields
-                    Q(owner_role='CLUB_ADMIN', club_id__in=club_ids)  # Club fields for clubs in their municipality
-                )
-            # If no municipality assigned, only show global fields
-            return CustomFieldDefinition.objects.filter(owner_role='SUPER_ADMIN')
-        
-        elif role == 'CLUB_ADMIN':
-            # Club admins see global fields + their club fields + municipality fields for their club's municipality
-            club = user.assigned_club
-            if isinstance(club, dict):
-                club_id = club.get('id')
-            elif hasattr(club, 'id'):
-                club_id = club.id
-            else:
-                club_id = club
-            
-            if club_id:
-                # Get the club's municipality
-                from organization.models import Club
-                try:
-                    club_obj = Club.objects.get(id=club_id)
-                    municipality_id = club_obj.municipality_id
-                    
-                    return CustomFieldDefinition.objects.filter(
-                        Q(owner_role='SUPER_ADMIN') |  # Global fields
-                        Q(owner_role='CLUB_ADMIN', club_id=club_id) |  # Their club fields
-                        Q(owner_role='MUNICIPALITY_ADMIN', municipality_id=municipality_id)  # Municipality fields for their club's municipality
-                    )
-                except Club.DoesNotExist:
-                    # Club doesn't exist, fall back to just global and club fields
-                    return CustomFieldDefinition.objects.filter(
-                        Q(owner_role='SUPER_ADMIN') |  # Global fields
-                        Q(owner_role='CLUB_ADMIN', club_id=club_id)  # Their club fields
-                    )
-            # If no club assigned, only show global fields
-            return CustomFieldDefinition.objects.filter(owner_role='SUPER_ADMIN')
-        
-        # Default: no access
-        return CustomFieldDefinition.objects.none()
+        return get_admin_field_definitions(self.request.user)
     
     def perform_create(self, serializer):
         """
@@ -282,33 +222,19 @@ class CustomFieldDefinitionViewSet(viewsets.ModelViewSet):
         except User.DoesNotExist:
             return Response({"error": "User not found"}, status=404)
         
-        # Verify admin has permission to edit this user
-        # Super admin can edit anyone
-        if admin_user.role == 'SUPER_ADMIN':
-            pass  # Allowed
-        elif admin_user.role == 'MUNICIPALITY_ADMIN':
-            # Can only edit users in their municipality
-            if target_user.preferred_club and target_user.preferred_club.municipality != admin_user.assigned_municipality:
-                raise PermissionDenied("You can only view fields for users in your municipality.")
-        elif admin_user.role == 'CLUB_ADMIN':
-            # Can only edit users in their club
-            # For guardians, check if any of their youth members are in the admin's club
-            if target_user.role == 'GUARDIAN':
-                # Guardians are linked to youth through GuardianYouthLink
-                youth_links = target_user.youth_links.all()
-                has_youth_in_club = any(link.youth.preferred_club == admin_user.assigned_club for link in youth_links)
-                if not has_youth_in_club:
-                    raise PermissionDenied("You can only view fields for guardians linked to youth in your club.")
-            else:
-                # For youth members, check preferred_club
-                if target_user.preferred_club != admin_user.assigned_club:
-                    raise PermissionDenied("You can only view fields for users in your club.")
+        # Verify admin has permission to edit this user (one UserScope lookup;
+        # guardians are in scope through the clubs of their linked youth)
+        if not AdminScope.for_request(request).contains_user(target_user.id):
+            raise PermissionDenied("You can only view fields for users in your scope.")
         
         # Determine the target user's municipality and club
         # For guardians, get club from their linked youth members
         if target_user.role == 'GUARDIAN':
             # Guardians are linked to youth through GuardianYouthLink
-            youth_links = target_user.youth_links.all()
+            # (youth and their clubs are joined in, not loaded per link)
+            youth_links = target_user.youth_links.select_related(
+                'youth__preferred_club__municipality', 'youth__assigned_municipality'
+            )
             # Get the first youth member's club (or municipality if no club)
             target_club = None
             target_muni = None
@@ -388,43 +314,23 @@ class CustomFieldDefinitionViewSet(viewsets.ModelViewSet):
             return Response({"error": "User not found"}, status=404)
         
         # Verify admin has permission to edit this user
-        # Super admin can edit anyone
-        if admin_user.role == 'SUPER_ADMIN':
-            pass  # Allowed
-        elif admin_user.role == 'MUNICIPALITY_ADMIN':
-            # Can only edit users in their municipality
-            if target_user.preferred_club and target_user.preferred_club.municipality != admin_user.assigned_municipality:
-                raise PermissionDenied("You can only edit users in your municipality.")
-        elif admin_user.role == 'CLUB_ADMIN':
-            # Can only edit users in their club
-            # For guardians, check if any of their youth members are in the admin's club
-            if target_user.role == 'GUARDIAN':
-                # Guardians are linked to youth through GuardianYouthLink
-                youth_links = target_user.youth_links.all()
-                has_youth_in_club = any(link.youth.preferred_club == admin_user.assigned_club for link in youth_links)
-                if not has_youth_in_club:
-                    raise PermissionDenied("You can only edit guardians linked to youth in your club.")
-            else:
-                # For youth members, check preferred_club
-                if target_user.preferred_club != admin_user.assigned_club:
-                    raise PermissionDenied("You can only edit users in your club.")
+        if not AdminScope.for_request(request).contains_user(target_user.id):
+            raise PermissionDenied("You can only edit users in your scope.")
         
         results = []
         
-        # Get all fields the admin can see (to validate)
-        allowed_fields = self.get_queryset()
-        allowed_field_ids = set(allowed_fields.values_list('id', flat=True))
+        # Get all fields the admin can see (to validate), in one query
+        allowed_fields = self.get_queryset().in_bulk()
         
         for field_id_str, val in values.items():
             try:
                 field_id = int(field_id_str)
                 
                 # Security: Only allow fields the admin can see
-                if field_id not in allowed_field_ids:
+                field_def = allowed_fields.get(field_id)
+                if field_def is None:
                     continue
                 
-                field_def = CustomFieldDefinition.objects.get(id=field_id)
-                
                 obj, created = CustomFieldValue.objects.update_or_create(
                     field=field_def,
                     user=target_user,
@@ -1,4 +1,5 @@
 from rest_framework import permissions
+from users.scope import AdminScope
 
 class IsGroupAdminOrReadOnly(permissions.BasePermission):
     """
@@ -21,23 +22,9 @@ class IsGroupAdminOrReadOnly(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
 
-        user = request.user
-        if user.role == 'SUPER_ADMIN':
-            return True
-        
-        # Muni Admin can edit if group belongs to their muni OR a club in their muni
-        if user.role == 'MUNICIPALITY_ADMIN':
-            if obj.municipality == user.assigned_municipality:
-                return True
-            if obj.club and obj.club.municipality == user.assigned_municipality:
-                return True
-                
-        # Club Admin can edit if group belongs to their club
-        if user.role == 'CLUB_ADMIN':
-            if obj.club == user.assigned_club:
-                return True
-
-        return False
+        # Super Admin: anything. Muni Admin: groups of their muni OR a club in their muni.
+        # Club Admin: groups of their club. Compared on ids, without loading club/municipality.
+        return AdminScope.for_request(request).owns(obj)
 
 class IsGroupMembershipAdmin(permissions.BasePermission):
     """
@@ -48,20 +35,5 @@ class IsGroupMembershipAdmin(permissions.BasePermission):
         return request.user.is_authenticated and request.user.role in ['SUPER_ADMIN', 'MUNICIPALITY_ADMIN', 'CLUB_ADMIN']
 
     def has_object_permission(self, request, view, obj):
-        # obj is a GroupMembership instance
-        user = request.user
-        group = obj.group
-        
-        if user.role == 'SUPER_ADMIN':
-            return True
-        
-        # Muni Admin: Owns the group directly OR owns the club the group belongs to
-        if user.role == 'MUNICIPALITY_ADMIN':
-            return (group.municipality == user.assigned_municipality) or \
-                   (group.club and group.club.municipality == user.assigned_municipality)
-                
-        # Club Admin: Owns the club the group belongs to
-        if user.role == 'CLUB_ADMIN':
-            return group.club == user.assigned_club
-
-        return False
\ No newline at end of file
+        # obj is a GroupMembership instance; the admin must manage its group
+        return AdminScope.for_request(request).owns(obj.group)
\ No newline at end of file
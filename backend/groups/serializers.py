@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from api.images import SrcsetField
 from .models import Group, GroupMembership
 from organization.serializers import InterestSerializer
 from users.models import User  # Import User
@@ -10,12 +11,13 @@ class GroupMembershipSerializer(serializers.ModelSerializer):
     user_name = serializers.SerializerMethodField()
     user_email = serializers.CharField(source='user.email', read_only=True)
     user_avatar = serializers.ImageField(source='user.avatar', read_only=True)
+    user_avatar_srcset = SrcsetField(source='user.avatar')
     # NEW: Group Name for the requests list
     group_name = serializers.CharField(source='group.name', read_only=True)
 
     class Meta:
         model = GroupMembership
-        fields = ['id', 'user', 'user_name', 'user_email', 'user_avatar', 'group', 'group_name', 'status', 'role', 'joined_at']
+        fields = ['id', 'user', 'user_name', 'user_email', 'user_avatar', 'user_avatar_srcset', 'group', 'group_name', 'status', 'role', 'joined_at']
 
     def get_user_name(self, obj):
         return f"{obj.user.first_name} {obj.user.last_name}"
@@ -27,6 +29,7 @@ class GroupSerializer(serializers.ModelSerializer):
     
     member_count = serializers.SerializerMethodField()
     pending_request_count = serializers.SerializerMethodField()
+    avatar_srcset = SrcsetField(source='avatar')
 
     # NEW: Write-only field to accept a list of User IDs to add immediately
     members_to_add = serializers.ListField(
@@ -38,7 +41,7 @@ class GroupSerializer(serializers.ModelSerializer):
     class Meta:
         model = Group
         fields = [
-            'id', 'name', 'description', 'avatar',
+            'id', 'name', 'description', 'avatar', 'avatar_srcset',
             'municipality', 'municipality_name',
             'club', 'club_name',
             'group_type', 'target_member_type',
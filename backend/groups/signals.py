@@ -2,6 +2,7 @@ from django.db.models.signals import post_save
 from django.contrib.auth.signals import user_logged_in
 from django.dispatch import receiver
 from users.models import User
+from users.tracking import when_changed
 from .models import Group, GroupMembership
 
 # 1. Registered Members (Triggered when a User is created)
@@ -16,6 +17,7 @@ def add_to_registered_group(sender, instance, created, **kwargs):
 
 # 2. Verified Members (Triggered when User is saved/updated)
 @receiver(post_save, sender=User)
+@when_changed('verification_status')
 def update_verified_group(sender, instance, **kwargs):
     try:
         group = Group.objects.get(system_group_type='VERIFIED')
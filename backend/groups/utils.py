@@ -0,0 +1,22 @@
+from .models import Group, GroupMembership
+
+
+def add_to_system_group(group_type, user_ids):
+    """
+    Adds users to a system group (REGISTERED, VERIFIED, ...) in one bulk INSERT.
+    Existing memberships are left as they are. Returns the number of users passed in,
+    or 0 if the group has not been created yet.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return 0
+    group = Group.objects.filter(system_group_type=group_type).first()
+    if group is None:
+        return 0
+    GroupMembership.objects.bulk_create(
+        [GroupMembership(user_id=uid, group=group, status='APPROVED') for uid in user_ids],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    return len(user_ids)
+
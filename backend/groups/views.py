@@ -3,13 +3,16 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Q, Count
 from django.utils import timezone
-from datetime import timedelta, date
+from datetime import timedelta
 import json
 from .models import Group, GroupMembership
 from .serializers import GroupSerializer, GroupMembershipSerializer
 from .permissions import IsGroupAdminOrReadOnly, IsGroupMembershipAdmin
 from users.models import User
 from users.serializers import CustomUserSerializer
+from users.filters import UserDemographicFilter
+from users.search import search_users
+from users.scope import AdminScope
 
 class GroupViewSet(viewsets.ModelViewSet):
     serializer_class = GroupSerializer
@@ -28,9 +31,8 @@ class GroupViewSet(viewsets.ModelViewSet):
         # 2. Municipality Admins see groups in their scope
         if user.role == 'MUNICIPALITY_ADMIN' and user.assigned_municipality:
             return Group.objects.filter(
-                Q(municipality=user.assigned_municipality) |
-                Q(club__municipality=user.assigned_municipality)
-            ).distinct().order_by('-created_at')
+                AdminScope.for_request(self.request).owner_q()
+            ).order_by('-created_at')
 
         # 3. Club Admins see groups in their club
         if user.role == 'CLUB_ADMIN' and user.assigned_club:
@@ -195,42 +197,12 @@ class GroupViewSet(viewsets.ModelViewSet):
         Returns users who MATCH the provided criteria (age, grade, custom fields)
         AND fall within the Admin's scope.
         """
-        user = request.user
-        
-        # 1. Base Scope: Filter by Admin Role
-        queryset = User.objects.filter(is_active=True)
+        # 1. Base Scope: the admin's UserScope rows (users/scope.py)
+        queryset = AdminScope.for_request(request).filter_users(User.objects.filter(is_active=True))
         
-        if user.role == 'MUNICIPALITY_ADMIN' and user.assigned_municipality:
-            queryset = queryset.filter(
-                Q(preferred_club__municipality=user.assigned_municipality) |
-                Q(assigned_municipality=user.assigned_municipality)
-            )
-        elif user.role == 'CLUB_ADMIN' and user.assigned_club:
-            queryset = queryset.filter(preferred_club=user.assigned_club)
-        
-        # 2. Filter by Member Type
-        member_type = request.query_params.get('target_member_type', 'YOUTH')
-        if member_type == 'YOUTH':
-            queryset = queryset.filter(role='YOUTH_MEMBER')
-        elif member_type == 'GUARDIAN':
-            queryset = queryset.filter(role='GUARDIAN')
-
-        # 3. Filter by Grade
-        grades_param = request.query_params.get('grades')
-        if grades_param:
-            try:
-                grade_list = [int(g) for g in grades_param.split(',') if g.strip()]
-                if grade_list:
-                    queryset = queryset.filter(grade__in=grade_list)
-            except ValueError:
-                pass
-
-        # 4. Filter by Gender
-        genders_param = request.query_params.get('genders')
-        if genders_param:
-            gender_list = [g.strip() for g in genders_param.split(',') if g.strip()]
-            if gender_list:
-                queryset = queryset.filter(legal_gender__in=gender_list)
+        # 2-4. Member type, grades and genders (shared with the admin user list)
+        demographics = UserDemographicFilter.from_candidate_params(request.query_params)
+        queryset = demographics.apply(queryset)
 
         # 5. Filter by Interests
         interests_param = request.query_params.get('interests')
@@ -242,26 +214,10 @@ class GroupViewSet(viewsets.ModelViewSet):
             except ValueError:
                 pass
 
-        # 6. Filter by Age Range
-        min_age = request.query_params.get('min_age')
-        max_age = request.query_params.get('max_age')
-        if min_age or max_age:
-            today = date.today()
-            if min_age:
-                max_dob = today.replace(year=today.year - int(min_age))
-                queryset = queryset.filter(date_of_birth__lte=max_dob)
-            if max_age:
-                min_dob = today.replace(year=today.year - int(max_age) - 1)
-                queryset = queryset.filter(date_of_birth__gt=min_dob)
-
         # 7. Text Search
         search = request.query_params.get('search')
         if search:
-            queryset = queryset.filter(
-                Q(first_name__icontains=search) | 
-                Q(last_name__icontains=search) | 
-                Q(email__icontains=search)
-            )
+            queryset = search_users(queryset, search, rank=True).order_by('-search_rank')
 
         # 8. Exclude existing
         group_id = request.query_params.get('exclude_group')
@@ -293,7 +249,8 @@ class GroupViewSet(viewsets.ModelViewSet):
             except (ValueError, json.JSONDecodeError):
                 pass
 
-        # Paginate results
+        # Paginate results (relations for the whole page are prefetched in bulk)
+        queryset = CustomUserSerializer.prefetch_related_objects(queryset)
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = CustomUserSerializer(page, many=True)
@@ -319,13 +276,9 @@ class GroupMembershipViewSet(viewsets.ModelViewSet):
         # 1. Scope Filtering
         if user.role == 'SUPER_ADMIN':
             pass # See all
-        elif user.role == 'MUNICIPALITY_ADMIN' and user.assigned_municipality:
-            queryset = queryset.filter(
-                Q(group__municipality=user.assigned_municipality) |
-                Q(group__club__municipality=user.assigned_municipality)
-            )
-        elif user.role == 'CLUB_ADMIN' and user.assigned_club:
-            queryset = queryset.filter(group__club=user.assigned_club)
+        elif (user.role == 'MUNICIPALITY_ADMIN' and user.assigned_municipality) or \
+                (user.role == 'CLUB_ADMIN' and user.assigned_club):
+            queryset = queryset.filter(AdminScope.for_request(self.request).owner_q('group__'))
         else:
             return GroupMembership.objects.none()
 
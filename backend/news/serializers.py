@@ -1,5 +1,6 @@
 import json
 from rest_framework import serializers
+from api.images import SrcsetField
 from .models import NewsTag, NewsArticle
 
 class NewsTagSerializer(serializers.ModelSerializer):
@@ -13,6 +14,9 @@ class NewsArticleSerializer(serializers.ModelSerializer):
     
     # Read-only field to display full tag objects (for the UI chips)
     tags_details = NewsTagSerializer(source='tags', many=True, read_only=True)
+
+    # Resized variants of hero_image (see api/images.py)
+    hero_image_srcset = SrcsetField(source='hero_image')
     
     # We accept a JSON string for target_roles because we are using FormData (for images)
     target_roles_data = serializers.CharField(write_only=True, required=False)
@@ -25,6 +29,7 @@ class NewsArticleSerializer(serializers.ModelSerializer):
             'excerpt', 
             'content', 
             'hero_image',
+            'hero_image_srcset',
             'author', 
             'author_name', 
             'tags',          # Used for writing (sending IDs like [1, 2])
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.http import QueryDict
 import json
+from api.images import SrcsetField
 from .models import Country, Municipality, Club, RegularOpeningHour, ClubClosure, DateOverride, Interest
 
 # --- Opening Hours Serializers ---
@@ -29,6 +30,8 @@ class DateOverrideSerializer(serializers.ModelSerializer):
 # --- Organization Serializers ---
 
 class CountrySerializer(serializers.ModelSerializer):
+    avatar_srcset = SrcsetField(source='avatar')
+
     class Meta:
         model = Country
         fields = [
@@ -40,13 +43,16 @@ class CountrySerializer(serializers.ModelSerializer):
             'default_language',
             'timezone',
             'avatar',
+            'avatar_srcset',
         ]
 
 class MunicipalitySerializer(serializers.ModelSerializer):
     # Include country name for easier display
     country_name = serializers.CharField(source='country.name', read_only=True)
     country_code = serializers.CharField(source='country.country_code', read_only=True)
-    
+    avatar_srcset = SrcsetField(source='avatar')
+    hero_image_srcset = SrcsetField(source='hero_image')
+
     class Meta:
         model = Municipality
         fields = [
@@ -59,7 +65,9 @@ class MunicipalitySerializer(serializers.ModelSerializer):
             'description',
             'terms_and_conditions',
             'avatar',
+            'avatar_srcset',
             'hero_image',
+            'hero_image_srcset',
             'email',
             'phone',
             'website_link',
@@ -76,22 +84,28 @@ class ClubSerializer(serializers.ModelSerializer):
     closures = ClubClosureSerializer(many=True, read_only=True)
     date_overrides = DateOverrideSerializer(many=True, read_only=True)
 
+    # Resized variants of the images (see api/images.py)
+    avatar_srcset = SrcsetField(source='avatar')
+    hero_image_srcset = SrcsetField(source='hero_image')
+
     class Meta:
         model = Club
         fields = [
             'id', 'name', 'municipality', 'municipality_name', 
             'description', 'email', 'phone', 
             'terms_and_conditions', 'club_policies',
-            'avatar', 'hero_image', 'address', 
+            'avatar', 'avatar_srcset', 'hero_image', 'hero_image_srcset', 'address', 
             'latitude', 'longitude', 
             'allowed_age_groups', 'club_categories',
             'regular_hours', 'closures', 'date_overrides'
         ]
 
 class InterestSerializer(serializers.ModelSerializer):
+    avatar_srcset = SrcsetField(source='avatar')
+
     class Meta:
         model = Interest
-        fields = ['id', 'name', 'icon', 'avatar']
+        fields = ['id', 'name', 'icon', 'avatar', 'avatar_srcset']
 
 
 class ClubManagementSerializer(serializers.ModelSerializer):
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from api.images import SrcsetField
 from .models import Reward, RewardUsage
 from organization.serializers import InterestSerializer, ClubSerializer
 from groups.serializers import GroupSerializer
@@ -17,6 +18,7 @@ class RewardSerializer(serializers.ModelSerializer):
     # Read-only fields to show details nicely in the frontend
     municipality_name = serializers.CharField(source='municipality.name', read_only=True)
     club_name = serializers.CharField(source='club.name', read_only=True)
+    image_srcset = SrcsetField(source='image')
     
     # Nested serializers for reading (shows full object details)
     target_groups_details = GroupSerializer(source='target_groups', many=True, read_only=True)
@@ -33,7 +35,7 @@ class RewardSerializer(serializers.ModelSerializer):
     class Meta:
         model = Reward
         fields = [
-            'id', 'name', 'description', 'image', 
+            'id', 'name', 'description', 'image', 'image_srcset',
             'sponsor_name', 'sponsor_link',
             'owner_role', 'municipality', 'municipality_name', 'club', 'club_name',
             'target_groups', 'target_groups_details',
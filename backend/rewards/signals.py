@@ -1,27 +1,14 @@
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils import timezone
 from users.models import User
+from users.tracking import when_changed
 from .models import Reward, RewardUsage
 from .utils import grant_reward
 
 
-@receiver(pre_save, sender=User)
-def track_dob_change(sender, instance, **kwargs):
-    """
-    Checks if date_of_birth is changing.
-    We attach a temporary flag '_dob_changed' to the instance to check in post_save.
-    """
-    if instance.pk: # Only for existing users
-        try:
-            old_user = User.objects.get(pk=instance.pk)
-            if old_user.date_of_birth != instance.date_of_birth:
-                instance._dob_changed = True
-        except User.DoesNotExist:
-            pass
-
-
 @receiver(post_save, sender=User)
+@when_changed('verification_status', 'date_of_birth')
 def check_reward_triggers(sender, instance, created, **kwargs):
     """
     Handles all automatic triggers: WELCOME, VERIFIED, and BIRTHDAY (on change).
@@ -37,7 +24,7 @@ def check_reward_triggers(sender, instance, created, **kwargs):
                 grant_reward(user, reward)
 
     # --- 2. VERIFIED TRIGGER (On Update) ---
-    if not created and user.verification_status == 'VERIFIED':
+    if not created and user.has_changed('verification_status') and user.verification_status == 'VERIFIED':
         verified_rewards = Reward.objects.filter(active_triggers__icontains="VERIFIED", is_active=True)
         for reward in verified_rewards:
             triggers = reward.active_triggers if isinstance(reward.active_triggers, list) else []
@@ -46,7 +33,7 @@ def check_reward_triggers(sender, instance, created, **kwargs):
 
     # --- 3. BIRTHDAY TRIGGER (On DOB Change) ---
     # If the user changes their birthday, we re-evaluate.
-    if getattr(instance, '_dob_changed', False):
+    if not created and user.has_changed('date_of_birth'):
         print(f"🎂 DOB changed for {user.email}. Re-evaluating birthday rewards...")
         
         # A. Revoke existing unredeemed birthday rewards
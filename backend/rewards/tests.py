@@ -1,3 +1,88 @@
+from datetime import date
+
 from django.test import TestCase
 
-# Create your tests here.
+from organization.models import Club, Country, Municipality
+from users.models import User
+from .models import Reward, RewardUsage
+from .utils import eligible_rewards_for_users, eligible_users_queryset, is_user_eligible_for_reward
+
+
+def born(age):
+    # January 1st: the birthday has passed this year, so the age is exact
+    return date(date.today().year - age, 1, 1)
+
+
+class RewardTargetingConsistencyTests(TestCase):
+    """
+    is_user_eligible_for_reward, eligible_users_queryset and eligible_rewards_for_users
+    must accept exactly the same users for every reward.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        country = Country.objects.create(name='Sweden', country_code='SE', description='')
+        north = Municipality.objects.create(country=country, name='North', description='', terms_and_conditions='')
+        south = Municipality.objects.create(country=country, name='South', description='', terms_and_conditions='')
+        north_club = Club.objects.create(municipality=north, name='North Club', phone='1')
+        south_club = Club.objects.create(municipality=south, name='South Club', phone='2')
+
+        create = User.objects.create_user
+        cls.users = [
+            create('a@example.com', role='YOUTH_MEMBER', preferred_club=north_club, grade=7,
+                   legal_gender='FEMALE', date_of_birth=born(13)),
+            create('b@example.com', role='YOUTH_MEMBER', preferred_club=south_club, grade=9,
+                   legal_gender='MALE', date_of_birth=born(16)),
+            create('c@example.com', role='YOUTH_MEMBER', preferred_club=north_club, grade=None,
+                   legal_gender='MALE', date_of_birth=None),
+            create('d@example.com', role='YOUTH_MEMBER', assigned_municipality=south,
+                   preferred_club=north_club, grade=8, legal_gender='FEMALE', date_of_birth=born(10)),
+            create('e@example.com', role='YOUTH_MEMBER', assigned_club=south_club,
+                   preferred_club=north_club, grade=8, legal_gender='OTHER', date_of_birth=born(20)),
+            create('f@example.com', role='GUARDIAN', legal_gender='FEMALE', date_of_birth=born(40)),
+            create('g@example.com', role='YOUTH_MEMBER', grade=7, legal_gender='FEMALE', date_of_birth=born(12)),
+        ]
+
+        reward = lambda **kwargs: Reward.objects.create(description='', **{'owner_role': 'SUPER_ADMIN', **kwargs})
+        cls.rewards = [
+            reward(name='everyone'),
+            reward(name='north', owner_role='MUNICIPALITY_ADMIN', municipality=north),
+            reward(name='south', owner_role='MUNICIPALITY_ADMIN', municipality=south),
+            reward(name='north club', owner_role='CLUB_ADMIN', club=north_club),
+            reward(name='south club', owner_role='CLUB_ADMIN', club=south_club),
+            reward(name='guardians', target_member_type='GUARDIAN'),
+            reward(name='girls', target_genders=['FEMALE']),
+            reward(name='grades 7-8', target_grades=[7, 8]),
+            reward(name='age 12-16', min_age=12, max_age=16),
+            reward(name='from 14', min_age=14),
+            reward(name='limited', usage_limit=1),
+            reward(name='inactive', is_active=False),
+            reward(name='north girls 7', owner_role='MUNICIPALITY_ADMIN', municipality=north,
+                   target_genders=['FEMALE'], target_grades=[7], max_age=13),
+        ]
+        limited = cls.rewards[10]
+        RewardUsage.objects.create(user=cls.users[0], reward=limited, is_redeemed=True)
+        RewardUsage.objects.create(user=cls.users[1], reward=limited, is_redeemed=False)
+
+    def test_all_forms_agree(self):
+        users = list(User.objects.filter(id__in=[user.id for user in self.users]))
+        batch = eligible_rewards_for_users(users)
+        for reward in self.rewards:
+            per_user = {user.id for user in users if is_user_eligible_for_reward(user, reward)}
+            in_sql = set(eligible_users_queryset(reward, User.objects.all()).values_list('id', flat=True))
+            in_batch = {
+                user_id for user_id, entries in batch.items()
+                for candidate, used in entries
+                if candidate.pk == reward.pk and not (reward.usage_limit and used >= reward.usage_limit)
+            }
+            self.assertEqual(per_user, in_sql, reward.name)
+            self.assertEqual(per_user, in_batch, reward.name)
+
+    def test_fixtures_exercise_the_rules(self):
+        users = {user.email: user for user in self.users}
+        by_name = {reward.name: reward for reward in self.rewards}
+        self.assertTrue(is_user_eligible_for_reward(users['d@example.com'], by_name['south']))
+        self.assertFalse(is_user_eligible_for_reward(users['d@example.com'], by_name['north']))
+        self.assertTrue(is_user_eligible_for_reward(users['c@example.com'], by_name['age 12-16']))
+        self.assertFalse(is_user_eligible_for_reward(users['a@example.com'], by_name['limited']))
+        self.assertTrue(is_user_eligible_for_reward(users['a@example.com'], by_name['north girls 7']))
@@ -1,65 +1,74 @@
+import logging
+
+from django.db.models import Count, Q
 from django.utils import timezone
+from users.filters import age_range_q
+from organization.models import Club
 from .models import Reward, RewardUsage
 
-def is_user_eligible_for_reward(user, reward):
-    """
-    Checks if a user meets all targeting criteria for a reward.
+logger = logging.getLogger(__name__)
+
+
+def targeting_mismatch(user, reward, club_municipality_id=None):
     """
-    print(f"Checking eligibility for User: {user.email} vs Reward: {reward.name}")
+    Why a user falls outside a reward's targeting (scope, member type, gender,
+    grade, age), or None when they match. No queries: the municipality of the
+    user's preferred club is passed in.
 
-    # 1. Active Check
-    if not reward.is_active:
-        print("-> Failed: Reward is inactive")
-        return False
-    
-    # 2. Scope Check
+    This is the one Python form of the rules; eligible_users_queryset() is the
+    SQL form and rewards/tests.py checks that both agree. is_active and the
+    usage limit are left to the callers.
+    """
+    # 1. Scope
     if reward.owner_role == 'MUNICIPALITY_ADMIN':
-        user_muni = user.assigned_municipality
-        if not user_muni and user.preferred_club:
-            user_muni = user.preferred_club.municipality
-        if user_muni != reward.municipality:
-            print("-> Failed: Municipality scope mismatch")
-            return False
-            
+        municipality_id = user.assigned_municipality_id or club_municipality_id
+        if municipality_id != reward.municipality_id:
+            return "Municipality scope mismatch"
     if reward.owner_role == 'CLUB_ADMIN':
-        user_club = user.assigned_club or user.preferred_club
-        if user_club != reward.club:
-            print("-> Failed: Club scope mismatch")
-            return False
+        if (user.assigned_club_id or user.preferred_club_id) != reward.club_id:
+            return "Club scope mismatch"
 
-    # 3. Member Type
+    # 2. Member Type
     if reward.target_member_type != user.role:
-        print(f"-> Failed: Role mismatch. Reward wants {reward.target_member_type}, User is {user.role}")
-        return False
+        return f"Role mismatch. Reward wants {reward.target_member_type}, User is {user.role}"
 
-    # 4. Demographics
+    # 3. Demographics
     if reward.target_genders and user.legal_gender not in reward.target_genders:
-        print(f"-> Failed: Gender mismatch. Reward needs {reward.target_genders}")
+        return f"Gender mismatch. Reward needs {reward.target_genders}"
+    if reward.target_grades and (user.grade is None or user.grade not in reward.target_grades):
+        return f"Grade mismatch. User grade is {user.grade}"
+
+    # 4. Age (users without a date of birth are not age-checked)
+    age = user.age
+    if age is not None:
+        if reward.min_age and age < reward.min_age:
+            return f"Too young ({age} < {reward.min_age})"
+        if reward.max_age and age > reward.max_age:
+            return f"Too old ({age} > {reward.max_age})"
+    return None
+
+
+def is_user_eligible_for_reward(user, reward):
+    """
+    Checks if a user meets all targeting criteria for a reward.
+    """
+    if not reward.is_active:
+        logger.debug("%s not eligible for %s: reward is inactive", user.email, reward.name)
+        return False
+
+    club_municipality_id = None
+    if reward.owner_role == 'MUNICIPALITY_ADMIN' and not user.assigned_municipality_id and user.preferred_club_id:
+        club_municipality_id = user.preferred_club.municipality_id
+    mismatch = targeting_mismatch(user, reward, club_municipality_id)
+    if mismatch:
+        logger.debug("%s not eligible for %s: %s", user.email, reward.name, mismatch)
         return False
-    
-    # Note: Ensure user.grade is not None before comparing if target_grades is set
-    if reward.target_grades:
-        if user.grade is None or user.grade not in reward.target_grades:
-            print(f"-> Failed: Grade mismatch. User grade is {user.grade}")
-            return False
-    
-    # 5. Age
-    if user.age is not None:
-        if reward.min_age and user.age < reward.min_age: 
-            print(f"-> Failed: Too young ({user.age} < {reward.min_age})")
-            return False
-        if reward.max_age and user.age > reward.max_age: 
-            print(f"-> Failed: Too old ({user.age} > {reward.max_age})")
-            return False
 
-    # 6. Usage Limit
     if reward.usage_limit:
         count = RewardUsage.objects.filter(user=user, reward=reward).count()
         if count >= reward.usage_limit:
-            print("-> Failed: Usage limit reached")
+            logger.debug("%s not eligible for %s: usage limit reached", user.email, reward.name)
             return False
-
-    print("-> Success! Eligible.")
     return True
 
 def grant_reward(user, reward):
@@ -90,4 +99,130 @@ def grant_reward(user, reward):
         print(f"-> Granted '{reward.name}' to {user.email} (Pending Redemption)")
         return True
         
-    return False
\ No newline at end of file
+    return False
+
+# --- Set-based variants (bulk imports, mass updates) ---
+
+def eligible_users_queryset(reward, queryset):
+    """
+    Narrows a User queryset to the users is_user_eligible_for_reward would accept,
+    expressed as one SQL filter instead of a Python check per user (the SQL form
+    of targeting_mismatch).
+    """
+    # 1. Active Check
+    if not reward.is_active:
+        return queryset.none()
+
+    # 2. Scope Check (same fallbacks as the per-user check)
+    if reward.owner_role == 'MUNICIPALITY_ADMIN':
+        queryset = queryset.filter(
+            Q(assigned_municipality_id=reward.municipality_id) |
+            Q(assigned_municipality__isnull=True, preferred_club__municipality_id=reward.municipality_id)
+        )
+    if reward.owner_role == 'CLUB_ADMIN':
+        queryset = queryset.filter(
+            Q(assigned_club_id=reward.club_id) |
+            Q(assigned_club__isnull=True, preferred_club_id=reward.club_id)
+        )
+
+    # 3. Member Type
+    queryset = queryset.filter(role=reward.target_member_type)
+
+    # 4. Demographics
+    if reward.target_genders:
+        queryset = queryset.filter(legal_gender__in=reward.target_genders)
+    if reward.target_grades:
+        queryset = queryset.filter(grade__in=reward.target_grades)
+
+    # 5. Age (users without a date of birth are not age-checked)
+    if reward.min_age or reward.max_age:
+        queryset = queryset.filter(
+            Q(date_of_birth__isnull=True) | age_range_q(reward.min_age or None, reward.max_age or None)
+        )
+
+    # 6. Usage Limit
+    if reward.usage_limit:
+        queryset = queryset.annotate(
+            reward_usage_count=Count('reward_usages', filter=Q(reward_usages__reward=reward))
+        ).filter(reward_usage_count__lt=reward.usage_limit)
+
+    return queryset
+
+
+def grant_reward_bulk(reward, queryset):
+    """
+    Grants a reward to every eligible user in the queryset that does not already
+    hold an unredeemed copy. One SELECT plus one bulk INSERT; returns the number granted.
+    """
+    already_holding = RewardUsage.objects.filter(reward=reward, is_redeemed=False).values('user_id')
+    user_ids = list(
+        eligible_users_queryset(reward, queryset)
+        .exclude(id__in=already_holding)
+        .values_list('id', flat=True)
+    )
+    RewardUsage.objects.bulk_create(
+        [RewardUsage(user_id=uid, reward=reward, is_redeemed=False, redeemed_at=None) for uid in user_ids],
+        batch_size=1000,
+    )
+    logger.info("Granted '%s' to %d users (bulk)", reward.name, len(user_ids))
+    return len(user_ids)
+
+
+def rewards_with_trigger(trigger):
+    """
+    Active rewards that have `trigger` in active_triggers.
+    """
+    rewards = Reward.objects.filter(active_triggers__icontains=trigger, is_active=True)
+    return [
+        reward for reward in rewards
+        if isinstance(reward.active_triggers, list) and trigger in reward.active_triggers
+    ]
+
+
+def eligible_rewards_for_users(users):
+    """
+    {user_id: [(reward, times_used), ...]} for a page of users, with the same
+    rules as is_user_eligible_for_reward. Rewards whose usage limit is reached
+    are included; compare times_used with reward.usage_limit.
+
+    Three queries whatever the number of users or rewards: the municipalities of
+    the preferred clubs, the candidate rewards and one grouped usage count.
+    """
+    users = list(users)
+    result = {user.pk: [] for user in users}
+    if not users:
+        return result
+
+    # 1. Municipality of each preferred club (the municipality scope fallback)
+    club_ids = {user.preferred_club_id for user in users if user.preferred_club_id}
+    club_municipality = dict(Club.objects.filter(id__in=club_ids).values_list('id', 'municipality_id')) if club_ids else {}
+
+    # 2. Active rewards that can match at least one of the users
+    municipality_ids = {user.assigned_municipality_id for user in users} | set(club_municipality.values())
+    own_club_ids = {user.assigned_club_id or user.preferred_club_id for user in users}
+    rewards = list(Reward.objects.filter(
+        Q(owner_role='SUPER_ADMIN') |
+        Q(owner_role='MUNICIPALITY_ADMIN', municipality_id__in=municipality_ids - {None}) |
+        Q(owner_role='CLUB_ADMIN', club_id__in=own_club_ids - {None}),
+        is_active=True,
+        target_member_type__in={user.role for user in users},
+    ).order_by('name'))
+
+    matches = [
+        (user, reward) for user in users for reward in rewards
+        if targeting_mismatch(user, reward, club_municipality.get(user.preferred_club_id)) is None
+    ]
+    if not matches:
+        return result
+
+    # 3. How often each user already has each matching reward
+    used = {
+        (row['user_id'], row['reward_id']): row['count']
+        for row in RewardUsage.objects.filter(
+            user_id__in={user.pk for user, _ in matches},
+            reward_id__in={reward.pk for _, reward in matches},
+        ).values('user_id', 'reward_id').annotate(count=Count('id'))
+    }
+    for user, reward in matches:
+        result[user.pk].append((reward, used.get((user.pk, reward.pk), 0)))
+    return result
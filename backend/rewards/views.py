@@ -6,6 +6,7 @@ from django.db.models import Q, Count
 from django.utils import timezone
 from datetime import timedelta
 
+from users.scope import AdminScope
 from .models import Reward, RewardUsage
 from .serializers import RewardSerializer, RewardUsageSerializer
 
@@ -26,10 +27,7 @@ class RewardViewSet(viewsets.ModelViewSet):
 
         # Municipality Admin sees rewards in their muni + rewards in clubs of their muni
         if user.role == 'MUNICIPALITY_ADMIN' and user.assigned_municipality:
-            return queryset.filter(
-                Q(municipality=user.assigned_municipality) |
-                Q(club__municipality=user.assigned_municipality)
-            )
+            return queryset.filter(AdminScope.for_request(self.request).owner_q())
 
         # Club Admin sees only rewards in their club
         if user.role == 'CLUB_ADMIN' and user.assigned_club:
@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import DailyActiveUser, UserLoginHistory
+
+BACKFILL_CHUNK_SIZE = 5000
+
+
+def record_daily_activity(events):
+    """
+    Marks (user, local day) as active for every (user_id, timestamp) pair.
+    One INSERT; days already recorded are skipped by the unique constraint.
+    """
+    rows = {(timezone.localdate(timestamp), user_id) for user_id, timestamp in events}
+    DailyActiveUser.objects.bulk_create(
+        [DailyActiveUser(date=day, user_id=user_id) for day, user_id in rows],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    return len(rows)
+
+
+def backfill_daily_activity(since=None):
+    """
+    Rebuilds the rollup from UserLoginHistory (optionally only logins since a datetime).
+    Returns the number of (day, user) pairs seen.
+    """
+    history = UserLoginHistory.objects.order_by()
+    if since is not None:
+        history = history.filter(timestamp__gte=since)
+
+    total, chunk = 0, []
+    for event in history.values_list('user_id', 'timestamp').iterator(chunk_size=BACKFILL_CHUNK_SIZE):
+        chunk.append(event)
+        if len(chunk) >= BACKFILL_CHUNK_SIZE:
+            total += record_daily_activity(chunk)
+            chunk = []
+    if chunk:
+        total += record_daily_activity(chunk)
+    return total
+
+
+def activity_summary(users, trend_days=30):
+    """
+    DAU / WAU / MAU and a daily trend for the users in `users` (a User queryset,
+    already filtered by role and scope). Two queries against the rollup table.
+    """
+    today = timezone.localdate()
+    week_start = today - timedelta(days=6)
+    month_start = today - timedelta(days=29)
+    trend_start = today - timedelta(days=trend_days - 1)
+
+    rollup = DailyActiveUser.objects.filter(user_id__in=users.values('id'))
+    row = rollup.filter(date__gte=min(month_start, trend_start)).aggregate(
+        dau=Count('user_id', distinct=True, filter=Q(date=today)),
+        wau=Count('user_id', distinct=True, filter=Q(date__gte=week_start)),
+        mau=Count('user_id', distinct=True, filter=Q(date__gte=month_start)),
+    )
+    per_day = dict(
+        rollup.filter(date__gte=trend_start).order_by()
+        .values('date').annotate(count=Count('user_id')).values_list('date', 'count')
+    )
+    trend = [
+        {"date": day.isoformat(), "active": per_day.get(day, 0)}
+        for day in (trend_start + timedelta(days=offset) for offset in range(trend_days))
+    ]
+    return {
+        "dau": row['dau'],
+        "wau": row['wau'],
+        "mau": row['mau'],
+        "trend": trend,
+    }
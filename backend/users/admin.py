@@ -1,6 +1,7 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
 from django.contrib.auth.admin import UserAdmin
-from django.utils.html import format_html
+from django.utils.html import format_html, format_html_join
 from datetime import date
 from .models import (
     User,
@@ -10,9 +11,12 @@ from .models import (
     MunicipalityAdmin,
     GuardianYouthLink,
     UserLoginHistory,
+    UserLoginMonthly,
+    GradeRolloverRun,
 )
 # Import the Reward models
-from rewards.models import Reward, RewardUsage
+from rewards.models import RewardUsage
+from rewards.utils import eligible_rewards_for_users
 
 # --- INLINES ---
 
@@ -44,6 +48,18 @@ class YouthLinkInline(admin.TabularInline):
 
 # --- BASE ADMIN SETUP ---
 
+class EligibleRewardsChangeList(ChangeList):
+    """
+    Evaluates reward eligibility for the whole page at once, for the
+    "Eligible rewards" column.
+    """
+    def get_results(self, request):
+        super().get_results(request)
+        eligible = eligible_rewards_for_users(self.result_list)
+        for user in self.result_list:
+            user._eligible_rewards = eligible[user.pk]
+
+
 class BaseRoleAdmin(UserAdmin):
     ordering = ['email']
     list_display = ('email', 'first_name', 'last_name', 'role')
@@ -70,76 +86,46 @@ class BaseRoleAdmin(UserAdmin):
     # Allow us to display the calculated field
     readonly_fields = ('view_eligible_rewards',)
 
+    def get_changelist(self, request, **kwargs):
+        return EligibleRewardsChangeList
+
     def view_eligible_rewards(self, user):
         """
-        Calculates which rewards this specific user matches based on rules.
+        Rewards this user matches based on the targeting rules (rewards/utils.py).
         """
-        # 1. Fetch all active rewards
-        all_rewards = Reward.objects.filter(is_active=True)
-        eligible_list = []
-
-        # 2. Calculate User Age
-        user_age = user.age if user.date_of_birth else None
-
-        for r in all_rewards:
-            # --- CHECK 1: SCOPE (Who owns the reward?) ---
-            # If Super Admin: Everyone sees it
-            # If Muni Admin: User must be in that Muni
-            # If Club Admin: User must be in that Club
-            if r.owner_role == 'MUNICIPALITY_ADMIN':
-                if user.assigned_municipality != r.municipality and \
-                   (not user.preferred_club or user.preferred_club.municipality != r.municipality):
-                    continue
-            
-            if r.owner_role == 'CLUB_ADMIN':
-                if user.preferred_club != r.club and user.assigned_club != r.club:
-                    continue
-
-            # --- CHECK 2: MEMBER TYPE ---
-            if r.target_member_type != user.role:
-                continue
-
-            # --- CHECK 3: DEMOGRAPHICS ---
-            # Gender
-            if r.target_genders and user.legal_gender not in r.target_genders:
-                continue
-            
-            # Grade
-            if r.target_grades and user.grade not in r.target_grades:
-                continue
-
-            # Age
-            if user_age is not None:
-                if r.min_age and user_age < r.min_age: continue
-                if r.max_age and user_age > r.max_age: continue
-
-            # --- CHECK 4: USAGE LIMITS ---
-            # Count how many times THIS user has claimed THIS reward
-            claim_count = RewardUsage.objects.filter(user=user, reward=r).count()
-            limit_str = f"{claim_count} / {r.usage_limit}" if r.usage_limit else f"{claim_count} / ∞"
-            
+        eligible = eligible_rewards_for_users([user])[user.pk]
+        if not eligible:
+            return "No rewards currently available for this user."
+
+        items = []
+        for reward, claim_count in eligible:
+            limit_str = f"{claim_count} / {reward.usage_limit}" if reward.usage_limit else f"{claim_count} / ∞"
             # Styling: Red if maxed out, Green if available
             color = "green"
-            if r.usage_limit and claim_count >= r.usage_limit:
+            if reward.usage_limit and claim_count >= reward.usage_limit:
                 color = "red"
                 limit_str += " (Max Reached)"
-
-            eligible_list.append(
-                f"<li style='color:{color};'><b>{r.name}</b> — Used: {limit_str}</li>"
-            )
-
-        if not eligible_list:
-            return "No rewards currently available for this user."
-
-        return format_html("<ul>" + "".join(eligible_list) + "</ul>")
+            items.append(format_html(
+                "<li style='color:{};'><b>{}</b> — Used: {}</li>", color, reward.name, limit_str
+            ))
+        return format_html("<ul>{}</ul>", format_html_join('', '{}', ((item,) for item in items)))
 
     view_eligible_rewards.short_description = "Eligible / Active Rewards"
 
+    @admin.display(description="Eligible rewards")
+    def eligible_rewards_count(self, user):
+        # Filled in for the whole page by EligibleRewardsChangeList
+        eligible = getattr(user, '_eligible_rewards', None)
+        if eligible is None:
+            eligible = eligible_rewards_for_users([user])[user.pk]
+        return sum(1 for reward, used in eligible if not reward.usage_limit or used < reward.usage_limit)
+
 # --- SPECIFIC ADMINS ---
 
 @admin.register(YouthMember)
 class YouthMemberAdmin(BaseRoleAdmin):
-    list_display = ('email', 'first_name', 'last_name', 'get_age_display', 'grade', 'preferred_club')
+    list_display = ('email', 'first_name', 'last_name', 'get_age_display', 'grade', 'preferred_club', 'eligible_rewards_count')
+    list_select_related = ('preferred_club__municipality',)
     search_fields = ('email', 'first_name', 'last_name', 'nickname')
     
     fieldsets = (
@@ -175,7 +161,7 @@ class YouthMemberAdmin(BaseRoleAdmin):
 
 @admin.register(Guardian)
 class GuardianAdmin(BaseRoleAdmin):
-    list_display = ('email', 'first_name', 'last_name', 'phone_number')
+    list_display = ('email', 'first_name', 'last_name', 'phone_number', 'eligible_rewards_count')
     search_fields = ('email', 'first_name', 'last_name', 'phone_number')
     
     fieldsets = (
@@ -268,4 +254,17 @@ class MainUserAdmin(UserAdmin):
 class UserLoginHistoryAdmin(admin.ModelAdmin):
     list_display = ('user', 'timestamp', 'ip_address')
     list_filter = ('user',)
-    search_fields = ('user__email', 'ip_address', 'user_agent')
\ No newline at end of file
+    search_fields = ('user__email', 'ip_address', 'user_agent')
+
+@admin.register(UserLoginMonthly)
+class UserLoginMonthlyAdmin(admin.ModelAdmin):
+    list_display = ('user', 'month', 'login_count', 'first_login', 'last_login')
+    list_filter = ('month',)
+    search_fields = ('user__email',)
+    raw_id_fields = ('user',)
+
+@admin.register(GradeRolloverRun)
+class GradeRolloverRunAdmin(admin.ModelAdmin):
+    list_display = ('school_year', 'status', 'users_updated', 'total_users', 'memberships_removed', 'grants_revoked', 'started_at', 'finished_at')
+    list_filter = ('status',)
+    readonly_fields = ('started_at', 'finished_at')
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        import users.signals
+        from django.db.models.signals import post_migrate
+        post_migrate.connect(users.signals.install_user_search_index, sender=self)
+        post_migrate.connect(users.signals.install_cache_table, sender=self)
@@ -0,0 +1,119 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connection, DatabaseError
+from django.utils import timezone
+
+from .activity import record_daily_activity
+from .models import User, UserLoginHistory
+
+logger = logging.getLogger(__name__)
+
+
+class LoginAuditBuffer:
+    """
+    In-process queue for login events.
+
+    record() only appends to a list. The events are written with one bulk_create
+    when `max_size` events are waiting or `flush_interval` seconds after the first
+    one arrived, whichever comes first, so logins no longer compete for the database
+    writer one INSERT at a time. A flush also runs at interpreter shutdown.
+    """
+
+    def __init__(self, max_size=100, flush_interval=5.0):
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self._events = []
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def record(self, user_id, ip_address=None, user_agent=''):
+        event = UserLoginHistory(
+            user_id=user_id,
+            timestamp=timezone.now(),
+            ip_address=ip_address,
+            user_agent=(user_agent or '')[:512],
+        )
+        if self.max_size <= 1:
+            event.save()
+            record_daily_activity([(event.user_id, event.timestamp)])
+            return
+
+        with self._lock:
+            self._events.append(event)
+            full = len(self._events) >= self.max_size
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def flush_user(self, user_id):
+        """
+        Writes the queued events of one user only, so a read of their history sees
+        every login with a real id. Returns the number written.
+        """
+        with self._lock:
+            events = [event for event in self._events if event.user_id == user_id]
+            if events:
+                self._events = [event for event in self._events if event.user_id != user_id]
+        return self._write(events)
+
+    def flush(self):
+        """
+        Writes every queued event. Returns the number written.
+        """
+        with self._lock:
+            events, self._events = self._events, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        return self._write(events)
+
+    def _write(self, events):
+        if not events:
+            return 0
+        # Users erased or deactivated while their login was queued (users/gdpr.py) get no new rows
+        active = set(User.objects.filter(
+            id__in={event.user_id for event in events}, is_active=True,
+        ).values_list('id', flat=True))
+        events = [event for event in events if event.user_id in active]
+        if not events:
+            return 0
+        try:
+            UserLoginHistory.objects.bulk_create(events, batch_size=500)
+        except DatabaseError as exc:
+            # e.g. a user deleted while their login was queued: keep the rest
+            logger.warning("Login audit flush failed (%s); writing %d events one by one", exc, len(events))
+            written = []
+            for event in events:
+                try:
+                    event.save()
+                    written.append(event)
+                except DatabaseError:
+                    continue
+            events = written
+        # Feed the daily-active rollup used by the dashboards (users/activity.py)
+        record_daily_activity((event.user_id, event.timestamp) for event in events)
+        return len(events)
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            # The timer thread has its own connection; don't leave it open
+            connection.close()
+
+
+login_audit = LoginAuditBuffer(
+    max_size=getattr(settings, 'LOGIN_AUDIT_BUFFER_SIZE', 100),
+    flush_interval=getattr(settings, 'LOGIN_AUDIT_FLUSH_INTERVAL', 5.0),
+)
+atexit.register(login_audit.flush)
+
+
+def record_login(user, ip_address=None, user_agent=''):
+    login_audit.record(user.pk, ip_address, user_agent)
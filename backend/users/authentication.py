@@ -0,0 +1,128 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+
+def scope_claims(user):
+    """
+    Claims added to every token, next to the user id.
+    """
+    return {
+        'role': user.role,
+        'municipality_id': user.assigned_municipality_id,
+        'club_id': user.assigned_club_id,
+    }
+
+
+class ScopedTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    /api/auth/jwt/create/ with the user's role and scope ids as signed claims,
+    so clients know what the user can administer without fetching /users/me/.
+    Refreshed access tokens inherit the claims from the refresh token.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        for claim, value in scope_claims(user).items():
+            token[claim] = value
+        return token
+
+
+class UserCache:
+    """
+    Bounded per-process LRU of authenticated users, with their municipality and
+    club already joined.
+
+    Entries are dropped when the user is saved or deleted (users/signals.py).
+    Bulk UPDATEs and saves in other processes send no signal to this one, so
+    entries also expire after `ttl` seconds.
+    """
+
+    def __init__(self, max_size=1000, ttl=60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    # Token claims carry the id as a string, signals as an int
+    def get(self, user_id):
+        user_id = str(user_id)
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return None
+            user, expires = entry
+            if expires < time.monotonic():
+                del self._users[user_id]
+                return None
+            self._users.move_to_end(user_id)
+            return user
+
+    def set(self, user_id, user):
+        if self.max_size <= 0:
+            return
+        user_id = str(user_id)
+        with self._lock:
+            self._users[user_id] = (user, time.monotonic() + self.ttl)
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_size:
+                self._users.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._users.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache(
+    max_size=getattr(settings, 'USER_AUTH_CACHE_SIZE', 1000),
+    ttl=getattr(settings, 'USER_AUTH_CACHE_TTL', 60),
+)
+
+
+class ScopedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that serves the user from `user_cache`.
+
+    A cache miss is one query that also joins assigned_municipality and
+    assigned_club, so views reading the admin's scope don't query again.
+    The role and scope claims are informational: the user row stays
+    authoritative, because a role can change during a token's lifetime.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = user_cache.get(user_id)
+        if user is None:
+            try:
+                user = User.objects.select_related('assigned_municipality', 'assigned_club').get(
+                    **{api_settings.USER_ID_FIELD: user_id}
+                )
+            except User.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            user_cache.set(user_id, user)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        # Views may set attributes on request.user; keep those out of the shared copy
+        return copy.copy(user)
@@ -0,0 +1,391 @@
+import csv
+import io
+import json
+import time
+
+from django.contrib.auth.tokens import default_token_generator
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models.functions import Lower
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from groups.utils import add_to_system_group
+from organization.models import Club, Interest, Municipality
+from rewards.utils import grant_reward_bulk, rewards_with_trigger
+
+from .links import apply_link_changes
+from .models import User
+from .passwords import hash_passwords
+from .scope import sync_user_scope
+from .stats import invalidate_stats
+
+DEFAULT_BATCH_SIZE = 500
+
+# Plain model fields accepted per row (validated with the model field itself)
+IMPORT_FIELDS = [
+    'role', 'first_name', 'last_name', 'nickname', 'phone_number', 'profession',
+    'legal_gender', 'preferred_gender', 'preferred_language', 'grade',
+    'date_of_birth', 'verification_status', 'hide_contact_info',
+]
+
+# Foreign keys accepted per row, as ids
+RELATION_FIELDS = {
+    'preferred_club': Club,
+    'assigned_municipality': Municipality,
+    'assigned_club': Club,
+}
+
+BOOLEAN_WORDS = {'true': True, 'yes': True, '1': True, 'false': False, 'no': False, '0': False}
+
+# Roles non-super admins may import
+MEMBER_ROLES = ['YOUTH_MEMBER', 'GUARDIAN']
+
+
+def _chunks(items, size):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def split_list(value):
+    """
+    "Football; Chess" / "1,2" / ["Football", 2] -> list of stripped, non-empty strings.
+    """
+    if value in (None, ''):
+        return []
+    if not isinstance(value, (list, tuple)):
+        value = str(value).replace(';', ',').split(',')
+    return [str(item).strip() for item in value if str(item).strip()]
+
+
+def read_rows(source, fmt='csv'):
+    """
+    Parses an upload into a list of row dicts.
+    CSV needs a header row; JSON is a list of objects or {"rows": [...]}.
+    """
+    if hasattr(source, 'read'):
+        source = source.read()
+    if isinstance(source, bytes):
+        source = source.decode('utf-8-sig')
+
+    if fmt == 'json':
+        data = json.loads(source)
+        if isinstance(data, dict):
+            data = data.get('rows', [])
+        if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+            raise ValueError('JSON import must be a list of objects.')
+        return data
+    if fmt == 'csv':
+        reader = csv.DictReader(io.StringIO(source))
+        return [{(key or '').strip(): value for key, value in row.items()} for row in reader]
+    raise ValueError(f"Unsupported import format '{fmt}'.")
+
+
+class BulkUserImporter:
+    """
+    Creates users from import rows without going through create_user/save() per row.
+
+    1. Every row is validated up front with a fixed number of queries (existing emails,
+       clubs, municipalities and interests are each looked up once).
+    2. Valid rows are written with bulk_create in batches, one transaction per batch,
+       together with their interests.
+    3. Guardian links, UserScope rows, REGISTERED/VERIFIED memberships and WELCOME
+       rewards are then applied set-based, because bulk_create sends no post_save.
+
+    `admin` limits what can be imported the same way UserViewSet.perform_create does;
+    None (management command) means no restriction.
+
+    Passwords are hashed in a process pool (see users/passwords.py). Rows without a
+    password get an unusable one; with invite_tokens=True their result carries a
+    uid/token pair for /auth/users/reset_password_confirm/, so the user picks a
+    password on first login and no hashing happens during the import.
+    """
+
+    def __init__(self, admin=None, batch_size=DEFAULT_BATCH_SIZE, dry_run=False, invite_tokens=False):
+        self.admin = admin
+        self.batch_size = max(1, batch_size)
+        self.dry_run = dry_run
+        self.invite_tokens = invite_tokens
+
+    # --- Scope ---
+
+    @property
+    def admin_role(self):
+        return getattr(self.admin, 'role', None) if self.admin else None
+
+    def _apply_admin_scope(self, data, errors, clubs):
+        role = self.admin_role
+        if role not in ('MUNICIPALITY_ADMIN', 'CLUB_ADMIN'):
+            return
+        if data['role'] not in MEMBER_ROLES:
+            errors['role'] = ['Only youth members and guardians can be imported.']
+            return
+
+        if role == 'MUNICIPALITY_ADMIN' and self.admin.assigned_municipality_id:
+            club_id = data.get('preferred_club_id')
+            if club_id and clubs.get(club_id) != self.admin.assigned_municipality_id:
+                errors['preferred_club'] = ['Club is outside your municipality.']
+            data['assigned_municipality_id'] = self.admin.assigned_municipality_id
+            data.pop('assigned_club_id', None)
+        elif role == 'CLUB_ADMIN' and self.admin.assigned_club_id:
+            if data['role'] == 'YOUTH_MEMBER':
+                data['preferred_club_id'] = self.admin.assigned_club_id
+            data.pop('assigned_municipality_id', None)
+            data.pop('assigned_club_id', None)
+
+    # --- Validation ---
+
+    def _lookups(self, rows):
+        emails = {str(row.get('email') or '').strip().lower() for row in rows} - {''}
+        existing = set()
+        for chunk in _chunks(emails, self.batch_size):
+            existing.update(
+                User.objects.annotate(email_lower=Lower('email'))
+                .filter(email_lower__in=chunk).values_list('email_lower', flat=True)
+            )
+        return {
+            'existing_emails': existing,
+            'clubs': dict(Club.objects.values_list('id', 'municipality_id')),
+            'municipalities': set(Municipality.objects.values_list('id', flat=True)),
+            'interests_by_id': set(Interest.objects.values_list('id', flat=True)),
+            'interests_by_name': {name.lower(): pk for pk, name in Interest.objects.values_list('id', 'name')},
+        }
+
+    def _clean_row(self, row, lookups, seen_emails):
+        """
+        Returns (user_fields, extras, errors) for one row.
+        """
+        errors = {}
+        data = {}
+
+        email = str(row.get('email') or '').strip()
+        try:
+            email = User._meta.get_field('email').clean(email, None)
+            email = User.objects.normalize_email(email)
+            if email.lower() in lookups['existing_emails']:
+                errors['email'] = ['A user with this email already exists.']
+            elif email.lower() in seen_emails:
+                errors['email'] = ['Duplicate email in this import.']
+        except ValidationError as exc:
+            errors['email'] = exc.messages
+        data['email'] = email
+
+        for name in IMPORT_FIELDS:
+            raw = row.get(name)
+            if isinstance(raw, str):
+                raw = raw.strip()
+            field = User._meta.get_field(name)
+            if raw in (None, ''):
+                if field.has_default():
+                    continue
+                raw = None if field.null else ''
+            elif isinstance(field, models.BooleanField) and isinstance(raw, str):
+                raw = BOOLEAN_WORDS.get(raw.lower(), raw)
+            try:
+                data[name] = field.clean(raw, None)
+            except ValidationError as exc:
+                errors[name] = exc.messages
+
+        for name, model in RELATION_FIELDS.items():
+            raw = str(row.get(name) or '').strip()
+            if not raw:
+                continue
+            known = lookups['clubs'] if model is Club else lookups['municipalities']
+            if not raw.isdigit() or int(raw) not in known:
+                errors[name] = [f'Unknown {model._meta.verbose_name} "{raw}".']
+            else:
+                data[f'{name}_id'] = int(raw)
+
+        interest_ids = []
+        for item in split_list(row.get('interests')):
+            pk = int(item) if item.isdigit() and int(item) in lookups['interests_by_id'] \
+                else lookups['interests_by_name'].get(item.lower())
+            if pk is None:
+                errors.setdefault('interests', []).append(f'Unknown interest "{item}".')
+            else:
+                interest_ids.append(pk)
+
+        data.setdefault('role', User.Role.YOUTH_MEMBER)
+        if 'role' not in errors:
+            self._apply_admin_scope(data, errors, lookups['clubs'])
+
+        extras = {
+            'password': str(row.get('password') or '') or None,
+            'interests': interest_ids,
+            'guardians': split_list(row.get('guardians')),
+        }
+        return data, extras, errors
+
+    def validate(self, rows):
+        """
+        Returns (valid, errors): valid is a list of (row_number, user_fields, extras).
+        Row numbers are 1-based positions in the input.
+        """
+        lookups = self._lookups(rows)
+        valid, errors, seen_emails = [], [], set()
+        for number, row in enumerate(rows, start=1):
+            data, extras, row_errors = self._clean_row(row, lookups, seen_emails)
+            if row_errors:
+                errors.append({'row': number, 'email': data.get('email'), 'errors': row_errors})
+                continue
+            seen_emails.add(data['email'].lower())
+            valid.append((number, data, extras))
+        return valid, errors
+
+    # --- Writing ---
+
+    def _write_batch(self, batch):
+        users = [User(password=extras['password_hash'], **data) for _, data, extras in batch]
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+            Through = User.interests.through
+            Through.objects.bulk_create(
+                [
+                    Through(user_id=user.id, interest_id=interest_id)
+                    for user, (_, _, extras) in zip(users, batch)
+                    for interest_id in set(extras['interests'])
+                ],
+                ignore_conflicts=True,
+            )
+        return users
+
+    def _resolve_guardians(self, pending, created_by_email):
+        """
+        pending: [(row_number, youth_id, [refs])]. A ref is a guardian email or user id,
+        either created by this import or already in the database.
+        Returns (pairs, errors) with pairs as (guardian_id, youth_id).
+        """
+        emails = {ref.lower() for _, _, refs in pending for ref in refs if not ref.isdigit()}
+        ids = {int(ref) for _, _, refs in pending for ref in refs if ref.isdigit()}
+        guardians = {
+            email: pk for email, pk in created_by_email.items()
+            if email in emails
+        }
+        for chunk in _chunks(emails - set(guardians), self.batch_size):
+            guardians.update(
+                User.objects.annotate(email_lower=Lower('email'))
+                .filter(email_lower__in=chunk, role='GUARDIAN').values_list('email_lower', 'id')
+            )
+        known_ids = set()
+        for chunk in _chunks(ids, self.batch_size):
+            known_ids.update(User.objects.filter(id__in=chunk, role='GUARDIAN').values_list('id', flat=True))
+
+        pairs, errors = [], []
+        for number, youth_id, refs in pending:
+            for ref in refs:
+                guardian_id = int(ref) if ref.isdigit() and int(ref) in known_ids else guardians.get(ref.lower())
+                if guardian_id is None:
+                    errors.append({'row': number, 'errors': {'guardians': [f'Unknown guardian "{ref}".']}})
+                elif guardian_id != youth_id:
+                    pairs.append((guardian_id, youth_id))
+        return pairs, errors
+
+    def _apply_follow_ups(self, created):
+        """
+        What the post_save receivers would have done for each new user, set-based.
+        """
+        counts = {'registered_memberships': 0, 'verified_memberships': 0, 'welcome_rewards': 0}
+        welcome_rewards = rewards_with_trigger('WELCOME')
+        for chunk in _chunks(created, self.batch_size):
+            ids = [user.id for user in chunk]
+            counts['registered_memberships'] += add_to_system_group('REGISTERED', ids)
+            counts['verified_memberships'] += add_to_system_group(
+                'VERIFIED', [user.id for user in chunk if user.verification_status == 'VERIFIED']
+            )
+            for reward in welcome_rewards:
+                counts['welcome_rewards'] += grant_reward_bulk(reward, User.objects.filter(id__in=ids))
+        return counts
+
+    def run(self, rows):
+        """
+        Imports the rows and returns a report (counts, per-row errors, timings).
+        """
+        timings = {}
+        started = time.perf_counter()
+
+        valid, errors = self.validate(rows)
+        timings['validate'] = time.perf_counter() - started
+
+        report = {
+            'received': len(rows),
+            'valid': len(valid),
+            'failed': len(errors),
+            'created': 0,
+            'dry_run': self.dry_run,
+            'errors': errors,
+        }
+        if self.dry_run:
+            report['timings'] = {key: round(value, 3) for key, value in timings.items()}
+            return report
+
+        # 1. Password hashes, in parallel
+        phase = time.perf_counter()
+        hashes = hash_passwords([extras['password'] for _, _, extras in valid])
+        for (_, _, extras), password_hash in zip(valid, hashes):
+            extras['password_hash'] = password_hash
+        timings['hash_passwords'] = time.perf_counter() - phase
+
+        # 2. Users and interests, one transaction per batch
+        phase = time.perf_counter()
+        created, created_rows, pending_links = [], {}, []
+        for batch in _chunks(valid, self.batch_size):
+            users = self._write_batch(batch)
+            created.extend(users)
+            created_rows.update((number, user) for user, (number, _, _) in zip(users, batch))
+            pending_links.extend(
+                (number, user.id, extras['guardians'])
+                for user, (number, _, extras) in zip(users, batch) if extras['guardians']
+            )
+        timings['write_users'] = time.perf_counter() - phase
+
+        # 3. Guardian links
+        phase = time.perf_counter()
+        created_by_email = {user.email.lower(): user.id for user in created if user.role == 'GUARDIAN'}
+        pairs, link_errors = self._resolve_guardians(pending_links, created_by_email)
+        links_created = 0
+        for batch in _chunks(pairs, self.batch_size):
+            links_created += apply_link_changes(add=batch)[0]
+        errors.extend(link_errors)
+        timings['write_links'] = time.perf_counter() - phase
+
+        # 4. Scope, system groups, rewards, cached stats
+        phase = time.perf_counter()
+        sync_user_scope([user.id for user in created])
+        report.update(self._apply_follow_ups(created))
+        invalidate_stats()
+        timings['follow_ups'] = time.perf_counter() - phase
+
+        elapsed = time.perf_counter() - started
+        report['created'] = len(created)
+        report['links_created'] = links_created
+        report['timings'] = {key: round(value, 3) for key, value in timings.items()}
+        report['seconds'] = round(elapsed, 3)
+        report['rows_per_second'] = round(len(created) / elapsed, 1) if elapsed else None
+        report['results'] = self._results(len(rows), created_rows, errors)
+        return report
+
+    def _results(self, total, created_rows, errors):
+        """
+        One entry per input row, in input order.
+        """
+        errors_by_row = {}
+        for error in errors:
+            errors_by_row.setdefault(error['row'], {}).update(error['errors'])
+
+        results = []
+        for number in range(1, total + 1):
+            user = created_rows.get(number)
+            if user is None:
+                results.append({'row': number, 'status': 'failed', 'errors': errors_by_row.get(number, {})})
+                continue
+            result = {'row': number, 'status': 'created', 'id': user.id, 'email': user.email}
+            if number in errors_by_row:
+                result['warnings'] = errors_by_row[number]
+            if self.invite_tokens and not user.has_usable_password():
+                result['invite'] = {
+                    'uid': urlsafe_base64_encode(force_bytes(user.pk)),
+                    'token': default_token_generator.make_token(user),
+                }
+            results.append(result)
+        return results
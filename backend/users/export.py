@@ -0,0 +1,111 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from custom_fields.models import CustomFieldDefinition, CustomFieldValue
+from custom_fields.utils import get_admin_field_definitions
+
+EXPORT_FIELDS = [
+    'id', 'email', 'first_name', 'last_name', 'nickname', 'role',
+    'phone_number', 'legal_gender', 'date_of_birth', 'grade',
+    'preferred_club_id', 'assigned_municipality_id', 'assigned_club_id',
+    'verification_status', 'is_active', 'date_joined', 'last_login',
+]
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """
+    File-like object whose write() hands the line back, so csv.writer can feed a generator.
+    """
+    def write(self, value):
+        return value
+
+
+def export_field_definitions(admin):
+    """
+    User-profile custom fields the admin may see; each becomes one export column.
+    """
+    return list(
+        get_admin_field_definitions(admin)
+        .filter(context=CustomFieldDefinition.Context.USER_PROFILE)
+        .order_by('id')
+        .only('id', 'name')
+    )
+
+
+def column_labels(definitions):
+    """
+    Field name as column label; names shared by several fields get their id appended.
+    """
+    seen = {}
+    for definition in definitions:
+        seen[definition.name] = seen.get(definition.name, 0) + 1
+    return [
+        definition.name if seen[definition.name] == 1 else f'{definition.name} (#{definition.id})'
+        for definition in definitions
+    ]
+
+
+def iter_user_chunks(queryset, field_ids, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields lists of row dicts, `chunk_size` users at a time.
+
+    Chunks are fetched by seeking on id (no OFFSET), so every chunk costs the same and
+    only one chunk is held in memory. Custom field values for a chunk are loaded in a
+    single query and attached as row['custom_fields'] = {field_id: value}.
+    """
+    queryset = queryset.order_by('id')
+    last_id = 0
+    while True:
+        rows = list(queryset.filter(id__gt=last_id).values(*EXPORT_FIELDS)[:chunk_size])
+        if not rows:
+            return
+
+        by_user = {row['id']: row for row in rows}
+        for row in rows:
+            row['custom_fields'] = {}
+        if field_ids:
+            values = CustomFieldValue.objects.filter(
+                user_id__in=list(by_user), field_id__in=field_ids
+            ).values_list('user_id', 'field_id', 'value')
+            for user_id, field_id, value in values:
+                by_user[user_id]['custom_fields'][field_id] = value
+
+        yield rows
+        last_id = rows[-1]['id']
+
+
+def _csv_cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, list):
+        return ', '.join(str(item) for item in value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def stream_csv(queryset, definitions, chunk_size=EXPORT_CHUNK_SIZE):
+    writer = csv.writer(Echo())
+    field_ids = [definition.id for definition in definitions]
+    yield writer.writerow(EXPORT_FIELDS + column_labels(definitions))
+    for rows in iter_user_chunks(queryset, field_ids, chunk_size):
+        for row in rows:
+            custom = row['custom_fields']
+            yield writer.writerow(
+                [_csv_cell(row[name]) for name in EXPORT_FIELDS] +
+                [_csv_cell(custom.get(field_id)) for field_id in field_ids]
+            )
+
+
+def stream_ndjson(queryset, definitions, chunk_size=EXPORT_CHUNK_SIZE):
+    field_ids = [definition.id for definition in definitions]
+    labels = list(zip(field_ids, column_labels(definitions)))
+    for rows in iter_user_chunks(queryset, field_ids, chunk_size):
+        for row in rows:
+            custom = row.pop('custom_fields')
+            row['custom_fields'] = {label: custom.get(field_id) for field_id, label in labels}
+            yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
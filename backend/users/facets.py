@@ -0,0 +1,98 @@
+import hashlib
+
+from django.db import connection
+from django.db.models import Count
+
+from organization.models import Club
+from .models import User
+from .stats import cached_stats, scope_key
+
+FACET_FIELDS = ('role', 'legal_gender', 'grade', 'verification_status', 'preferred_club')
+
+# Query parameters that change the page, not the filtered set
+NON_FILTER_PARAMS = {'page', 'page_size', 'cursor', 'pagination', 'ordering', 'facets', 'format'}
+
+
+def filter_hash(params):
+    """
+    Stable hash of the filter parameters of a user list request.
+    """
+    items = sorted(
+        (key, sorted(params.getlist(key)))
+        for key in params.keys() if key not in NON_FILTER_PARAMS
+    )
+    return hashlib.sha1(repr(items).encode()).hexdigest()[:16]
+
+
+def _grouped_counts(queryset):
+    """
+    {field: {value: count}} for FACET_FIELDS in one pass over the filtered users.
+    """
+    # Filters can carry search annotations and prefetches; group over plain ids
+    users = User.objects.filter(pk__in=queryset.order_by().values('pk'))
+    counts = {field: {} for field in FACET_FIELDS}
+    columns = [User._meta.get_field(field).column for field in FACET_FIELDS]
+
+    if connection.vendor == 'postgresql':
+        # One GROUPING SETS pass: one row per value of each field
+        subquery, params = users.values('pk').query.sql_with_params()
+        table = User._meta.db_table
+        sql = (
+            f"SELECT {', '.join(columns)}, {', '.join(f'GROUPING({column})' for column in columns)}, COUNT(*) "
+            f"FROM {table} WHERE id IN ({subquery}) "
+            f"GROUP BY GROUPING SETS ({', '.join(f'({column})' for column in columns)})"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            for row in cursor.fetchall():
+                values, grouping, count = row[:len(columns)], row[len(columns):-1], row[-1]
+                for field, value, rolled_up in zip(FACET_FIELDS, values, grouping):
+                    if not rolled_up:
+                        counts[field][value] = count
+        return counts
+
+    # Elsewhere: one GROUP BY over all fields, folded per field
+    for row in users.values_list(*(User._meta.get_field(f).attname for f in FACET_FIELDS)).annotate(count=Count('id')).order_by():
+        *values, count = row
+        for field, value in zip(FACET_FIELDS, values):
+            counts[field][value] = counts[field].get(value, 0) + count
+    return counts
+
+
+def compute_facets(queryset):
+    """
+    {field: [{"value", "label", "count"}, ...]} with the biggest buckets first.
+    """
+    counts = _grouped_counts(queryset)
+    club_names = dict(
+        Club.objects.filter(id__in=[c for c in counts['preferred_club'] if c]).values_list('id', 'name')
+    )
+    labels = {
+        'role': dict(User.Role.choices),
+        'legal_gender': dict(User.Gender.choices),
+        'verification_status': dict(User.VerificationStatus.choices),
+        'preferred_club': club_names,
+    }
+
+    facets = {}
+    for field in FACET_FIELDS:
+        buckets = [
+            {
+                'value': value,
+                'label': labels.get(field, {}).get(value, '' if value in (None, '') else str(value)),
+                'count': count,
+            }
+            for value, count in counts[field].items()
+        ]
+        buckets.sort(key=lambda bucket: (-bucket['count'], str(bucket['value'])))
+        facets[field] = buckets
+    return facets
+
+
+def cached_facets(admin, params, queryset):
+    """
+    compute_facets() cached per admin scope and filter set, dropped together with
+    the dashboard stats whenever users or links change.
+    """
+    partition = f"{scope_key(admin)}:{filter_hash(params)}"
+    return cached_stats('facets', partition, lambda: compute_facets(queryset))
@@ -0,0 +1,141 @@
+from datetime import date
+
+from django.db.models import Q
+
+
+def years_before(day, years):
+    """
+    Same calendar day `years` earlier. Feb 29 maps to Feb 28 in non-leap years,
+    which matches how User.age counts birthdays.
+    """
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:
+        return day.replace(year=day.year - years, day=28)
+
+
+def age_range_q(min_age=None, max_age=None, today=None):
+    """
+    Exact birthdate bounds for an inclusive age range.
+    age >= min_age  <=>  date_of_birth <= today - min_age years
+    age <= max_age  <=>  date_of_birth >  today - (max_age + 1) years
+    """
+    today = today or date.today()
+    q = Q()
+    if min_age is not None:
+        q &= Q(date_of_birth__lte=years_before(today, min_age))
+    if max_age is not None:
+        q &= Q(date_of_birth__gt=years_before(today, max_age + 1))
+    return q
+
+
+def parse_int(value):
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_list(value, cast=str):
+    if not value:
+        return []
+    items = []
+    for item in str(value).split(','):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            items.append(cast(item))
+        except (TypeError, ValueError):
+            continue
+    return items
+
+
+class UserDemographicFilter:
+    """
+    Reusable demographic filter for User querysets.
+
+    Both the admin user list and GroupViewSet.search_candidates build one of these,
+    so the two endpoints emit the same WHERE clause, in the same column order as the
+    composite indexes on User: (role, preferred_club, date_of_birth) and
+    (role, grade, date_of_birth, date_joined).
+    """
+
+    def __init__(self, roles=None, preferred_club=None, min_age=None, max_age=None,
+                 grades=None, grade_from=None, grade_to=None, genders=None,
+                 verification_status=None, today=None):
+        self.roles = list(roles or [])
+        self.preferred_club = preferred_club
+        self.min_age = min_age
+        self.max_age = max_age
+        self.grades = list(grades or [])
+        self.grade_from = grade_from
+        self.grade_to = grade_to
+        self.genders = list(genders or [])
+        self.verification_status = verification_status
+        self.today = today
+
+    @classmethod
+    def from_user_list_params(cls, params):
+        """
+        Query params of UserViewSet (?role=&grade_from=&age_from=...).
+        """
+        return cls(
+            roles=parse_list(params.get('role')),
+            preferred_club=parse_int(params.get('preferred_club')),
+            min_age=parse_int(params.get('age_from')),
+            max_age=parse_int(params.get('age_to')),
+            grade_from=parse_int(params.get('grade_from')),
+            grade_to=parse_int(params.get('grade_to')),
+            genders=parse_list(params.get('legal_gender')),
+            verification_status=params.get('verification_status') or None,
+        )
+
+    @classmethod
+    def from_candidate_params(cls, params):
+        """
+        Query params of GroupViewSet.search_candidates (?grades=7,8&genders=&min_age=...).
+        """
+        member_type = params.get('target_member_type', 'YOUTH')
+        roles = {'YOUTH': ['YOUTH_MEMBER'], 'GUARDIAN': ['GUARDIAN']}.get(member_type, [])
+        return cls(
+            roles=roles,
+            min_age=parse_int(params.get('min_age')),
+            max_age=parse_int(params.get('max_age')),
+            grades=parse_list(params.get('grades'), cast=int),
+            genders=parse_list(params.get('genders')),
+        )
+
+    def as_q(self):
+        q = Q()
+        # Leading index columns first
+        if len(self.roles) == 1:
+            q &= Q(role=self.roles[0])
+        elif self.roles:
+            q &= Q(role__in=self.roles)
+
+        if self.preferred_club is not None:
+            q &= Q(preferred_club_id=self.preferred_club)
+
+        q &= age_range_q(self.min_age, self.max_age, self.today)
+
+        if self.grades:
+            q &= Q(grade__in=self.grades)
+        if self.grade_from is not None:
+            q &= Q(grade__gte=self.grade_from)
+        if self.grade_to is not None:
+            q &= Q(grade__lte=self.grade_to)
+
+        if len(self.genders) == 1:
+            q &= Q(legal_gender=self.genders[0])
+        elif self.genders:
+            q &= Q(legal_gender__in=self.genders)
+
+        if self.verification_status:
+            q &= Q(verification_status=self.verification_status)
+        return q
+
+    def apply(self, queryset):
+        return queryset.filter(self.as_q())
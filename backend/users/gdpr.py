@@ -0,0 +1,221 @@
+import io
+import json
+import zipfile
+from functools import partial
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import CharField, Q, Value
+from django.db.models.functions import Cast, Concat
+from django.utils import timezone
+
+from custom_fields.models import CustomFieldValue
+from groups.models import GroupMembership
+from news.models import NewsArticle
+from rewards.models import RewardUsage
+from system_messages.models import SystemMessageDismissal
+from .audit import login_audit
+from .authentication import user_cache
+from .household import invalidate_households
+from .models import DailyActiveUser, GuardianYouthLink, User, UserLoginHistory, UserLoginMonthly
+from .muting import mute_user_signals
+from .scope import sync_user_scope
+from .stats import invalidate_stats
+
+EXPORT_CHUNK_SIZE = 2000
+
+PROFILE_EXCLUDE = {'password'}
+
+
+def subject_tables(user_id):
+    """
+    (file name, queryset, fields) for every row about a user outside users_user.
+    """
+    return [
+        ('guardian_links', GuardianYouthLink.objects.filter(Q(guardian_id=user_id) | Q(youth_id=user_id)),
+         ['id', 'guardian_id', 'youth_id', 'relationship_type', 'is_primary_guardian', 'status', 'created_at', 'verified_at']),
+        ('group_memberships', GroupMembership.objects.filter(user_id=user_id),
+         ['id', 'group_id', 'group__name', 'status', 'role', 'joined_at', 'updated_at']),
+        ('reward_usages', RewardUsage.objects.filter(user_id=user_id),
+         ['id', 'reward_id', 'reward__name', 'created_at', 'is_redeemed', 'redeemed_at']),
+        ('custom_field_values', CustomFieldValue.objects.filter(user_id=user_id),
+         ['id', 'field_id', 'field__name', 'value', 'updated_at']),
+        ('message_dismissals', SystemMessageDismissal.objects.filter(user_id=user_id),
+         ['id', 'message_id', 'message__title', 'dismissed_at']),
+        ('login_history', UserLoginHistory.objects.filter(user_id=user_id),
+         ['id', 'timestamp', 'ip_address', 'user_agent']),
+        ('login_months', UserLoginMonthly.objects.filter(user_id=user_id),
+         ['month', 'login_count', 'first_login', 'last_login']),
+        ('active_days', DailyActiveUser.objects.filter(user_id=user_id),
+         ['date']),
+        ('news_articles', NewsArticle.objects.filter(author_id=user_id),
+         ['id', 'title', 'published_at', 'updated_at']),
+    ]
+
+
+class _ZipOutput(io.RawIOBase):
+    """
+    Unseekable sink for zipfile: collects what was written until the generator
+    hands it out, so only the current chunk is ever held in memory.
+    """
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _ndjson(rows):
+    return ''.join(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n' for row in rows).encode()
+
+
+def _profile(user_id):
+    fields = [field.attname for field in User._meta.concrete_fields if field.attname not in PROFILE_EXCLUDE]
+    profile = User.objects.filter(id=user_id).values(*fields).first()
+    if profile is not None:
+        profile['interests'] = list(
+            User.interests.through.objects.filter(user_id=user_id).values_list('interest__name', flat=True)
+        )
+    return profile
+
+
+def stream_user_archive(user_ids):
+    """
+    Yields a zip with one folder per user: profile.json plus one NDJSON file per
+    table in subject_tables(). Rows are read EXPORT_CHUNK_SIZE at a time and the
+    zip is produced as it is written, so memory stays flat whatever the history size.
+    """
+    login_audit.flush()
+    output = _ZipOutput()
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for user_id in user_ids:
+            folder = f'user_{user_id}'
+            profile = _profile(user_id)
+            if profile is None:
+                continue
+            archive.writestr(
+                f'{folder}/profile.json',
+                json.dumps(profile, cls=DjangoJSONEncoder, ensure_ascii=False, indent=2),
+            )
+            yield output.take()
+
+            for name, queryset, fields in subject_tables(user_id):
+                with archive.open(f'{folder}/{name}.ndjson', 'w', force_zip64=True) as entry:
+                    chunk = []
+                    for row in queryset.order_by().values(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+                        chunk.append(row)
+                        if len(chunk) >= EXPORT_CHUNK_SIZE:
+                            entry.write(_ndjson(chunk))
+                            chunk = []
+                            yield output.take()
+                    if chunk:
+                        entry.write(_ndjson(chunk))
+                yield output.take()
+
+        archive.writestr('README.txt', (
+            f"Personal data export created {timezone.now():%Y-%m-%d %H:%M %Z}.\n"
+            "Each user_<id> folder holds profile.json and one NDJSON file (one JSON object per line) "
+            "per kind of record.\n"
+        ))
+    yield output.take()
+
+
+# --- Erasure ---
+
+ERASE_MODES = ('delete', 'anonymize')
+
+# Rows that identify a person; removed in both modes
+PERSONAL_ROWS = (
+    UserLoginHistory, CustomFieldValue, SystemMessageDismissal, GroupMembership,
+)
+
+
+def _delete_files(names):
+    """
+    Removes avatars (and their resized variants) no remaining user points to.
+    Content-hashed storage shares identical uploads, hence the check.
+    """
+    from api.images import existing_derivatives
+
+    names = {name for name in names if name}
+    if not names:
+        return
+    field = User._meta.get_field('avatar')
+    still_used = set(User.objects.filter(avatar__in=names).values_list('avatar', flat=True))
+    for name in names - still_used:
+        fieldfile = field.attr_class(None, field, name)
+        for variants in existing_derivatives(fieldfile).values():
+            for variant in variants.values():
+                default_storage.delete(variant)
+        default_storage.delete(name)
+
+
+def erase_users(user_ids, mode='delete'):
+    """
+    Erases one batch of users in one transaction and returns the number erased.
+
+    'delete' removes the users and every row about them. 'anonymize' keeps the
+    user rows for aggregate statistics (role, grade, gender, club) but scrubs
+    everything that identifies the person and removes their personal rows;
+    login months, active days and redeemed rewards stay as anonymous counts.
+
+    Per-row bookkeeping receivers are muted; scope, stats and household caches
+    are updated once for the batch afterwards.
+    """
+    if mode not in ERASE_MODES:
+        raise ValueError(f"mode must be one of {ERASE_MODES}")
+    user_ids = list(user_ids)
+    if not user_ids:
+        return 0
+
+    with mute_user_signals(), transaction.atomic():
+        users = User.objects.filter(id__in=user_ids)
+        erased = users.count()
+        avatars = list(users.exclude(avatar='').exclude(avatar__isnull=True).values_list('avatar', flat=True))
+
+        # Guardians who lose a youth need their scope recomputed afterwards
+        links = GuardianYouthLink.objects.filter(Q(guardian_id__in=user_ids) | Q(youth_id__in=user_ids))
+        linked = set()
+        for guardian_id, youth_id in links.values_list('guardian_id', 'youth_id'):
+            linked.update((guardian_id, youth_id))
+        links.delete()
+
+        for model in PERSONAL_ROWS:
+            model.objects.filter(user_id__in=user_ids).delete()
+        RewardUsage.objects.filter(user_id__in=user_ids, is_redeemed=False).delete()
+
+        if mode == 'delete':
+            # Large tables first, as single DELETEs, so the cascade below finds nothing to load
+            for model in (UserLoginMonthly, DailyActiveUser, RewardUsage):
+                model.objects.filter(user_id__in=user_ids).delete()
+            users.delete()
+        else:
+            User.interests.through.objects.filter(user_id__in=user_ids).delete()
+            users.update(
+                email=Concat(Value('erased-'), Cast('id', CharField()), Value('@invalid.local')),
+                first_name='', last_name='', nickname='', phone_number=None, profession='',
+                preferred_gender='', date_of_birth=None, avatar='',
+                password=make_password(None), is_active=False,
+                verification_status=User.VerificationStatus.UNVERIFIED,
+            )
+
+    remaining = linked - set(user_ids)
+    sync_user_scope(remaining | (set(user_ids) if mode == 'anonymize' else set()))
+    invalidate_stats()
+    invalidate_households(linked | set(user_ids))
+    for user_id in user_ids:
+        user_cache.invalidate(user_id)
+    # Files cannot be rolled back: only once an enclosing transaction commits
+    transaction.on_commit(partial(_delete_files, avatars))
+    return erased
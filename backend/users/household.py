@@ -0,0 +1,136 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import GuardianYouthLink, User
+
+HOUSEHOLD_USER_FIELDS = [
+    'id', 'first_name', 'last_name', 'email', 'role', 'grade', 'verification_status',
+    'preferred_club_id', 'preferred_club__name', 'assigned_club_id', 'assigned_club__name',
+]
+HOUSEHOLD_LINK_FIELDS = [
+    'id', 'guardian_id', 'youth_id', 'relationship_type', 'is_primary_guardian', 'status', 'verified_at',
+]
+
+
+def household_limits():
+    """
+    (max BFS rounds, max members): households are small; this bounds the work
+    when links chain through a large part of the graph.
+    """
+    return (
+        getattr(settings, 'HOUSEHOLD_MAX_DEPTH', 4),
+        getattr(settings, 'HOUSEHOLD_MAX_MEMBERS', 50),
+    )
+
+
+def household_cache_timeout():
+    return getattr(settings, 'HOUSEHOLD_CACHE_TIMEOUT', 600)
+
+
+def _cache_key(user_id):
+    return f'household:{user_id}'
+
+
+def _ref_key(user_id):
+    # Users whose truncated household (cached under their own key) includes this user
+    return f'household_refs:{user_id}'
+
+
+def load_household(user_id):
+    """
+    The connected component of GuardianYouthLink around a user, found by a
+    bounded breadth-first search: one query per round for the links touching the
+    frontier, then one query for the members. Returns
+    {"members": [...], "links": [...], "truncated": bool}.
+    """
+    max_depth, max_members = household_limits()
+    member_ids = {user_id}
+    frontier = {user_id}
+    links = {}
+    truncated = False
+
+    for _ in range(max_depth):
+        rows = GuardianYouthLink.objects.filter(
+            Q(guardian_id__in=frontier) | Q(youth_id__in=frontier)
+        ).values(*HOUSEHOLD_LINK_FIELDS)
+        frontier = set()
+        for row in rows:
+            if row['id'] in links:
+                continue
+            new_ids = {row['guardian_id'], row['youth_id']} - member_ids
+            if len(member_ids) + len(new_ids) > max_members:
+                truncated = True
+                continue
+            links[row['id']] = row
+            member_ids |= new_ids
+            frontier |= new_ids
+        if not frontier:
+            break
+    else:
+        # Stopped by depth with people left to visit
+        truncated = True
+
+    members = list(User.objects.filter(id__in=member_ids).order_by('role', 'first_name', 'id').values(*HOUSEHOLD_USER_FIELDS))
+    return {
+        'members': members,
+        'links': sorted(links.values(), key=lambda link: link['id']),
+        'truncated': truncated,
+    }
+
+
+def cached_household(user_id):
+    """
+    load_household() through the cache. A complete graph is stored under every
+    member's key, so invalidate_households() finds all copies from any one member.
+    A truncated graph is centred on the requested user and may lack another
+    member's own links, so it is stored under that user's key only.
+    """
+    household = cache.get(_cache_key(user_id))
+    if household is None:
+        household = load_household(user_id)
+        if household['truncated']:
+            entries = {_cache_key(user_id): household}
+            # Let invalidate_households() find this copy from any member
+            ref_keys = [_ref_key(member['id']) for member in household['members']]
+            refs = cache.get_many(ref_keys)
+            for key in ref_keys:
+                entries[key] = set(refs.get(key, ())) | {user_id}
+        else:
+            entries = {_cache_key(member['id']): household for member in household['members']} or {_cache_key(user_id): household}
+        cache.set_many(entries, timeout=household_cache_timeout())
+    return household
+
+
+def invalidate_households(user_ids):
+    """
+    Drops the cached households of these users and of everyone sharing one with them.
+    """
+    user_ids = {user_id for user_id in user_ids if user_id}
+    if not user_ids:
+        return
+    keys = {_cache_key(user_id) for user_id in user_ids}
+    refs = cache.get_many([_ref_key(user_id) for user_id in user_ids])
+    for owners in refs.values():
+        keys.update(_cache_key(owner) for owner in owners)
+    for household in cache.get_many(list(keys)).values():
+        keys.update(_cache_key(member['id']) for member in household['members'])
+    cache.delete_many(list(keys) + list(refs))
+
+
+def scoped_household(household, visible_ids):
+    """
+    Limits a household to the members an admin may see. Links to hidden members
+    are dropped; `hidden` tells how many members were left out.
+    """
+    members = [member for member in household['members'] if member['id'] in visible_ids]
+    links = [
+        link for link in household['links']
+        if link['guardian_id'] in visible_ids and link['youth_id'] in visible_ids
+    ]
+    return {
+        'members': members,
+        'links': links,
+        'truncated': household['truncated'],
+        'hidden': len(household['members']) - len(members),
+    }
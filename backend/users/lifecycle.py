@@ -0,0 +1,92 @@
+from datetime import date
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from groups.models import GroupMembership
+from rewards.models import RewardUsage
+from .authentication import user_cache
+from .household import invalidate_households
+from .models import User
+from .stats import invalidate_stats
+
+COUNTRY_PATH = 'preferred_club__municipality__country__country_code'
+
+
+def age_out_thresholds():
+    """
+    {country code or 'default': age}. Youth of that age or older have aged out;
+    the country is the one of their preferred club.
+    """
+    thresholds = dict(getattr(settings, 'YOUTH_AGE_OUT_THRESHOLDS', {}))
+    thresholds.setdefault('default', 29)
+    return thresholds
+
+
+def born_on_or_before(age, today):
+    """
+    Latest date of birth of someone who is `age` or older today (Feb 29 birthdays count on Feb 28).
+    """
+    try:
+        return today.replace(year=today.year - age)
+    except ValueError:
+        return date(today.year - age, 2, 28)
+
+
+def aged_out_q(thresholds=None, today=None):
+    """
+    Q for users past their threshold, so the check runs in the database.
+    """
+    thresholds = thresholds or age_out_thresholds()
+    today = today or timezone.localdate()
+    countries = {code: age for code, age in thresholds.items() if code != 'default'}
+
+    condition = Q(date_of_birth__lte=born_on_or_before(thresholds['default'], today)) & ~Q(**{f'{COUNTRY_PATH}__in': list(countries)})
+    for code, age in countries.items():
+        condition |= Q(**{COUNTRY_PATH: code, 'date_of_birth__lte': born_on_or_before(age, today)})
+    return condition
+
+
+def aged_out_youth(thresholds=None, today=None):
+    """
+    Active youth members past their age threshold. Staff accounts are never included.
+    """
+    return User.objects.filter(
+        aged_out_q(thresholds, today),
+        role=User.Role.YOUTH_MEMBER, is_active=True, is_staff=False, is_superuser=False,
+    )
+
+
+def youth_footprint(user_ids):
+    """
+    Rows an age-out removes besides the user itself: (memberships, unredeemed grants).
+    """
+    return (
+        GroupMembership.objects.filter(user_id__in=user_ids).count(),
+        RewardUsage.objects.filter(user_id__in=user_ids, is_redeemed=False).count(),
+    )
+
+
+def deactivate_youth(user_ids):
+    """
+    Deactivates one batch in one transaction: drops their group memberships and
+    unredeemed reward grants and sets is_active=False, keeping the user row,
+    links and redeemed rewards. Inactive users are left out of the admin lists,
+    facets, typeahead and dashboard counts. Returns (users, memberships, grants).
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return 0, 0, 0
+    with transaction.atomic():
+        memberships, _ = GroupMembership.objects.filter(user_id__in=user_ids).delete()
+        grants, _ = RewardUsage.objects.filter(user_id__in=user_ids, is_redeemed=False).delete()
+        users = User.objects.filter(id__in=user_ids, is_active=True).update(is_active=False)
+
+    # The UPDATE bypassed the User post_save receivers
+    invalidate_stats()
+    invalidate_households(user_ids)
+    for user_id in user_ids:
+        user_cache.invalidate(user_id)
+    return users, memberships, grants
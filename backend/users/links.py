@@ -0,0 +1,97 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+
+from .household import invalidate_households
+from .models import GuardianYouthLink
+from .muting import mute_user_signals
+from .scope import sync_user_scope
+from .stats import invalidate_stats
+
+
+def _pairs_q(pairs):
+    """
+    OR of (guardian_id, youth_ids) groups, so a household is one filtered statement.
+    """
+    by_guardian = defaultdict(set)
+    for guardian_id, youth_id in pairs:
+        by_guardian[guardian_id].add(youth_id)
+    q = Q()
+    for guardian_id, youth_ids in by_guardian.items():
+        q |= Q(guardian_id=guardian_id, youth_id__in=youth_ids)
+    return q
+
+
+def apply_link_changes(add=(), remove=(), relationship_type='GUARDIAN', status='ACTIVE'):
+    """
+    Adds and removes (guardian_id, youth_id) links as a set.
+
+    Pairs that already exist are left untouched, so created_at, verified_at and
+    relationship_type survive edits. Inside one transaction: one SELECT of the
+    existing pairs, one filtered DELETE and one bulk INSERT. UserScope and the
+    stats cache are then updated once for all affected guardians.
+    Returns (added, removed).
+    """
+    remove = {(g, y) for g, y in remove if g and y}
+    add = {(g, y) for g, y in add if g and y and g != y} - remove
+    if not add and not remove:
+        return 0, 0
+
+    with mute_user_signals(), transaction.atomic():
+        removed = 0
+        if remove:
+            removed, _ = GuardianYouthLink.objects.filter(_pairs_q(remove)).delete()
+
+        if add:
+            existing = set(
+                GuardianYouthLink.objects.filter(_pairs_q(add)).values_list('guardian_id', 'youth_id')
+            )
+            add -= existing
+            GuardianYouthLink.objects.bulk_create(
+                [
+                    GuardianYouthLink(
+                        guardian_id=guardian_id, youth_id=youth_id,
+                        relationship_type=relationship_type, status=status,
+                    )
+                    for guardian_id, youth_id in add
+                ],
+                ignore_conflicts=True,
+            )
+
+    if add or removed:
+        sync_user_scope({g for g, _ in add} | {g for g, _ in remove})
+        invalidate_stats()
+        invalidate_households({user_id for pair in add | remove for user_id in pair})
+    return len(add), removed
+
+
+def sync_guardians_of_youth(youth_id, guardian_ids):
+    """
+    Makes `guardian_ids` the exact set of guardians linked to the youth.
+    """
+    desired = set(guardian_ids)
+    current = set(GuardianYouthLink.objects.filter(youth_id=youth_id).values_list('guardian_id', flat=True))
+    return apply_link_changes(
+        add=[(g, youth_id) for g in desired - current],
+        remove=[(g, youth_id) for g in current - desired],
+    )
+
+
+def sync_youth_of_guardian(guardian_id, youth_ids):
+    """
+    Makes `youth_ids` the exact set of youth linked to the guardian.
+    """
+    desired = set(youth_ids)
+    current = set(GuardianYouthLink.objects.filter(guardian_id=guardian_id).values_list('youth_id', flat=True))
+    return apply_link_changes(
+        add=[(guardian_id, y) for y in desired - current],
+        remove=[(guardian_id, y) for y in current - desired],
+    )
+
+
+def household_pairs(guardian_ids, youth_ids):
+    """
+    Every guardian of a household paired with every youth of it.
+    """
+    return [(g, y) for g in set(guardian_ids) for y in set(youth_ids)]
@@ -0,0 +1,77 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from users.audit import login_audit
+from users.gdpr import erase_users
+from users.lifecycle import age_out_thresholds, aged_out_youth, deactivate_youth, youth_footprint
+
+AGE_OUT_MODES = ('deactivate', 'anonymize', 'delete')
+
+
+class Command(BaseCommand):
+    help = (
+        'Finds youth members who have aged past YOUTH_AGE_OUT_THRESHOLDS and deactivates '
+        '(default), anonymizes or deletes them in chunks, dropping their group memberships '
+        'and unredeemed rewards. Safe to run repeatedly, e.g. nightly from cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=AGE_OUT_MODES, default='deactivate')
+        parser.add_argument('--batch-size', type=int, default=500, help='Users per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only report who would be aged out')
+
+    def handle(self, *args, **options):
+        thresholds = age_out_thresholds()
+        if any(not isinstance(age, int) or age < 1 for age in thresholds.values()):
+            raise CommandError(f"YOUTH_AGE_OUT_THRESHOLDS must map to positive ages: {thresholds}")
+        mode = options['mode']
+        batch_size = max(1, options['batch_size'])
+        today = timezone.localdate()
+
+        # 1. Snapshot the ids once; the filters run in the database
+        candidates = aged_out_youth(thresholds, today)
+        user_ids = list(candidates.order_by('id').values_list('id', flat=True))
+        limits = ', '.join(f"{code}: {age}" for code, age in sorted(thresholds.items()))
+        if not user_ids:
+            self.stdout.write(self.style.SUCCESS(f"No aged-out youth members ({limits})."))
+            return
+
+        if options['dry_run']:
+            memberships, grants = 0, 0
+            for start in range(0, len(user_ids), batch_size):
+                chunk_memberships, chunk_grants = youth_footprint(user_ids[start:start + batch_size])
+                memberships += chunk_memberships
+                grants += chunk_grants
+            self.stdout.write(self.style.SUCCESS(
+                f"Dry run ({limits}): would {mode} {len(user_ids)} youth members, remove "
+                f"{memberships} group memberships and revoke {grants} unredeemed rewards."
+            ))
+            return
+
+        # 2. One transaction per chunk; finished chunks no longer match on a rerun
+        if mode != 'deactivate':
+            login_audit.flush()
+        started = time.monotonic()
+        totals = {'users': 0, 'memberships': 0, 'grants': 0}
+        for start in range(0, len(user_ids), batch_size):
+            chunk = user_ids[start:start + batch_size]
+            if mode == 'deactivate':
+                users, memberships, grants = deactivate_youth(chunk)
+            else:
+                memberships, grants = youth_footprint(chunk)
+                users = erase_users(chunk, mode=mode)
+            totals['users'] += users
+            totals['memberships'] += memberships
+            totals['grants'] += grants
+
+            elapsed = time.monotonic() - started
+            done = start + len(chunk)
+            self.stdout.write(f"  {done}/{len(user_ids)} users ({done / elapsed if elapsed else 0:.0f}/s)")
+
+        verb = {'deactivate': 'Deactivated', 'anonymize': 'Anonymized', 'delete': 'Deleted'}[mode]
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {totals['users']} aged-out youth members ({limits}); removed "
+            f"{totals['memberships']} group memberships and revoked {totals['grants']} unredeemed rewards."
+        ))
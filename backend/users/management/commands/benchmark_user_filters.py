@@ -0,0 +1,140 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.http import QueryDict
+
+from organization.models import Country, Municipality, Club
+from users.filters import UserDemographicFilter
+from users.models import User
+
+DEMOGRAPHIC_INDEXES = [
+    'users_user_role_club_dob_idx',
+    'users_user_role_grade_jn_idx',
+    'users_user_role_verif_idx',
+]
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks the demographic user filters on a synthetic dataset. '
+        'Everything runs inside a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100000, help='Number of synthetic users')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per query')
+        parser.add_argument('--compare', action='store_true', help='Also time each query without the composite indexes')
+        parser.add_argument('--explain', action='store_true', help='Print the query plan for each query')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                clubs = self._seed(options['users'])
+                self._run(clubs, options)
+                raise _Rollback()
+        except _Rollback:
+            self.stdout.write("Synthetic data rolled back.")
+
+    def _seed(self, total):
+        rng = random.Random(42)
+        country = Country.objects.create(name='Benchmark Country', country_code='BM', description='')
+        clubs = []
+        for m in range(5):
+            muni = Municipality.objects.create(
+                country=country, name=f'Benchmark Muni {m}', description='', terms_and_conditions=''
+            )
+            for c in range(8):
+                clubs.append(Club.objects.create(
+                    municipality=muni, name=f'Benchmark Club {m}-{c}', description='',
+                    email='bench@example.com', phone='0', terms_and_conditions='', club_policies=''
+                ))
+
+        self.stdout.write(f"Seeding {total} users...")
+        start = time.perf_counter()
+        today = date.today()
+        batch = []
+        for i in range(total):
+            is_youth = rng.random() < 0.7
+            batch.append(User(
+                email=f'bench{i}@example.com',
+                password='!',
+                role='YOUTH_MEMBER' if is_youth else 'GUARDIAN',
+                preferred_club=rng.choice(clubs) if is_youth else None,
+                grade=rng.randint(1, 12) if is_youth else None,
+                date_of_birth=today - timedelta(days=rng.randint(6 * 365, 20 * 365)) if is_youth
+                else today - timedelta(days=rng.randint(25 * 365, 60 * 365)),
+                legal_gender=rng.choice(['MALE', 'FEMALE', 'OTHER']),
+                verification_status=rng.choice(['UNVERIFIED', 'PENDING', 'VERIFIED']),
+            ))
+            if len(batch) == 5000:
+                User.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            User.objects.bulk_create(batch)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.stdout.write(f"Seeded in {time.perf_counter() - start:.1f}s")
+        return clubs
+
+    def _scenarios(self, clubs):
+        club_id = clubs[0].id
+        return [
+            ('user list: youth in club aged 13-15', 'user_list',
+             f'role=YOUTH_MEMBER&preferred_club={club_id}&age_from=13&age_to=15'),
+            ('user list: youth grades 7-9', 'user_list', 'role=YOUTH_MEMBER&grade_from=7&grade_to=9'),
+            ('user list: verified youth', 'user_list', 'role=YOUTH_MEMBER&verification_status=VERIFIED'),
+            ('candidates: grades 7,8 female aged 12-16', 'candidates',
+             'target_member_type=YOUTH&grades=7,8&genders=FEMALE&min_age=12&max_age=16'),
+        ]
+
+    def _build(self, kind, params):
+        params = QueryDict(params)
+        if kind == 'user_list':
+            return UserDemographicFilter.from_user_list_params(params)
+        return UserDemographicFilter.from_candidate_params(params)
+
+    def _time(self, queryset, repeat):
+        count_times, page_times = [], []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            count = queryset.count()
+            count_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            list(queryset.order_by('-date_joined')[:10])
+            page_times.append(time.perf_counter() - start)
+        count_times.sort()
+        page_times.sort()
+        return count, count_times[len(count_times) // 2] * 1000, page_times[len(page_times) // 2] * 1000
+
+    def _run(self, clubs, options):
+        scenarios = [(label, self._build(kind, params)) for label, kind, params in self._scenarios(clubs)]
+
+        results = {}
+        for label, demographics in scenarios:
+            queryset = demographics.apply(User.objects.all())
+            results[label] = self._time(queryset, options['repeat'])
+            if options['explain']:
+                self.stdout.write(f"\n{label}\n{queryset.explain()}")
+
+        baseline = {}
+        if options['compare']:
+            with connection.cursor() as cursor:
+                for name in DEMOGRAPHIC_INDEXES:
+                    cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+            for label, demographics in scenarios:
+                baseline[label] = self._time(demographics.apply(User.objects.all()), options['repeat'])
+
+        self.stdout.write(f"\nMedian of {options['repeat']} runs on {connection.vendor}:")
+        for label, (count, count_ms, page_ms) in results.items():
+            line = f"  {label}: {count} rows | count {count_ms:.2f} ms | first page {page_ms:.2f} ms"
+            if label in baseline:
+                _, base_count_ms, base_page_ms = baseline[label]
+                line += f" (without indexes: count {base_count_ms:.2f} ms | first page {base_page_ms:.2f} ms)"
+            self.stdout.write(line)
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, DateField, Max, Min
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from users.audit import login_audit
+from users.models import UserLoginHistory, UserLoginMonthly
+
+
+class Command(BaseCommand):
+    help = (
+        'Rolls login history older than the retention period into per-user monthly totals '
+        '(UserLoginMonthly) and deletes the rolled-up rows, one month per transaction.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep-days', type=int, default=getattr(settings, 'LOGIN_HISTORY_RETENTION_DAYS', 90),
+            help='Keep individual rows for this many days',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be compacted')
+
+    def handle(self, *args, **options):
+        login_audit.flush()
+        cutoff = timezone.now() - timedelta(days=options['keep_days'])
+        old_rows = UserLoginHistory.objects.filter(timestamp__lt=cutoff)
+
+        months = list(
+            old_rows.annotate(month=TruncMonth('timestamp', output_field=DateField()))
+            .order_by('month').values_list('month', flat=True).distinct()
+        )
+        if not months:
+            self.stdout.write("Nothing to compact.")
+            return
+
+        total_rows = 0
+        for month in months:
+            rows, users = self._compact_month(old_rows, month, options['dry_run'])
+            total_rows += rows
+            self.stdout.write(f"  {month:%Y-%m}: {rows} logins from {users} users")
+
+        verb = 'Would compact' if options['dry_run'] else 'Compacted'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {total_rows} rows older than {cutoff:%Y-%m-%d} into {len(months)} months."
+        ))
+
+    def _compact_month(self, old_rows, month, dry_run):
+        # Month bounds in the current time zone, the same one TruncMonth used
+        start = timezone.make_aware(datetime(month.year, month.month, 1))
+        end = timezone.make_aware(datetime(month.year + month.month // 12, month.month % 12 + 1, 1))
+        month_rows = old_rows.filter(timestamp__gte=start, timestamp__lt=end)
+
+        with transaction.atomic():
+            totals = list(
+                month_rows.order_by().values('user_id').annotate(
+                    count=Count('id'), first=Min('timestamp'), last=Max('timestamp'),
+                )
+            )
+            rows = sum(total['count'] for total in totals)
+            if dry_run or not totals:
+                return rows, len(totals)
+
+            # Merge into existing monthly rows (a month can be compacted in several runs)
+            existing = {
+                entry.user_id: entry
+                for entry in UserLoginMonthly.objects.filter(
+                    month=month, user_id__in=[total['user_id'] for total in totals]
+                )
+            }
+            to_create, to_update = [], []
+            for total in totals:
+                entry = existing.get(total['user_id'])
+                if entry is None:
+                    to_create.append(UserLoginMonthly(
+                        user_id=total['user_id'], month=month, login_count=total['count'],
+                        first_login=total['first'], last_login=total['last'],
+                    ))
+                else:
+                    entry.login_count += total['count']
+                    entry.first_login = min(entry.first_login, total['first'])
+                    entry.last_login = max(entry.last_login, total['last'])
+                    to_update.append(entry)
+
+            UserLoginMonthly.objects.bulk_create(to_create, batch_size=500)
+            UserLoginMonthly.objects.bulk_update(
+                to_update, ['login_count', 'first_login', 'last_login'], batch_size=500
+            )
+            month_rows.delete()
+        return rows, len(totals)
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.audit import login_audit
+from users.gdpr import ERASE_MODES, erase_users
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Erases users for data-subject requests: deletes them with every related row, '
+        'or anonymizes them (--mode anonymize). Runs in batched transactions.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_ids', nargs='*', type=int)
+        parser.add_argument('--file', help='Text file with one user id per line')
+        parser.add_argument('--mode', choices=ERASE_MODES, default='delete')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be erased')
+
+    def handle(self, *args, **options):
+        user_ids = set(options['user_ids'])
+        if options['file']:
+            try:
+                with open(options['file']) as source:
+                    user_ids.update(int(line) for line in source if line.strip())
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Could not read {options['file']}: {exc}")
+        if not user_ids:
+            raise CommandError('Give user ids or --file.')
+
+        users = User.objects.filter(id__in=user_ids)
+        found = sorted(users.values_list('id', flat=True))
+        missing = len(user_ids) - len(found)
+        if users.filter(is_superuser=True).exists():
+            raise CommandError('Refusing to erase superusers; remove them from the list.')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Dry run: would {options['mode']} {len(found)} users ({missing} ids not found)."
+            ))
+            return
+
+        # Queued logins of these users would otherwise be written after the erasure
+        login_audit.flush()
+        batch_size = max(1, options['batch_size'])
+        erased = 0
+        for start in range(0, len(found), batch_size):
+            erased += erase_users(found[start:start + batch_size], mode=options['mode'])
+            self.stdout.write(f"  {erased}/{len(found)} users")
+
+        verb = 'Deleted' if options['mode'] == 'delete' else 'Anonymized'
+        self.stdout.write(self.style.SUCCESS(f"{verb} {erased} users ({missing} ids not found)."))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.gdpr import stream_user_archive
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Writes everything stored about the given users to one zip (a folder per user).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_ids', nargs='+', type=int)
+        parser.add_argument('--output', required=True, help='Path of the zip to write')
+
+    def handle(self, *args, **options):
+        user_ids = sorted(set(options['user_ids']))
+        found = set(User.objects.filter(id__in=user_ids).values_list('id', flat=True))
+        missing = sorted(set(user_ids) - found)
+        if missing:
+            raise CommandError(f"Unknown user ids: {', '.join(map(str, missing))}")
+
+        written = 0
+        with open(options['output'], 'wb') as target:
+            for chunk in stream_user_archive(user_ids):
+                target.write(chunk)
+                written += len(chunk)
+        self.stdout.write(self.style.SUCCESS(
+            f"Exported {len(user_ids)} users to {options['output']} ({written / 1024:.0f} KB)."
+        ))
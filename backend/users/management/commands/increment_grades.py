@@ -1,26 +1,169 @@
-from django.core.management.base import BaseCommand
-from django.db.models import F
-from users.models import User
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max
 from django.utils import timezone
 
+from groups.models import Group, GroupMembership
+from rewards.models import Reward, RewardUsage
+from users.authentication import user_cache
+from users.household import invalidate_households
+from users.models import GradeRolloverRun, User
+from users.stats import invalidate_stats
+
+
+def current_school_year(today=None):
+    """
+    School years start on July 1st: 2026-07-01 .. 2027-06-30 is "2026/2027".
+    """
+    today = today or timezone.localdate()
+    start = today.year if today.month >= 7 else today.year - 1
+    return f"{start}/{start + 1}"
+
+
 class Command(BaseCommand):
-    help = 'Increments the grade of all youth members by 1. Should be run on July 1st.'
+    help = (
+        'Increments the grade of all youth members by 1 and drops group memberships and '
+        'unredeemed rewards that no longer match the new grade. Runs once per school year '
+        'in chunks and resumes where it stopped. Should be run on July 1st.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--school-year', help='e.g. 2026/2027 (default: the current one)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Users per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would change')
 
     def handle(self, *args, **options):
-        # 1. Identify users who have a grade (Youth Members)
-        youth_with_grades = User.objects.filter(role='YOUTH_MEMBER', grade__isnull=False)
-        
-        count = youth_with_grades.count()
-        
-        if count == 0:
+        school_year = options['school_year'] or current_school_year()
+        batch_size = max(1, options['batch_size'])
+        dry_run = options['dry_run']
+
+        # 1. One run per school year; a crashed run is resumed from its checkpoint
+        run = GradeRolloverRun.objects.filter(school_year=school_year).first()
+        if run and run.status == GradeRolloverRun.Status.COMPLETED:
+            self.stdout.write(self.style.WARNING(
+                f"Grades were already incremented for {school_year} "
+                f"({run.users_updated} users, finished {run.finished_at:%Y-%m-%d %H:%M})."
+            ))
+            return
+
+        if run is None:
+            max_user_id = User.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+            run = GradeRolloverRun(school_year=school_year, max_user_id=max_user_id)
+        elif not dry_run:
+            self.stdout.write(f"Resuming {school_year} after user #{run.last_user_id}...")
+
+        youth = User.objects.filter(
+            role='YOUTH_MEMBER', grade__isnull=False, id__lte=run.max_user_id,
+        ).order_by('id')
+        remaining = youth.filter(id__gt=run.last_user_id).count()
+        if not run.pk:
+            run.total_users = remaining
+            if not dry_run:
+                try:
+                    run.save()
+                except IntegrityError:
+                    raise CommandError(f"Another grade rollover for {school_year} has just started.")
+
+        if remaining == 0 and run.users_updated == 0:
             self.stdout.write(self.style.WARNING('No youth members with grades found.'))
+
+        # 2. Grade-dependent targets are few; load them once
+        group_grades = {
+            group_id: set(grades)
+            for group_id, grades in Group.objects.filter(is_system_group=False)
+            .exclude(grades=[]).values_list('id', 'grades')
+        }
+        reward_grades = {
+            reward_id: set(grades)
+            for reward_id, grades in Reward.objects.exclude(target_grades=[]).values_list('id', 'target_grades')
+        }
+
+        # 3. Walk the youth in id order, one transaction per chunk
+        started = time.monotonic()
+        cursor, done = run.last_user_id, 0
+        totals = {'users': 0, 'memberships': 0, 'grants': 0}
+        while True:
+            ids = list(youth.filter(id__gt=cursor).values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            counts = self._process_chunk(run, ids, group_grades, reward_grades, dry_run)
+            for key, value in counts.items():
+                totals[key] += value
+            cursor = ids[-1]
+            done += len(ids)
+
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"  {done}/{remaining} users ({done / elapsed if elapsed else 0:.0f}/s), "
+                f"{totals['memberships']} memberships and {totals['grants']} rewards dropped"
+            )
+
+        if dry_run:
+            self.stdout.write(self.style.SUCCESS(
+                f"Dry run for {school_year}: would increment {totals['users']} grades, remove "
+                f"{totals['memberships']} group memberships and revoke {totals['grants']} unredeemed rewards."
+            ))
             return
 
-        self.stdout.write(f"Found {count} youth members. Incrementing grades...")
+        # 4. Done: close the run and drop the cached dashboards
+        run.status = GradeRolloverRun.Status.COMPLETED
+        run.finished_at = timezone.now()
+        run.save(update_fields=['status', 'finished_at'])
+        invalidate_stats()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Incremented grades for {run.users_updated} users in {school_year}; removed "
+            f"{run.memberships_removed} group memberships and revoked {run.grants_revoked} unredeemed rewards."
+        ))
+
+    def _process_chunk(self, run, ids, group_grades, reward_grades, dry_run):
+        """
+        Promotes one chunk of users and drops what their new grade no longer qualifies for.
+        The checkpoint is saved in the same transaction, so a chunk is applied exactly once;
+        cached households and auth users of the chunk are dropped once it is committed.
+        """
+        with transaction.atomic():
+            # In a dry run the grades are not written, so compare against grade + 1
+            offset = 1 if dry_run else 0
+            if not dry_run:
+                User.objects.filter(id__in=ids, grade__isnull=False).update(grade=F('grade') + 1)
+
+            stale_memberships = []
+            if group_grades:
+                memberships = GroupMembership.objects.filter(
+                    user_id__in=ids, group_id__in=group_grades, role=GroupMembership.Role.MEMBER,
+                ).values_list('id', 'group_id', 'user__grade')
+                stale_memberships = [
+                    membership_id for membership_id, group_id, grade in memberships
+                    if grade + offset not in group_grades[group_id]
+                ]
+
+            stale_grants = []
+            if reward_grades:
+                grants = RewardUsage.objects.filter(
+                    user_id__in=ids, reward_id__in=reward_grades, is_redeemed=False,
+                ).values_list('id', 'reward_id', 'user__grade')
+                stale_grants = [
+                    usage_id for usage_id, reward_id, grade in grants
+                    if grade + offset not in reward_grades[reward_id]
+                ]
+
+            if not dry_run:
+                GroupMembership.objects.filter(id__in=stale_memberships).delete()
+                RewardUsage.objects.filter(id__in=stale_grants).delete()
+                run.last_user_id = ids[-1]
+                run.users_updated = F('users_updated') + len(ids)
+                run.memberships_removed = F('memberships_removed') + len(stale_memberships)
+                run.grants_revoked = F('grants_revoked') + len(stale_grants)
+                run.save(update_fields=['last_user_id', 'users_updated', 'memberships_removed', 'grants_revoked'])
+                run.refresh_from_db(fields=['users_updated', 'memberships_removed', 'grants_revoked'])
 
-        # 2. Increment grade by 1 efficiently in the database
-        # F('grade') + 1 tells the database to take the existing value and add 1
-        youth_with_grades.update(grade=F('grade') + 1)
+        if not dry_run:
+            # The bulk update skips the signals; drop the cached copies of the committed chunk
+            invalidate_households(ids)
+            for user_id in ids:
+                user_cache.invalidate(user_id)
 
-        self.stdout.write(self.style.SUCCESS(f'Successfully incremented grades for {count} users.'))
-        self.stdout.write(f"Operation completed on {timezone.now().date()}")
\ No newline at end of file
+        return {'users': len(ids), 'memberships': len(stale_memberships), 'grants': len(stale_grants)}
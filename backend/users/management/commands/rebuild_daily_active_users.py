@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from users.activity import backfill_daily_activity
+from users.audit import login_audit
+from users.models import DailyActiveUser
+
+
+class Command(BaseCommand):
+    help = (
+        'Backfills the DailyActiveUser rollup from UserLoginHistory. '
+        'Safe to re-run: days already recorded are skipped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Only logins from the last N days (default: all)')
+
+    def handle(self, *args, **options):
+        login_audit.flush()
+        since = timezone.now() - timedelta(days=options['days']) if options['days'] else None
+        self.stdout.write("Rolling up login history...")
+        seen = backfill_daily_activity(since)
+        self.stdout.write(self.style.SUCCESS(
+            f"Done. {seen} active user-days seen, {DailyActiveUser.objects.count()} rollup rows."
+        ))
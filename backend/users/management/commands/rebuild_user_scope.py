@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from users.models import UserScope
+from users.scope import rebuild_all_user_scopes
+
+class Command(BaseCommand):
+    help = 'Rebuilds the materialized UserScope table. Run after bulk updates that bypass signals.'
+
+    def handle(self, *args, **options):
+        self.stdout.write("Rebuilding user scope table...")
+        rebuild_all_user_scopes()
+        self.stdout.write(self.style.SUCCESS(f"Done. {UserScope.objects.count()} scope rows."))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import connections
+from users.search import install_search_backend
+
+class Command(BaseCommand):
+    help = 'Installs (if needed) and rebuilds the full-text user search index.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        alias = options['database']
+        backend = install_search_backend(alias)
+        if backend is None:
+            self.stdout.write(self.style.WARNING("No full-text index for this database; searches use icontains."))
+            return
+        backend.rebuild(connections[alias])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt user search index ({backend.__class__.__name__})."))
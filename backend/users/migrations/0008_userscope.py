@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_user_scope(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    GuardianYouthLink = apps.get_model('users', 'GuardianYouthLink')
+    UserScope = apps.get_model('users', 'UserScope')
+
+    rows = set()
+    users = User.objects.values_list(
+        'id', 'assigned_municipality_id',
+        'assigned_club_id', 'assigned_club__municipality_id',
+        'preferred_club_id', 'preferred_club__municipality_id',
+    )
+    for uid, muni_id, a_club_id, a_club_muni_id, p_club_id, p_club_muni_id in users.iterator():
+        if muni_id:
+            rows.add((uid, muni_id, None))
+        if a_club_id:
+            rows.add((uid, a_club_muni_id, a_club_id))
+        if p_club_id:
+            rows.add((uid, p_club_muni_id, p_club_id))
+
+    links = GuardianYouthLink.objects.filter(youth__preferred_club__isnull=False).values_list(
+        'guardian_id', 'youth__preferred_club__municipality_id', 'youth__preferred_club_id'
+    )
+    for row in links.iterator():
+        rows.add(row)
+
+    UserScope.objects.bulk_create(
+        [UserScope(user_id=uid, municipality_id=muni_id, club_id=club_id) for uid, muni_id, club_id in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organization', '0006_remove_regularopeninghour_allowed_age_groups_and_more'),
+        ('users', '0007_userloginhistory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserScope',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('club', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='user_scope_entries', to='organization.club')),
+                ('municipality', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='user_scope_entries', to='organization.municipality')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scope_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['municipality', 'user'], name='users_scope_muni_user_idx'), models.Index(fields=['club', 'user'], name='users_scope_club_user_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('club__isnull', False)), fields=('user', 'municipality', 'club'), name='users_scope_user_club_uniq'), models.UniqueConstraint(condition=models.Q(('club__isnull', True)), fields=('user', 'municipality'), name='users_scope_user_muni_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_user_scope, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('organization', '0006_remove_regularopeninghour_allowed_age_groups_and_more'),
+        ('users', '0008_userscope'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-date_joined', '-id'], name='users_user_joined_id_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('organization', '0006_remove_regularopeninghour_allowed_age_groups_and_more'),
+        ('users', '0009_user_joined_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'preferred_club', 'date_of_birth'], name='users_user_role_club_dob_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'grade', 'date_of_birth'], name='users_user_role_grade_dob_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'verification_status', '-date_joined'], name='users_user_role_verif_idx'),
+        ),
+    ]
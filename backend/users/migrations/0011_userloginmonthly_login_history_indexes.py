@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:19
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_user_demographic_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserLoginMonthly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('login_count', models.PositiveIntegerField(default=0)),
+                ('first_login', models.DateTimeField()),
+                ('last_login', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['-month'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='userloginhistory',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='userloginhistory',
+            index=models.Index(fields=['user', '-timestamp'], name='users_login_user_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userloginhistory',
+            index=models.Index(fields=['timestamp'], name='users_login_ts_idx'),
+        ),
+        migrations.AddField(
+            model_name='userloginmonthly',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='login_months', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='userloginmonthly',
+            unique_together={('user', 'month')},
+        ),
+    ]
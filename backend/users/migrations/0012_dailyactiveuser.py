@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_daily_active_users(apps, schema_editor):
+    UserLoginHistory = apps.get_model('users', 'UserLoginHistory')
+    DailyActiveUser = apps.get_model('users', 'DailyActiveUser')
+
+    rows = set()
+    for user_id, timestamp in UserLoginHistory.objects.values_list('user_id', 'timestamp').iterator():
+        rows.add((timezone.localdate(timestamp), user_id))
+
+    DailyActiveUser.objects.bulk_create(
+        [DailyActiveUser(date=day, user_id=user_id) for day, user_id in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_userloginmonthly_login_history_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyActiveUser',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='active_days', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('date', 'user')},
+            },
+        ),
+        migrations.RunPython(backfill_daily_active_users, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0012_dailyactiveuser'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradeRolloverRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('school_year', models.CharField(help_text='e.g. 2026/2027', max_length=9, unique=True)),
+                ('status', models.CharField(choices=[('RUNNING', 'Running'), ('COMPLETED', 'Completed')], default='RUNNING', max_length=20)),
+                ('max_user_id', models.PositiveIntegerField(help_text='Users created after the run started are not promoted')),
+                ('last_user_id', models.PositiveIntegerField(default=0)),
+                ('total_users', models.PositiveIntegerField(default=0)),
+                ('users_updated', models.PositiveIntegerField(default=0)),
+                ('memberships_removed', models.PositiveIntegerField(default=0)),
+                ('grants_revoked', models.PositiveIntegerField(default=0)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
@@ -1,9 +1,11 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import FileExtensionValidator
 from organization.models import Municipality, Club, Interest
 from datetime import date
+from .tracking import FieldTrackingMixin
 
 # Define allowed file types for user avatars
 user_avatar_validator = FileExtensionValidator(allowed_extensions=['jpg', 'jpeg', 'png', 'svg', 'gif'])
@@ -24,7 +26,7 @@ class CustomUserManager(BaseUserManager):
         extra_fields.setdefault('role', 'SUPER_ADMIN')
         return self.create_user(email, password, **extra_fields)
 
-class User(AbstractUser):
+class User(FieldTrackingMixin, AbstractUser):
     class Role(models.TextChoices):
         SUPER_ADMIN = 'SUPER_ADMIN', 'Super Admin'
         MUNICIPALITY_ADMIN = 'MUNICIPALITY_ADMIN', 'Municipality Admin'
@@ -96,6 +98,17 @@ class User(AbstractUser):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Keyset pagination for admin user lists (see users/pagination.py)
+            models.Index(fields=['-date_joined', '-id'], name='users_user_joined_id_idx'),
+            # Demographic filters (see users/filters.py)
+            models.Index(fields=['role', 'preferred_club', 'date_of_birth'], name='users_user_role_club_dob_idx'),
+            # date_joined lets a grade-filtered first page be ordered without reading every matching row
+            models.Index(fields=['role', 'grade', 'date_of_birth', '-date_joined'], name='users_user_role_grade_jn_idx'),
+            models.Index(fields=['role', 'verification_status', '-date_joined'], name='users_user_role_verif_idx'),
+        ]
+
     def __str__(self):
         return f"{self.email} ({self.get_role_display()})"
 
@@ -158,17 +171,122 @@ class UserLoginHistory(models.Model):
     Stores a simple audit trail of user logins.
     """
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='login_history')
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the login happens, not when the buffered row is written (see users/audit.py)
+    timestamp = models.DateTimeField(default=timezone.now)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.CharField(max_length=512, blank=True)
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['user', '-timestamp'], name='users_login_user_ts_idx'),
+            # Retention: compact_login_history scans by age
+            models.Index(fields=['timestamp'], name='users_login_ts_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.email} @ {self.timestamp}"
 
 
+class UserLoginMonthly(models.Model):
+    """
+    Login history rolled up per user and month by compact_login_history,
+    once the individual UserLoginHistory rows are past retention.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='login_months')
+    month = models.DateField(help_text="First day of the month")
+    login_count = models.PositiveIntegerField(default=0)
+    first_login = models.DateTimeField()
+    last_login = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-month']
+        unique_together = ('user', 'month')
+
+    def __str__(self):
+        return f"{self.user.email} {self.month:%Y-%m}: {self.login_count}"
+
+
+class DailyActiveUser(models.Model):
+    """
+    One row per user and (local) day with at least one login.
+    Fed from the login audit buffer (users/activity.py); dashboards count DAU/WAU/MAU here.
+    """
+    date = models.DateField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='active_days')
+
+    class Meta:
+        unique_together = ('date', 'user')
+
+    def __str__(self):
+        return f"{self.user_id} active on {self.date}"
+
+
+class GradeRolloverRun(models.Model):
+    """
+    One grade rollover per school year (see the increment_grades command).
+    `last_user_id` is the resume point: chunks up to it are fully applied.
+    """
+    class Status(models.TextChoices):
+        RUNNING = 'RUNNING', 'Running'
+        COMPLETED = 'COMPLETED', 'Completed'
+
+    school_year = models.CharField(max_length=9, unique=True, help_text="e.g. 2026/2027")
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.RUNNING)
+    max_user_id = models.PositiveIntegerField(help_text="Users created after the run started are not promoted")
+    last_user_id = models.PositiveIntegerField(default=0)
+    total_users = models.PositiveIntegerField(default=0)
+    users_updated = models.PositiveIntegerField(default=0)
+    memberships_removed = models.PositiveIntegerField(default=0)
+    grants_revoked = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f"Grade rollover {self.school_year} ({self.get_status_display()})"
+
+
+class UserScope(models.Model):
+    """
+    Materialized admin scope for a user.
+    One row per (user, municipality, club) the user is reachable from, derived from
+    assigned_municipality, assigned_club, preferred_club and (for guardians) the
+    preferred_club of every linked youth. Maintained by users/signals.py.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='scope_entries')
+    municipality = models.ForeignKey(
+        Municipality, on_delete=models.CASCADE, null=True, blank=True,
+        related_name='user_scope_entries'
+    )
+    club = models.ForeignKey(
+        Club, on_delete=models.CASCADE, null=True, blank=True,
+        related_name='user_scope_entries'
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['municipality', 'user'], name='users_scope_muni_user_idx'),
+            models.Index(fields=['club', 'user'], name='users_scope_club_user_idx'),
+        ]
+        # club is NULL for municipality-wide rows, and NULLs never collide in a plain unique index
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'municipality', 'club'], condition=models.Q(club__isnull=False),
+                name='users_scope_user_club_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'municipality'], condition=models.Q(club__isnull=True),
+                name='users_scope_user_muni_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} -> muni={self.municipality_id} club={self.club_id}"
+
+
 # --- PROXY MODELS ---
 
 class YouthMember(User):
@@ -0,0 +1,22 @@
+import threading
+from contextlib import contextmanager
+
+_state = threading.local()
+
+
+@contextmanager
+def mute_user_signals():
+    """
+    Switches off the per-row bookkeeping receivers in users/signals.py (UserScope sync,
+    stats invalidation) for the current thread. Set-based code paths use this and
+    run the same bookkeeping once for the whole set afterwards.
+    """
+    _state.depth = getattr(_state, 'depth', 0) + 1
+    try:
+        yield
+    finally:
+        _state.depth -= 1
+
+
+def user_signals_muted():
+    return getattr(_state, 'depth', 0) > 0
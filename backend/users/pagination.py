@@ -0,0 +1,124 @@
+import json
+from datetime import datetime
+
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+from rest_framework.response import Response
+
+
+def estimate_count(queryset):
+    """
+    Returns (count, is_estimate).
+    On PostgreSQL the planner's row estimate is used instead of running COUNT(*).
+    Other backends fall back to an exact count.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows']), True
+    return queryset.count(), False
+
+
+class UserCursorPagination(CursorPagination):
+    """
+    Opt-in keyset pagination for user lists (?pagination=cursor).
+    Every page costs the same regardless of depth: the cursor holds the last
+    (date_joined, id) seen and the next page seeks past it, so rows sharing a
+    date_joined (bulk imports) are split by id instead of by an OFFSET.
+
+    Pages are always ordered newest first; in cursor mode this replaces the
+    relevance order of ?search=.
+
+    The total is skipped by default. Pass ?count=estimate for a planner estimate
+    (PostgreSQL) or ?count=exact to run COUNT(*).
+    """
+    ordering = ('-date_joined', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.total = None
+        self.total_is_estimate = False
+
+        count_mode = request.query_params.get(self.count_query_param, 'none')
+        if count_mode == 'exact':
+            self.total = queryset.count()
+        elif count_mode == 'estimate':
+            self.total, self.total_is_estimate = estimate_count(queryset)
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor.reverse)
+
+        # Seek on (date_joined, id): (date_joined, id) < (joined, pk) going forward, > going back
+        if reverse:
+            queryset = queryset.order_by('date_joined', 'id')
+        else:
+            queryset = queryset.order_by('-date_joined', '-id')
+        if self.cursor and self.cursor.position:
+            joined, pk = self._parse_position(self.cursor.position)
+            lookup = 'gt' if reverse else 'lt'
+            queryset = queryset.filter(
+                Q(**{f'date_joined__{lookup}': joined}) | Q(date_joined=joined, **{f'id__{lookup}': pk})
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+        return self.page
+
+    def _position(self, item):
+        if isinstance(item, dict):
+            return f"{item['date_joined'].isoformat()}|{item['id']}"
+        return f"{item.date_joined.isoformat()}|{item.pk}"
+
+    def _parse_position(self, position):
+        try:
+            joined, pk = position.rsplit('|', 1)
+            return datetime.fromisoformat(joined), int(pk)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self._position(self.page[-1])))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self._position(self.page[0])))
+
+    def get_paginated_response(self, data):
+        payload = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+        }
+        if self.total is not None:
+            payload['count'] = self.total
+            payload['count_is_estimate'] = self.total_is_estimate
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count'] = {'type': 'integer', 'nullable': True}
+        response_schema['properties']['count_is_estimate'] = {'type': 'boolean'}
+        return response_schema
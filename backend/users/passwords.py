@@ -0,0 +1,86 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.utils.module_loading import import_string
+
+# Below this many passwords the pool start-up costs more than it saves
+PARALLEL_THRESHOLD = 16
+
+
+def hash_workers():
+    workers = getattr(settings, 'USER_BULK_HASH_WORKERS', None)
+    return max(1, workers if workers is not None else (os.cpu_count() or 1))
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """
+    One long-lived pool per process. Workers are spawned, not forked: the web
+    process has other threads (login audit timer, DB connections) whose locks and
+    sockets a forked child would inherit mid-use.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=hash_workers(), mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pool
+
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _encode(args):
+    """
+    Runs in a worker process. Hashers only need hashlib, so no Django setup is required.
+    """
+    hasher_path, password = args
+    hasher = import_string(hasher_path)()
+    return hasher.encode(password, hasher.salt())
+
+
+def hash_passwords(passwords, workers=None):
+    """
+    Returns make_password(p) for every password, in order.
+
+    PBKDF2 is deliberately slow, so large batches are spread over a shared process
+    pool (USER_BULK_HASH_WORKERS, default: one per CPU). None means no password and
+    becomes an unusable hash, which costs nothing.
+    """
+    passwords = list(passwords)
+    hashes = [make_password(None) if password is None else None for password in passwords]
+    todo = [index for index, password in enumerate(passwords) if password is not None]
+
+    workers = min(workers or hash_workers(), len(todo))
+    if workers <= 1 or len(todo) < PARALLEL_THRESHOLD:
+        for index in todo:
+            hashes[index] = make_password(passwords[index])
+        return hashes
+
+    hasher = get_hasher('default')
+    hasher_path = f'{type(hasher).__module__}.{type(hasher).__qualname__}'
+    jobs = [(hasher_path, passwords[index]) for index in todo]
+    pool = _get_pool()
+    try:
+        encoded = list(pool.map(_encode, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM-killed); start a fresh pool next time and finish here
+        _discard_pool(pool)
+        encoded = [make_password(password) for _, password in jobs]
+    for index, value in zip(todo, encoded):
+        hashes[index] = value
+    return hashes
@@ -0,0 +1,222 @@
+from django.db import transaction
+from django.db.models import Q
+
+from organization.models import Club
+
+from .models import User, GuardianYouthLink, UserScope
+
+SYNC_CHUNK_SIZE = 500
+
+
+def _chunks(ids, size=SYNC_CHUNK_SIZE):
+    ids = list(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def compute_scope_rows(user_ids):
+    """
+    Returns { user_id: {(municipality_id, club_id), ...} } for the given users.
+    Mirrors the join paths the admin list used to OR together:
+    assigned_municipality, assigned_club, preferred_club and linked youth's club.
+    """
+    rows = {uid: set() for uid in user_ids}
+
+    users = User.objects.filter(id__in=user_ids).values_list(
+        'id',
+        'assigned_municipality_id',
+        'assigned_club_id', 'assigned_club__municipality_id',
+        'preferred_club_id', 'preferred_club__municipality_id',
+    )
+    for uid, muni_id, a_club_id, a_club_muni_id, p_club_id, p_club_muni_id in users:
+        if muni_id:
+            rows[uid].add((muni_id, None))
+        if a_club_id:
+            rows[uid].add((a_club_muni_id, a_club_id))
+        if p_club_id:
+            rows[uid].add((p_club_muni_id, p_club_id))
+
+    # Guardians inherit the clubs of the youth they are linked to
+    links = GuardianYouthLink.objects.filter(
+        guardian_id__in=user_ids,
+        youth__preferred_club__isnull=False,
+    ).values_list('guardian_id', 'youth__preferred_club__municipality_id', 'youth__preferred_club_id')
+    for guardian_id, muni_id, club_id in links:
+        rows[guardian_id].add((muni_id, club_id))
+
+    return rows
+
+
+def sync_user_scope(user_ids):
+    """
+    Brings the UserScope rows of the given users in line with their current data.
+    Only changed rows are written: one filtered delete and one bulk insert per chunk.
+    """
+    for chunk in _chunks(set(user_ids)):
+        with transaction.atomic():
+            desired = compute_scope_rows(chunk)
+            existing = UserScope.objects.filter(user_id__in=chunk).values_list(
+                'id', 'user_id', 'municipality_id', 'club_id'
+            )
+
+            stale_ids = []
+            for row_id, uid, muni_id, club_id in existing:
+                key = (muni_id, club_id)
+                if key in desired.get(uid, ()):
+                    desired[uid].discard(key)
+                else:
+                    stale_ids.append(row_id)
+
+            if stale_ids:
+                UserScope.objects.filter(id__in=stale_ids).delete()
+
+            # A concurrent sync may have inserted the same rows; the unique constraints make that a no-op
+            UserScope.objects.bulk_create([
+                UserScope(user_id=uid, municipality_id=muni_id, club_id=club_id)
+                for uid, keys in desired.items()
+                for muni_id, club_id in keys
+            ], ignore_conflicts=True)
+
+
+def rebuild_all_user_scopes():
+    """
+    Re-syncs every user. Used after raw/bulk updates that bypass signals.
+    """
+    user_ids = User.objects.values_list('id', flat=True).order_by('id')
+    sync_user_scope(user_ids)
+
+
+def scope_user_ids(admin):
+    """
+    Returns a subquery of user ids visible to the given admin,
+    or None if the admin is not restricted (Super Admin).
+    """
+    role = getattr(admin, 'role', None)
+    if role == 'MUNICIPALITY_ADMIN' and admin.assigned_municipality_id:
+        return UserScope.objects.filter(municipality_id=admin.assigned_municipality_id).values('user_id')
+    if role == 'CLUB_ADMIN' and admin.assigned_club_id:
+        return UserScope.objects.filter(club_id=admin.assigned_club_id).values('user_id')
+    return None
+
+
+def filter_by_admin_scope(queryset, admin):
+    """
+    Restricts a User queryset to the admin's scope using a single semi-join
+    on the indexed UserScope table (no DISTINCT needed).
+    """
+    user_ids = scope_user_ids(admin)
+    if user_ids is None:
+        return queryset
+    return queryset.filter(id__in=user_ids)
+
+
+class AdminScope:
+    """
+    Answers "are these users / groups / rewards inside this admin's scope?".
+
+    - User checks are one semi-join on the indexed UserScope table.
+    - Groups and rewards are owned by a municipality or a club; the club ids of a
+      Municipality Admin's municipality are loaded once, after which owner checks
+      need no further queries.
+    Answers are memoized, so use AdminScope.for_request(request) to share one
+    instance between permission classes, views and serializers of a request.
+    """
+
+    def __init__(self, admin):
+        self.admin = admin
+        self.role = getattr(admin, 'role', None)
+        self.municipality_id = getattr(admin, 'assigned_municipality_id', None)
+        self.club_id = getattr(admin, 'assigned_club_id', None)
+        self._club_ids = None
+        self._users = {}
+
+    @classmethod
+    def for_request(cls, request):
+        scope = getattr(request, '_admin_scope', None)
+        if scope is None or scope.admin is not request.user:
+            scope = cls(request.user)
+            request._admin_scope = scope
+        return scope
+
+    @property
+    def unrestricted(self):
+        return self.role == 'SUPER_ADMIN'
+
+    @property
+    def club_ids(self):
+        """
+        Clubs the admin manages: every club of their municipality, or their own club.
+        """
+        if self._club_ids is None:
+            if self.role == 'MUNICIPALITY_ADMIN' and self.municipality_id:
+                self._club_ids = set(
+                    Club.objects.filter(municipality_id=self.municipality_id).values_list('id', flat=True)
+                )
+            elif self.role == 'CLUB_ADMIN' and self.club_id:
+                self._club_ids = {self.club_id}
+            else:
+                self._club_ids = set()
+        return self._club_ids
+
+    # --- Users ---
+
+    def filter_users(self, queryset):
+        return filter_by_admin_scope(queryset, self.admin)
+
+    def users_in_scope(self, user_ids, role=None):
+        """
+        The subset of user_ids inside the scope (and of `role`, if given).
+        """
+        user_ids = {int(uid) for uid in user_ids}
+        if self.unrestricted:
+            return user_ids
+        if self.role not in ('MUNICIPALITY_ADMIN', 'CLUB_ADMIN'):
+            return set()
+
+        unknown = {uid for uid in user_ids if (uid, role) not in self._users}
+        if unknown:
+            queryset = User.objects.filter(id__in=unknown)
+            if role:
+                queryset = queryset.filter(role=role)
+            found = set(self.filter_users(queryset).values_list('id', flat=True))
+            for uid in unknown:
+                self._users[(uid, role)] = uid in found
+        return {uid for uid in user_ids if self._users[(uid, role)]}
+
+    def contains_user(self, user_id, role=None):
+        return bool(self.users_in_scope([user_id], role=role))
+
+    # --- Groups / rewards (anything with municipality_id and club_id) ---
+
+    def owns(self, obj):
+        """
+        True if the admin manages a group/reward, based on its owner columns.
+        """
+        if self.unrestricted:
+            return True
+        if self.role == 'MUNICIPALITY_ADMIN' and self.municipality_id:
+            return obj.municipality_id == self.municipality_id or obj.club_id in self.club_ids
+        if self.role == 'CLUB_ADMIN' and self.club_id:
+            return obj.club_id == self.club_id
+        return False
+
+    def owner_q(self, prefix=''):
+        """
+        Q selecting the groups/rewards the admin manages (prefix e.g. 'group__').
+        """
+        if self.unrestricted:
+            return Q()
+        if self.role == 'MUNICIPALITY_ADMIN' and self.municipality_id:
+            return Q(**{f'{prefix}municipality_id': self.municipality_id}) | Q(**{f'{prefix}club_id__in': self.club_ids})
+        if self.role == 'CLUB_ADMIN' and self.club_id:
+            return Q(**{f'{prefix}club_id': self.club_id})
+        return Q(pk__in=[])
+
+    def owned_ids(self, model, ids):
+        """
+        The subset of `ids` of a Group/Reward model the admin manages, in one query.
+        """
+        ids = {int(pk) for pk in ids}
+        if not ids:
+            return set()
+        return set(model.objects.filter(self.owner_q(), id__in=ids).values_list('id', flat=True))
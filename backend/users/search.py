@@ -0,0 +1,238 @@
+import re
+
+from django.conf import settings
+from django.db import connections, DatabaseError
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(term):
+    return TOKEN_RE.findall((term or '').lower())
+
+
+class BaseSearchBackend:
+    """
+    Filters a User queryset by a free-text term.
+    The queryset passed in is already scoped, so results never leave the admin's scope.
+    With rank=True the queryset is annotated with `search_rank` (higher is better).
+    """
+    def __init__(self, alias='default'):
+        self.alias = alias
+
+    def install(self, connection):
+        """Create/repair whatever the backend needs in the database. Must be idempotent."""
+
+    def rebuild(self, connection):
+        """Re-index every user."""
+
+    def search(self, queryset, term, rank=False):
+        raise NotImplementedError
+
+
+class IContainsSearchBackend(BaseSearchBackend):
+    """
+    Portable fallback: substring match on name and email (full scan).
+    """
+    def search(self, queryset, term, rank=False):
+        queryset = queryset.filter(
+            Q(first_name__icontains=term) |
+            Q(last_name__icontains=term) |
+            Q(email__icontains=term)
+        )
+        if rank:
+            queryset = queryset.annotate(search_rank=RawSQL('0', [], output_field=FloatField()))
+        return queryset
+
+
+class SQLiteFTSSearchBackend(BaseSearchBackend):
+    """
+    SQLite FTS5 index kept in sync by triggers on users_user.
+    Every token of the term is matched as a prefix ("ann and" finds "Anna Andersson").
+    Ranked with bm25.
+    """
+    table = 'users_user_fts'
+    columns = ('first_name', 'last_name', 'email', 'nickname')
+
+    def _column_list(self, prefix=''):
+        return ', '.join(f'{prefix}{col}' for col in self.columns)
+
+    def is_installed(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [self.table])
+            return cursor.fetchone() is not None
+
+    def install(self, connection):
+        cols = self._column_list()
+        new_cols = self._column_list('new.')
+        old_cols = self._column_list('old.')
+        created = not self.is_installed(connection)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+                f"{cols}, content='users_user', content_rowid='id', "
+                f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+            cursor.execute("SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s", [f'{self.table}_%'])
+            triggers_missing = cursor.fetchone()[0] < 3
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {self.table}_ai AFTER INSERT ON users_user BEGIN "
+                f"INSERT INTO {self.table}(rowid, {cols}) VALUES (new.id, {new_cols}); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {self.table}_ad AFTER DELETE ON users_user BEGIN "
+                f"INSERT INTO {self.table}({self.table}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {self.table}_au AFTER UPDATE OF {cols} ON users_user BEGIN "
+                f"INSERT INTO {self.table}({self.table}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); "
+                f"INSERT INTO {self.table}(rowid, {cols}) VALUES (new.id, {new_cols}); END"
+            )
+        # Triggers are dropped whenever a migration rebuilds users_user; re-index after that
+        if created or triggers_missing:
+            self.rebuild(connection)
+
+    def rebuild(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {self.table}({self.table}) VALUES ('rebuild')")
+
+    def search(self, queryset, term, rank=False):
+        tokens = tokenize(term)
+        if not tokens:
+            return queryset
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        queryset = queryset.filter(
+            id__in=RawSQL(f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s", [match])
+        )
+        if rank:
+            queryset = queryset.annotate(search_rank=RawSQL(
+                f'(SELECT -bm25({self.table}) FROM {self.table} '
+                f'WHERE {self.table} MATCH %s AND {self.table}.rowid = "users_user"."id")',
+                [match], output_field=FloatField(),
+            ))
+        return queryset
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    PostgreSQL: GIN index on a tsvector expression for prefix matching and ts_rank,
+    plus a pg_trgm GIN index so substring matches stay index-backed.
+    Expression indexes are maintained by PostgreSQL on every write.
+    """
+    document = (
+        "coalesce(\"users_user\".\"first_name\", '') || ' ' || "
+        "coalesce(\"users_user\".\"last_name\", '') || ' ' || "
+        "coalesce(\"users_user\".\"nickname\", '') || ' ' || "
+        "translate(coalesce(\"users_user\".\"email\", ''), '@._-', '    ')"
+    )
+
+    def __init__(self, alias='default'):
+        super().__init__(alias)
+        self._has_trigram = None
+
+    @property
+    def vector(self):
+        return f"to_tsvector('simple', {self.document})"
+
+    def has_trigram(self, connection):
+        if self._has_trigram is None:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                self._has_trigram = cursor.fetchone() is not None
+        return self._has_trigram
+
+    def install(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS users_user_search_tsv_idx ON users_user USING GIN (({self.vector}))"
+            )
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        except DatabaseError:
+            # No privilege to create extensions: prefix search still works without trigrams
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS users_user_search_trgm_idx ON users_user "
+                f"USING GIN ((lower({self.document})) gin_trgm_ops)"
+            )
+
+    def search(self, queryset, term, rank=False):
+        tokens = tokenize(term)
+        if not tokens:
+            return queryset
+        tsquery = ' & '.join(f'{token}:*' for token in tokens)
+        condition = f"{self.vector} @@ to_tsquery('simple', %s)"
+        params = [tsquery]
+        if self.has_trigram(connections[queryset.db]):
+            condition = f"({condition} OR lower({self.document}) LIKE %s)"
+            params.append(f"%{term.lower().replace('%', '').replace('_', '')}%")
+        queryset = queryset.filter(
+            id__in=RawSQL(f'SELECT "users_user"."id" FROM "users_user" WHERE {condition}', params)
+        )
+        if rank:
+            queryset = queryset.annotate(search_rank=RawSQL(
+                f"ts_rank({self.vector}, to_tsquery('simple', %s))", [tsquery], output_field=FloatField(),
+            ))
+        return queryset
+
+
+_backends = {}
+
+
+def get_search_backend(alias='default'):
+    """
+    Returns the search backend for a database alias.
+    settings.USER_SEARCH_BACKEND (dotted path) overrides the vendor default.
+    """
+    if alias in _backends:
+        return _backends[alias]
+
+    connection = connections[alias]
+    backend_path = getattr(settings, 'USER_SEARCH_BACKEND', None)
+    if backend_path:
+        backend = import_string(backend_path)(alias)
+    elif connection.vendor == 'sqlite':
+        backend = SQLiteFTSSearchBackend(alias)
+        if not backend.is_installed(connection):
+            backend = IContainsSearchBackend(alias)
+    elif connection.vendor == 'postgresql':
+        backend = PostgresSearchBackend(alias)
+    else:
+        backend = IContainsSearchBackend(alias)
+
+    _backends[alias] = backend
+    return backend
+
+
+def install_search_backend(alias='default'):
+    """
+    Installs the vendor search index for `alias`. Called after every migrate.
+    """
+    connection = connections[alias]
+    if connection.vendor == 'sqlite':
+        backend = SQLiteFTSSearchBackend(alias)
+    elif connection.vendor == 'postgresql':
+        backend = PostgresSearchBackend(alias)
+    else:
+        return None
+    try:
+        backend.install(connection)
+    except DatabaseError:
+        # e.g. SQLite compiled without FTS5: the icontains fallback is used
+        return None
+    _backends.pop(alias, None)
+    return backend
+
+
+def search_users(queryset, term, rank=False):
+    """
+    Applies the configured full-text search to an (already scoped) User queryset.
+    """
+    term = (term or '').strip()
+    if not term:
+        return queryset
+    return get_search_backend(queryset.db).search(queryset, term, rank=rank)
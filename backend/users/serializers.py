@@ -1,5 +1,9 @@
 from rest_framework import serializers
+from api.images import SrcsetField
 from .models import User, GuardianYouthLink
+from .links import apply_link_changes, sync_guardians_of_youth, sync_youth_of_guardian
+from .scope import AdminScope
+from django.db.models import Prefetch
 from django.http import QueryDict
 
 class CustomUserSerializer(serializers.ModelSerializer):
@@ -10,6 +14,7 @@ class CustomUserSerializer(serializers.ModelSerializer):
     # Add youth_members for Guardians viewing their profile
     youth_members = serializers.SerializerMethodField()
     custom_field_values = serializers.SerializerMethodField()
+    avatar_srcset = SrcsetField(source='avatar')
 
     class Meta:
         model = User
@@ -19,27 +24,41 @@ class CustomUserSerializer(serializers.ModelSerializer):
             'assigned_municipality', 'assigned_club',
             'grade', 'preferred_club', 'nickname',
             'legal_gender', 'preferred_gender', 'date_of_birth',
-            'avatar', 'preferred_language', 'is_active',
+            'avatar', 'avatar_srcset', 'preferred_language', 'is_active',
             'date_joined', 'last_login', 'hide_contact_info', 'interests',
             'verification_status', 'guardians', 'youth_members', 'custom_field_values'
         ]
         read_only_fields = ['id', 'date_joined', 'last_login']
 
+    @staticmethod
+    def prefetch_related_objects(queryset):
+        """
+        Loads guardian links, youth links, interests and custom field values
+        for a whole page in a constant number of queries.
+        Apply this to any queryset serialized with many=True.
+        """
+        from custom_fields.models import CustomFieldValue
+        return queryset.prefetch_related(
+            'interests',
+            Prefetch('guardian_links', queryset=GuardianYouthLink.objects.only('id', 'guardian_id', 'youth_id')),
+            Prefetch('youth_links', queryset=GuardianYouthLink.objects.only('id', 'guardian_id', 'youth_id')),
+            Prefetch('custom_field_values', queryset=CustomFieldValue.objects.only('id', 'field_id', 'user_id', 'value')),
+        )
+
     def get_guardians(self, obj):
         # If obj is a Youth, return their guardians
-        return list(obj.guardian_links.values_list('guardian_id', flat=True))
+        # .all() reuses the prefetch cache when the queryset was prepared with prefetch_related_objects
+        return [link.guardian_id for link in obj.guardian_links.all()]
 
     def get_youth_members(self, obj):
         # If obj is a Guardian, return their youth
-        return list(obj.youth_links.values_list('youth_id', flat=True))
+        return [link.youth_id for link in obj.youth_links.all()]
 
     def get_custom_field_values(self, obj):
         # Return custom field values as a list of {field: field_id, value: value}
-        from custom_fields.models import CustomFieldValue
-        values = CustomFieldValue.objects.filter(user=obj).select_related('field')
         return [
-            {'field': cfv.field.id, 'value': cfv.value}
-            for cfv in values
+            {'field': cfv.field_id, 'value': cfv.value}
+            for cfv in obj.custom_field_values.all()
         ]
 
 
@@ -55,6 +74,8 @@ class UserManagementSerializer(serializers.ModelSerializer):
     # For Guardians: List of Youth IDs (New)
     youth_members = serializers.ListField(child=serializers.IntegerField(), required=False, write_only=True)
 
+    avatar_srcset = SrcsetField(source='avatar')
+
     class Meta:
         model = User
         fields = [
@@ -63,7 +84,7 @@ class UserManagementSerializer(serializers.ModelSerializer):
             'assigned_municipality', 'assigned_club',
             'grade', 'preferred_club', 'interests',
             'nickname', 'legal_gender', 'preferred_gender',
-            'date_of_birth', 'hide_contact_info', 'avatar',
+            'date_of_birth', 'hide_contact_info', 'avatar', 'avatar_srcset',
             'verification_status', 'guardians', 'youth_members',
             'preferred_language'
         ]
@@ -75,24 +96,11 @@ class UserManagementSerializer(serializers.ModelSerializer):
         if not request:
             return youth_ids
 
-        requester = request.user
-        if getattr(requester, 'role', None) == 'MUNICIPALITY_ADMIN' and requester.assigned_municipality:
-            allowed_ids = set(
-                User.objects.filter(
-                    role='YOUTH_MEMBER',
-                    preferred_club__municipality=requester.assigned_municipality
-                ).values_list('id', flat=True)
-            )
-            return [yid for yid in youth_ids if yid in allowed_ids]
-        elif getattr(requester, 'role', None) == 'CLUB_ADMIN' and requester.assigned_club:
-            allowed_ids = set(
-                User.objects.filter(
-                    role='YOUTH_MEMBER',
-                    preferred_club=requester.assigned_club
-                ).values_list('id', flat=True)
-            )
-            return [yid for yid in youth_ids if yid in allowed_ids]
-        return youth_ids
+        scope = AdminScope.for_request(request)
+        if scope.unrestricted or scope.role not in ('MUNICIPALITY_ADMIN', 'CLUB_ADMIN'):
+            return youth_ids
+        allowed_ids = scope.users_in_scope(youth_ids, role='YOUTH_MEMBER')
+        return [yid for yid in youth_ids if yid in allowed_ids]
 
     def create(self, validated_data):
         password = validated_data.pop('password')
@@ -110,17 +118,11 @@ class UserManagementSerializer(serializers.ModelSerializer):
             
         # Case 1: Creating a Youth (Link to Guardians)
         if guardian_ids:
-            for gid in guardian_ids:
-                GuardianYouthLink.objects.create(
-                    youth=user, guardian_id=gid, relationship_type='GUARDIAN', status='ACTIVE'
-                )
+            apply_link_changes(add=[(gid, user.id) for gid in guardian_ids])
 
         # Case 2: Creating a Guardian (Link to Youth)
         if youth_ids:
-            for yid in youth_ids:
-                GuardianYouthLink.objects.create(
-                    guardian=user, youth_id=yid, relationship_type='GUARDIAN', status='ACTIVE'
-                )
+            apply_link_changes(add=[(user.id, yid) for yid in youth_ids])
             
         return user
 
@@ -162,20 +164,12 @@ class UserManagementSerializer(serializers.ModelSerializer):
         if interests is not None:
             instance.interests.set(interests)
             
-        # Sync Guardians (If User is Youth)
+        # Sync Guardians (If User is Youth): only added/removed links are written
         if guardian_ids is not None:
-            instance.guardian_links.all().delete()
-            for gid in guardian_ids:
-                GuardianYouthLink.objects.create(
-                    youth=instance, guardian_id=gid, relationship_type='GUARDIAN', status='ACTIVE'
-                )
+            sync_guardians_of_youth(instance.id, guardian_ids)
 
         # Sync Youth (If User is Guardian)
         if youth_ids is not None:
-            instance.youth_links.all().delete()
-            for yid in youth_ids:
-                GuardianYouthLink.objects.create(
-                    guardian=instance, youth_id=yid, relationship_type='GUARDIAN', status='ACTIVE'
-                )
+            sync_youth_of_guardian(instance.id, youth_ids)
             
         return instance
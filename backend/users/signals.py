@@ -0,0 +1,113 @@
+from django.core.management import call_command
+from django.db.models.signals import post_save, post_delete, post_migrate
+from django.dispatch import receiver
+from organization.models import Club
+from .models import User, GuardianYouthLink, UserScope
+from .authentication import user_cache
+from .household import HOUSEHOLD_USER_FIELDS, invalidate_households
+from .muting import user_signals_muted
+from .scope import sync_user_scope
+from .search import install_search_backend
+from .stats import invalidate_stats
+from .tracking import when_changed
+
+
+# --- UserScope maintenance ---
+
+@receiver(post_save, sender=User)
+@when_changed('role', 'assigned_municipality', 'assigned_club', 'preferred_club')
+def sync_scope_on_user_save(sender, instance, **kwargs):
+    if user_signals_muted():
+        return
+    user_ids = [instance.pk]
+    # A youth's club is part of every linked guardian's scope
+    if instance.role == User.Role.YOUTH_MEMBER:
+        user_ids += list(instance.guardian_links.values_list('guardian_id', flat=True))
+    sync_user_scope(user_ids)
+
+
+@receiver(post_save, sender=GuardianYouthLink)
+@receiver(post_delete, sender=GuardianYouthLink)
+def sync_scope_on_link_change(sender, instance, **kwargs):
+    if user_signals_muted():
+        return
+    sync_user_scope([instance.guardian_id])
+
+
+@receiver(post_save, sender=Club)
+def sync_scope_on_club_move(sender, instance, created, **kwargs):
+    # If a club moves to another municipality, re-point its scope rows in one UPDATE
+    if not created:
+        UserScope.objects.filter(club=instance).exclude(
+            municipality_id=instance.municipality_id
+        ).update(municipality_id=instance.municipality_id)
+
+
+# --- Dashboard stats cache ---
+
+# Fields the dashboard counts and scopes are computed from
+STATS_FIELDS = (
+    'role', 'legal_gender', 'grade', 'verification_status', 'date_joined',
+    'assigned_municipality', 'assigned_club', 'preferred_club', 'is_active',
+)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@when_changed(*STATS_FIELDS)
+def invalidate_stats_on_user_change(sender, **kwargs):
+    if user_signals_muted():
+        return
+    invalidate_stats()
+
+
+@receiver(post_save, sender=GuardianYouthLink)
+@receiver(post_delete, sender=GuardianYouthLink)
+def invalidate_stats_cache(sender, **kwargs):
+    if user_signals_muted():
+        return
+    invalidate_stats()
+
+
+# --- Household graph cache ---
+
+@receiver(post_save, sender=GuardianYouthLink)
+@receiver(post_delete, sender=GuardianYouthLink)
+def invalidate_household_on_link_change(sender, instance, **kwargs):
+    if user_signals_muted():
+        return
+    invalidate_households([instance.guardian_id, instance.youth_id])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@when_changed(*(field.removesuffix('_id') for field in HOUSEHOLD_USER_FIELDS if '__' not in field))
+def invalidate_household_on_user_change(sender, instance, **kwargs):
+    # Names, roles and clubs are part of the cached graph
+    if user_signals_muted():
+        return
+    invalidate_households([instance.pk])
+
+
+# --- Authentication cache ---
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@when_changed()
+def drop_cached_auth_user(sender, instance, **kwargs):
+    # Not muted: a stale role or is_active must never outlive the save
+    user_cache.invalidate(instance.pk)
+
+
+# --- Full-text search index ---
+
+def install_user_search_index(sender, using='default', **kwargs):
+    # Idempotent; also repairs SQLite triggers dropped when a migration rebuilds users_user
+    install_search_backend(using)
+
+
+# --- Shared cache table ---
+
+def install_cache_table(sender, using='default', **kwargs):
+    # The DatabaseCache in settings.CACHES needs its table; a no-op once it exists
+    call_command('createcachetable', database=using, verbosity=0)
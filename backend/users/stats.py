@@ -0,0 +1,169 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .activity import activity_summary
+from .models import User
+from .scope import filter_by_admin_scope, scope_user_ids
+
+GENERATION_KEY = 'user_stats:generation'
+
+
+def stats_cache_timeout():
+    return getattr(settings, 'USER_STATS_CACHE_TIMEOUT', 300)
+
+
+def scope_key(admin):
+    """
+    Cache partition for an admin: super / municipality:<id> / club:<id>.
+    """
+    role = getattr(admin, 'role', None)
+    if role == 'MUNICIPALITY_ADMIN' and admin.assigned_municipality_id:
+        return f'municipality:{admin.assigned_municipality_id}'
+    if role == 'CLUB_ADMIN' and admin.assigned_club_id:
+        return f'club:{admin.assigned_club_id}'
+    return 'super'
+
+
+def _generation():
+    cache.add(GENERATION_KEY, 1, timeout=None)
+    return cache.get(GENERATION_KEY, 1)
+
+
+def invalidate_stats():
+    """
+    Drops every cached dashboard by bumping the generation in the cache keys.
+    The generation lives in the shared cache (settings.CACHES), so every worker
+    sees the bump on its next request.
+    """
+    if not cache.add(GENERATION_KEY, 2, timeout=None):
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            cache.set(GENERATION_KEY, 2, timeout=None)
+
+
+def cached_stats(kind, partition, compute):
+    """
+    Returns compute() from the cache for (kind, partition), computing it on a miss.
+    A "cache" block tells the client how old the numbers are.
+    """
+    timeout = stats_cache_timeout()
+    key = f'user_stats:{_generation()}:{kind}:{partition}'
+    entry = cache.get(key)
+    hit = entry is not None
+    if not hit:
+        entry = {'computed_at': timezone.now(), 'data': compute()}
+        cache.set(key, entry, timeout=timeout)
+
+    age = (timezone.now() - entry['computed_at']).total_seconds()
+    data = dict(entry['data'])
+    data['cache'] = {
+        'cached': hit,
+        'computed_at': entry['computed_at'].isoformat(),
+        'age_seconds': int(age),
+        'max_age_seconds': timeout,
+    }
+    return data
+
+
+# --- Single-query dashboards ---
+
+def _activity(users, **extra):
+    """
+    Activity block from the DailyActiveUser rollup. active_7_days is the WAU,
+    kept under its old name for existing clients.
+    """
+    summary = activity_summary(users)
+    return {"active_7_days": summary['wau'], **extra, **summary}
+
+
+def compute_admin_stats():
+    now = timezone.now()
+    admins = User.objects.filter(role__in=['SUPER_ADMIN', 'MUNICIPALITY_ADMIN', 'CLUB_ADMIN'], is_active=True)
+    row = admins.aggregate(
+        total=Count('id'),
+        super=Count('id', filter=Q(role='SUPER_ADMIN')),
+        municipality=Count('id', filter=Q(role='MUNICIPALITY_ADMIN')),
+        club=Count('id', filter=Q(role='CLUB_ADMIN')),
+        male=Count('id', filter=Q(legal_gender='MALE')),
+        female=Count('id', filter=Q(legal_gender='FEMALE')),
+        other=Count('id', filter=Q(legal_gender='OTHER')),
+        new_30_days=Count('id', filter=Q(date_joined__gte=now - timedelta(days=30))),
+    )
+    return {
+        "total_admins": row['total'],
+        "roles": {
+            "super": row['super'],
+            "municipality": row['municipality'],
+            "club": row['club'],
+        },
+        "gender": {
+            "male": row['male'],
+            "female": row['female'],
+            "other": row['other'],
+        },
+        "activity": _activity(admins, new_30_days=row['new_30_days']),
+    }
+
+
+def compute_youth_stats(admin):
+    # Deactivated accounts (aged-out youth, users/lifecycle.py) are not counted anywhere
+    youth = filter_by_admin_scope(User.objects.filter(role='YOUTH_MEMBER', is_active=True), admin)
+
+    # One GROUP BY grade pass; gender and activity are conditional counts per grade
+    rows = youth.order_by().values('grade').annotate(
+        total=Count('id'),
+        male=Count('id', filter=Q(legal_gender='MALE')),
+        female=Count('id', filter=Q(legal_gender='FEMALE')),
+        other=Count('id', filter=Q(legal_gender='OTHER')),
+    ).order_by('grade')
+
+    totals = {'total': 0, 'male': 0, 'female': 0, 'other': 0}
+    grade_data = {}
+    for row in rows:
+        for key in totals:
+            totals[key] += row[key]
+        if row['grade'] is not None:
+            grade_data[str(row['grade'])] = row['total']
+
+    return {
+        "total_youth": totals['total'],
+        "grades": grade_data,
+        "gender": {
+            "male": totals['male'],
+            "female": totals['female'],
+            "other": totals['other'],
+        },
+        "activity": _activity(youth),
+    }
+
+
+def compute_guardian_stats(admin):
+    guardians = filter_by_admin_scope(User.objects.filter(role='GUARDIAN', is_active=True), admin)
+
+    # Connections are links from these guardians to youth inside the same scope
+    connection_filter = Q(youth_links__youth__role='YOUTH_MEMBER', youth_links__youth__is_active=True)
+    youth_ids = scope_user_ids(admin)
+    if youth_ids is not None:
+        connection_filter &= Q(youth_links__youth_id__in=youth_ids)
+
+    row = guardians.aggregate(
+        total=Count('id', distinct=True),
+        verified=Count('id', distinct=True, filter=Q(verification_status='VERIFIED')),
+        pending=Count('id', distinct=True, filter=Q(verification_status='PENDING')),
+        unverified=Count('id', distinct=True, filter=Q(verification_status='UNVERIFIED')),
+        connections=Count('youth_links', distinct=True, filter=connection_filter),
+    )
+    return {
+        "total_guardians": row['total'],
+        "verification": {
+            "verified": row['verified'],
+            "pending": row['pending'],
+            "unverified": row['unverified'],
+        },
+        "activity": _activity(guardians, total_connections=row['connections']),
+    }
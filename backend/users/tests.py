@@ -1,3 +1,358 @@
-from django.test import TestCase
+import io
+import json
+import tempfile
+import zipfile
+from datetime import date
 
-# Create your tests here.
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from custom_fields.models import CustomFieldDefinition, CustomFieldValue
+from groups.models import Group, GroupMembership
+from rewards.models import Reward, RewardUsage
+from organization.models import Country, Municipality, Club, Interest
+from .audit import LoginAuditBuffer
+from .gdpr import erase_users, stream_user_archive
+from .household import cached_household
+from .stats import compute_youth_stats
+from .models import DailyActiveUser, User, GuardianYouthLink, UserLoginHistory, UserLoginMonthly, UserScope
+from .scope import filter_by_admin_scope
+
+
+class UserListQueryCountTests(TestCase):
+    """
+    The user list and search_candidates must load a page in a constant number of queries.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        country = Country.objects.create(name='Sweden', country_code='SE', description='')
+        cls.municipality = Municipality.objects.create(
+            country=country, name='Test Muni', description='', terms_and_conditions=''
+        )
+        cls.club = Club.objects.create(
+            municipality=cls.municipality, name='Test Club', description='',
+            email='club@example.com', phone='123', terms_and_conditions='', club_policies=''
+        )
+        cls.interest = Interest.objects.create(name='Football')
+        cls.field = CustomFieldDefinition.objects.create(
+            name='Allergies', owner_role='SUPER_ADMIN', target_roles=['ALL']
+        )
+        cls.admin = User.objects.create_user(
+            'admin@example.com', password='pw', role='MUNICIPALITY_ADMIN',
+            assigned_municipality=cls.municipality
+        )
+
+    def _create_youth(self, count, avatar=False):
+        for i in range(count):
+            youth = User.objects.create_user(
+                f'youth{User.objects.count()}@example.com', password='pw',
+                role='YOUTH_MEMBER', preferred_club=self.club,
+                avatar=SimpleUploadedFile(f'avatar{i}.png', b'png') if avatar else None
+            )
+            guardian = User.objects.create_user(
+                f'guardian{User.objects.count()}@example.com', password='pw', role='GUARDIAN'
+            )
+            GuardianYouthLink.objects.create(guardian=guardian, youth=youth, relationship_type='GUARDIAN')
+            youth.interests.add(self.interest)
+            CustomFieldValue.objects.create(field=self.field, user=youth, value='None')
+
+    def _count_queries(self, url):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def test_user_list_query_count_is_constant(self):
+        self._create_youth(1)
+        small, response = self._count_queries('/api/users/?role=YOUTH_MEMBER')
+        self.assertEqual(len(response.data['results']), 1)
+
+        self._create_youth(4)
+        large, response = self._count_queries('/api/users/?role=YOUTH_MEMBER')
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertEqual(small, large)
+
+        youth = response.data['results'][0]
+        self.assertEqual(len(youth['guardians']), 1)
+        self.assertEqual(youth['custom_field_values'], [{'field': self.field.id, 'value': 'None'}])
+        self.assertEqual(youth['interests'], [self.interest.id])
+
+    @override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+    def test_user_list_query_count_is_constant_with_avatars(self):
+        # The first request caches the avatar variant maps, one write per image
+        self._create_youth(1, avatar=True)
+        self._count_queries('/api/users/?role=YOUTH_MEMBER')
+        small, _ = self._count_queries('/api/users/?role=YOUTH_MEMBER')
+
+        self._create_youth(9, avatar=True)
+        self._count_queries('/api/users/?role=YOUTH_MEMBER')
+        large, response = self._count_queries('/api/users/?role=YOUTH_MEMBER')
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertTrue(all(youth['avatar'] for youth in response.data['results']))
+        self.assertEqual(small, large)
+
+    def test_search_candidates_query_count_is_constant(self):
+        self._create_youth(1)
+        small, _ = self._count_queries('/api/groups/search_candidates/?target_member_type=YOUTH')
+
+        self._create_youth(4)
+        large, response = self._count_queries('/api/groups/search_candidates/?target_member_type=YOUTH')
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertEqual(small, large)
+
+
+def legacy_scope(admin):
+    """
+    The OR-join UserViewSet.get_queryset used before UserScope, kept as the reference.
+    """
+    queryset = User.objects.all()
+    if admin.role == 'MUNICIPALITY_ADMIN':
+        muni = admin.assigned_municipality
+        queryset = queryset.filter(
+            Q(assigned_municipality=muni) |
+            Q(assigned_club__municipality=muni) |
+            Q(preferred_club__municipality=muni) |
+            Q(guardian_links__youth__preferred_club__municipality=muni) |
+            Q(youth_links__youth__preferred_club__municipality=muni)
+        )
+    elif admin.role == 'CLUB_ADMIN':
+        club = admin.assigned_club
+        queryset = queryset.filter(
+            Q(assigned_club=club) |
+            Q(preferred_club=club) |
+            Q(guardian_links__youth__preferred_club=club) |
+            Q(youth_links__youth__preferred_club=club)
+        )
+    return set(queryset.values_list('id', flat=True))
+
+
+class UserScopeTests(TestCase):
+    """
+    filter_by_admin_scope() on UserScope must select the same users as the old OR-join.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        country = Country.objects.create(name='Sweden', country_code='SE', description='')
+        cls.muni = Municipality.objects.create(country=country, name='North', description='', terms_and_conditions='')
+        other_muni = Municipality.objects.create(country=country, name='South', description='', terms_and_conditions='')
+        cls.club = Club.objects.create(municipality=cls.muni, name='North Club', phone='1')
+        cls.sibling_club = Club.objects.create(municipality=cls.muni, name='North Other', phone='2')
+        cls.other_club = Club.objects.create(municipality=other_muni, name='South Club', phone='3')
+
+        create = User.objects.create_user
+        cls.muni_admin = create('muni@example.com', role='MUNICIPALITY_ADMIN', assigned_municipality=cls.muni)
+        cls.club_admin = create('club@example.com', role='CLUB_ADMIN', assigned_club=cls.club)
+        create('sibling-admin@example.com', role='CLUB_ADMIN', assigned_club=cls.sibling_club)
+        create('south-admin@example.com', role='CLUB_ADMIN', assigned_club=cls.other_club)
+        cls.youth = create('youth@example.com', role='YOUTH_MEMBER', preferred_club=cls.club)
+        cls.sibling_youth = create('sibling@example.com', role='YOUTH_MEMBER', preferred_club=cls.sibling_club)
+        cls.other_youth = create('south@example.com', role='YOUTH_MEMBER', preferred_club=cls.other_club)
+        cls.guardian = create('guardian@example.com', role='GUARDIAN')
+        cls.lone_guardian = create('lone@example.com', role='GUARDIAN')
+        GuardianYouthLink.objects.create(guardian=cls.guardian, youth=cls.youth, relationship_type='GUARDIAN')
+        GuardianYouthLink.objects.create(guardian=cls.guardian, youth=cls.other_youth, relationship_type='GUARDIAN')
+
+    def assertScopeMatches(self):
+        for admin in (self.muni_admin, self.club_admin):
+            scoped = set(filter_by_admin_scope(User.objects.all(), admin).values_list('id', flat=True))
+            self.assertEqual(scoped, legacy_scope(admin), admin.role)
+
+    def scoped_ids(self, admin):
+        return set(filter_by_admin_scope(User.objects.all(), admin).values_list('id', flat=True))
+
+    def test_matches_legacy_query(self):
+        self.assertScopeMatches()
+        self.assertIn(self.guardian.id, self.scoped_ids(self.club_admin))
+        self.assertNotIn(self.sibling_youth.id, self.scoped_ids(self.club_admin))
+        self.assertIn(self.sibling_youth.id, self.scoped_ids(self.muni_admin))
+        self.assertNotIn(self.lone_guardian.id, self.scoped_ids(self.muni_admin))
+
+    def test_link_add_and_remove(self):
+        link = GuardianYouthLink.objects.create(
+            guardian=self.lone_guardian, youth=self.sibling_youth, relationship_type='GUARDIAN'
+        )
+        self.assertScopeMatches()
+        self.assertIn(self.lone_guardian.id, self.scoped_ids(self.muni_admin))
+        self.assertNotIn(self.lone_guardian.id, self.scoped_ids(self.club_admin))
+
+        link.delete()
+        self.assertScopeMatches()
+        self.assertNotIn(self.lone_guardian.id, self.scoped_ids(self.muni_admin))
+
+    def test_youth_club_change_moves_guardian(self):
+        self.youth.preferred_club = self.sibling_club
+        self.youth.save()
+        self.assertScopeMatches()
+        self.assertNotIn(self.guardian.id, self.scoped_ids(self.club_admin))
+
+    def test_rows_are_unique(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            UserScope.objects.create(user=self.youth, municipality=self.muni, club=self.club)
+        # Municipality-wide rows have club NULL and are unique too
+        self.assertTrue(UserScope.objects.filter(user=self.muni_admin, municipality=self.muni, club=None).exists())
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            UserScope.objects.create(user=self.muni_admin, municipality=self.muni, club=None)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class PersonalDataTests(TestCase):
+    """
+    Export and erasure (users/gdpr.py): what is written, what is removed and what stays.
+    """
+
+    def setUp(self):
+        self.guardian = User.objects.create_user('guardian@example.com', role='GUARDIAN')
+        self.youth = User.objects.create_user(
+            'youth@example.com', password='pw', role='YOUTH_MEMBER', first_name='Ada',
+            phone_number='0701234567', avatar=SimpleUploadedFile('me.png', b'avatar-bytes'),
+        )
+        GuardianYouthLink.objects.create(guardian=self.guardian, youth=self.youth, relationship_type='GUARDIAN')
+        group = Group.objects.create(name='Chess')
+        GroupMembership.objects.create(group=group, user=self.youth)
+        GroupMembership.objects.create(group=group, user=self.guardian)
+        reward = Reward.objects.create(name='Ice cream', description='', owner_role='SUPER_ADMIN')
+        RewardUsage.objects.create(user=self.youth, reward=reward, is_redeemed=True, redeemed_at=timezone.now())
+        RewardUsage.objects.create(user=self.youth, reward=reward, is_redeemed=False)
+        now = timezone.now()
+        UserLoginHistory.objects.create(user=self.youth, timestamp=now, ip_address='10.0.0.1', user_agent='Firefox')
+        UserLoginMonthly.objects.create(user=self.youth, month=now.date().replace(day=1), login_count=3,
+                                        first_login=now, last_login=now)
+        DailyActiveUser.objects.create(user=self.youth, date=now.date())
+
+    def test_export_contains_profile_and_rows(self):
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(stream_user_archive([self.youth.id]))))
+        folder = f'user_{self.youth.id}'
+        profile = json.loads(archive.read(f'{folder}/profile.json'))
+        self.assertEqual(profile['email'], 'youth@example.com')
+        self.assertNotIn('password', profile)
+        history = archive.read(f'{folder}/login_history.ndjson').decode().splitlines()
+        self.assertEqual(json.loads(history[0])['ip_address'], '10.0.0.1')
+        self.assertEqual(len(archive.read(f'{folder}/reward_usages.ndjson').decode().splitlines()), 2)
+        self.assertEqual(len(archive.read(f'{folder}/guardian_links.ndjson').decode().splitlines()), 1)
+
+    def test_delete_removes_user_and_rows(self):
+        avatar = self.youth.avatar.name
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(erase_users([self.youth.id], mode='delete'), 1)
+
+        self.assertFalse(User.objects.filter(id=self.youth.id).exists())
+        for model in (GuardianYouthLink, RewardUsage, UserLoginHistory, UserLoginMonthly, DailyActiveUser):
+            self.assertFalse(model.objects.exists(), model.__name__)
+        self.assertEqual(list(GroupMembership.objects.values_list('user_id', flat=True)), [self.guardian.id])
+        self.assertFalse(default_storage.exists(avatar))
+
+    def test_anonymize_keeps_anonymous_counts(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(erase_users([self.youth.id], mode='anonymize'), 1)
+
+        user = User.objects.get(id=self.youth.id)
+        self.assertEqual(user.email, f'erased-{user.id}@invalid.local')
+        self.assertEqual((user.first_name, user.phone_number, user.avatar.name), ('', None, ''))
+        self.assertFalse(user.is_active)
+        self.assertFalse(user.has_usable_password())
+        self.assertEqual(user.role, 'YOUTH_MEMBER')
+        # Identifying rows go, anonymous counts stay
+        self.assertFalse(GuardianYouthLink.objects.exists())
+        self.assertFalse(UserLoginHistory.objects.exists())
+        self.assertFalse(GroupMembership.objects.filter(user=user).exists())
+        self.assertEqual(list(RewardUsage.objects.filter(user=user).values_list('is_redeemed', flat=True)), [True])
+        self.assertTrue(UserLoginMonthly.objects.filter(user=user).exists())
+        self.assertTrue(DailyActiveUser.objects.filter(user=user).exists())
+        self.assertTrue(User.objects.filter(id=self.guardian.id, is_active=True).exists())
+
+    def test_files_survive_a_rolled_back_erasure(self):
+        avatar = self.youth.avatar.name
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    erase_users([self.youth.id], mode='delete')
+                    raise RuntimeError('rollback')
+            except RuntimeError:
+                pass
+        self.assertTrue(User.objects.filter(id=self.youth.id).exists())
+        self.assertTrue(default_storage.exists(avatar))
+
+    def _count_erasure_queries(self, count, mode):
+        ids = []
+        for i in range(count):
+            youth = User.objects.create_user(f'{mode}{i}@example.com', role='YOUTH_MEMBER')
+            GuardianYouthLink.objects.create(guardian=self.guardian, youth=youth, relationship_type='GUARDIAN')
+            UserLoginHistory.objects.create(user=youth, timestamp=timezone.now(), ip_address='10.0.0.1')
+            ids.append(youth.id)
+        with CaptureQueriesContext(connection) as ctx, self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(erase_users(ids, mode=mode), count)
+        return len(ctx.captured_queries)
+
+    def test_erasure_query_count_is_constant(self):
+        for mode in ('delete', 'anonymize'):
+            self.assertEqual(self._count_erasure_queries(2, mode), self._count_erasure_queries(20, mode), mode)
+
+    def test_queued_login_of_erased_user_is_dropped(self):
+        buffer = LoginAuditBuffer(max_size=100, flush_interval=60)
+        buffer.record(self.youth.id, '10.0.0.2', 'Chrome')
+        buffer.record(self.guardian.id, '10.0.0.3', 'Safari')
+        erase_users([self.youth.id], mode='anonymize')
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(list(UserLoginHistory.objects.values_list('user_id', flat=True)), [self.guardian.id])
+
+
+@override_settings(YOUTH_AGE_OUT_THRESHOLDS={'default': 29})
+class AgeOutTests(TestCase):
+    """
+    age_out_youth takes aged-out youth out of the lists and dashboard counts.
+    """
+
+    def test_aged_out_youth_leave_lists_and_stats(self):
+        admin = User.objects.create_superuser('admin@example.com', password='pw')
+        today = date.today()
+        young = User.objects.create_user('young@example.com', role='YOUTH_MEMBER', grade=8,
+                                         date_of_birth=date(today.year - 14, 1, 1))
+        old = User.objects.create_user('old@example.com', role='YOUTH_MEMBER', grade=12,
+                                       date_of_birth=date(today.year - 30, 1, 1))
+        group = Group.objects.create(name='Chess')
+        GroupMembership.objects.create(group=group, user=old)
+        self.assertEqual(compute_youth_stats(admin)['total_youth'], 2)
+
+        call_command('age_out_youth', stdout=io.StringIO())
+
+        stats = compute_youth_stats(admin)
+        self.assertEqual(stats['total_youth'], 1)
+        self.assertNotIn('12', stats['grades'])
+        self.assertFalse(GroupMembership.objects.filter(user=old).exists())
+
+        client = APIClient()
+        client.force_authenticate(admin)
+        listed = {user['id'] for user in client.get('/api/users/', {'role': 'YOUTH_MEMBER'}).data['results']}
+        self.assertEqual(listed, {young.id})
+        listed = client.get('/api/users/', {'role': 'YOUTH_MEMBER', 'include_inactive': 'true'}).data['results']
+        self.assertEqual({user['id'] for user in listed}, {young.id, old.id})
+        # Still reachable, e.g. to reactivate
+        self.assertEqual(client.get(f'/api/users/{old.id}/').status_code, 200)
+
+
+class GradeRolloverTests(TestCase):
+    """
+    increment_grades promotes youth in bulk and must not leave stale cached copies behind.
+    """
+
+    def test_cached_households_see_the_new_grade(self):
+        guardian = User.objects.create_user('guardian@example.com', role='GUARDIAN')
+        youth = User.objects.create_user('youth@example.com', role='YOUTH_MEMBER', grade=7)
+        GuardianYouthLink.objects.create(guardian=guardian, youth=youth, relationship_type='GUARDIAN')
+        grades = lambda: {member['id']: member['grade'] for member in cached_household(guardian.id)['members']}
+        self.assertEqual(grades()[youth.id], 7)
+
+        call_command('increment_grades', school_year='2026/2027', stdout=io.StringIO())
+
+        self.assertEqual(grades()[youth.id], 8)
@@ -0,0 +1,101 @@
+import functools
+
+from django.db.models.fields.files import FieldFile
+
+
+class FieldTrackingMixin:
+    """
+    Remembers the field values a model instance was loaded with, so a save can
+    tell which fields actually changed.
+
+    The snapshot is taken in from_db(), from the row the query already returned,
+    so it costs no query. During save() the changed fields are available to
+    pre_save/post_save receivers as `instance.has_changed(...)`.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._take_snapshot()
+        return instance
+
+    def _tracked_value(self, field):
+        value = getattr(self, field.attname)
+        # FieldFile compares by name; keep the name, not the (mutable) file object
+        return value.name if isinstance(value, FieldFile) else value
+
+    def _take_snapshot(self, attnames=None):
+        if attnames is not None and not hasattr(self, '_loaded_values'):
+            return
+        deferred = self.get_deferred_fields()
+        values = {
+            field.attname: self._tracked_value(field)
+            for field in self._meta.concrete_fields
+            if field.attname not in deferred and (attnames is None or field.attname in attnames)
+        }
+        if attnames is None:
+            self._loaded_values = values
+        else:
+            self._loaded_values.update(values)
+
+    def changed_fields(self):
+        """
+        Attnames whose value differs from the snapshot, or None when there is
+        no snapshot (an instance that was never loaded or saved).
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return None
+        return {
+            field.attname for field in self._meta.concrete_fields
+            if field.attname in loaded and self._tracked_value(field) != loaded[field.attname]
+        }
+
+    def has_changed(self, *fields):
+        """
+        True when one of `fields` (names or attnames; any field if none are given)
+        changed. Inside save() this is the set being saved; unknown counts as changed.
+        """
+        changed = getattr(self, '_saving_changes', None)
+        if changed is None:
+            changed = self.changed_fields()
+        if changed is None:
+            return True
+        if not fields:
+            return bool(changed)
+        return any(self._meta.get_field(name).attname in changed for name in fields)
+
+    def save(self, *args, **kwargs):
+        changed = self.changed_fields()
+        update_fields = kwargs.get('update_fields')
+        attnames = None
+        if update_fields is not None:
+            attnames = {self._meta.get_field(name).attname for name in update_fields}
+            if changed is not None:
+                changed &= attnames
+        self._saving_changes = changed
+        try:
+            super().save(*args, **kwargs)
+        finally:
+            self._saving_changes = None
+        self._take_snapshot(attnames)
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._take_snapshot({self._meta.get_field(name).attname for name in fields} if fields else None)
+
+
+def when_changed(*fields):
+    """
+    Decorator for User receivers: a post_save runs on creation and otherwise only
+    when one of `fields` changed. Other signals (post_delete) always run.
+    Stack it under @receiver.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(sender, instance, created=None, **kwargs):
+            if created is False and not instance.has_changed(*fields):
+                return None
+            return func(sender, instance=instance, created=created, **kwargs)
+        return wrapper
+    return decorator
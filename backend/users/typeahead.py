@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .filters import parse_int, parse_list
+from .models import User
+from .scope import filter_by_admin_scope
+from .search import search_users, tokenize
+from .stats import scope_key
+
+TYPEAHEAD_FIELDS = ['id', 'first_name', 'last_name', 'email', 'role', 'grade']
+MAX_TERM_LENGTH = 100
+TYPEAHEAD_ROLES = ['YOUTH_MEMBER', 'GUARDIAN']
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+
+def typeahead_cache_timeout():
+    return getattr(settings, 'USER_TYPEAHEAD_CACHE_TIMEOUT', 30)
+
+
+def parse_typeahead_params(params):
+    """
+    Returns (term, roles, limit) from ?q=&role=&limit=.
+    """
+    term = ' '.join(tokenize(params.get('q')))[:MAX_TERM_LENGTH]
+    roles = [role for role in parse_list(params.get('role')) if role in TYPEAHEAD_ROLES] or TYPEAHEAD_ROLES
+    limit = parse_int(params.get('limit')) or DEFAULT_LIMIT
+    return term, sorted(roles), max(1, min(limit, MAX_LIMIT))
+
+
+def typeahead_users(admin, term, roles, limit):
+    """
+    Top `limit` youth/guardians in the admin's scope whose name or email starts with `term`.
+
+    Matching goes through the search backend's prefix index, so only the best matches
+    are read. Results are cached briefly per scope, since every keystroke asks again.
+    """
+    key = f"user_typeahead:{scope_key(admin)}:{','.join(roles)}:{limit}:{term}"
+    results = cache.get(key)
+    if results is not None:
+        return results
+
+    queryset = filter_by_admin_scope(User.objects.filter(role__in=roles, is_active=True), admin)
+    if term:
+        queryset = search_users(queryset, term, rank=True).order_by('-search_rank', 'last_name', 'first_name', 'id')
+    else:
+        queryset = queryset.order_by('last_name', 'first_name', 'id')
+
+    results = list(queryset.values(*TYPEAHEAD_FIELDS)[:limit])
+    cache.set(key, results, timeout=typeahead_cache_timeout())
+    return results
@@ -0,0 +1,53 @@
+from django.db import transaction
+
+from groups.models import GroupMembership
+from groups.utils import add_to_system_group
+from rewards.utils import grant_reward_bulk, rewards_with_trigger
+from .authentication import user_cache
+from .household import invalidate_households
+from .models import User
+from .stats import invalidate_stats
+
+UPDATE_BATCH_SIZE = 500
+
+
+def bulk_set_verification(user_ids, status):
+    """
+    Moves users to `status` with set-based side effects instead of a save() per user:
+    the UPDATE, then VERIFIED group membership (added or removed) and VERIFIED
+    reward grants, the same outcome the per-user receivers in groups/signals.py
+    and rewards/signals.py produce. Users already in `status` are left alone.
+    Returns counts.
+    """
+    if status not in User.VerificationStatus.values:
+        raise ValueError(f"Unknown verification status: {status}")
+    changing = list(
+        User.objects.filter(id__in=list(user_ids)).exclude(verification_status=status).values_list('id', flat=True)
+    )
+    result = {'updated': len(changing), 'group_added': 0, 'group_removed': 0, 'rewards_granted': 0}
+    if not changing:
+        return result
+
+    with transaction.atomic():
+        for start in range(0, len(changing), UPDATE_BATCH_SIZE):
+            User.objects.filter(id__in=changing[start:start + UPDATE_BATCH_SIZE]).update(verification_status=status)
+
+        verified_memberships = GroupMembership.objects.filter(
+            group__system_group_type='VERIFIED', user_id__in=changing
+        )
+        if status == User.VerificationStatus.VERIFIED:
+            already = verified_memberships.count()
+            if add_to_system_group('VERIFIED', changing):
+                result['group_added'] = len(changing) - already
+            users = User.objects.filter(id__in=changing)
+            for reward in rewards_with_trigger('VERIFIED'):
+                result['rewards_granted'] += grant_reward_bulk(reward, users)
+        else:
+            result['group_removed'], _ = verified_memberships.delete()
+
+    # What the User post_save receivers would have done per row
+    invalidate_stats()
+    invalidate_households(changing)
+    for user_id in changing:
+        user_cache.invalidate(user_id)
+    return result
@@ -1,13 +1,27 @@
 from rest_framework import viewsets, filters, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Count, Q
+from django.db.models import Q
+from django.http import StreamingHttpResponse
 from django.utils import timezone
-from datetime import timedelta, date
 
 from .models import User, GuardianYouthLink, UserLoginHistory
 from .serializers import CustomUserSerializer, UserManagementSerializer
 from .permissions import IsSuperAdmin, IsMunicipalityAdmin, IsClubOrMunicipalityAdmin
+from .scope import AdminScope, filter_by_admin_scope
+from .filters import UserDemographicFilter
+from .search import search_users
+from .stats import cached_stats, scope_key, compute_admin_stats, compute_youth_stats, compute_guardian_stats
+from .pagination import UserCursorPagination
+from .export import export_field_definitions, stream_csv, stream_ndjson
+from .typeahead import parse_typeahead_params, typeahead_users
+from .bulk import BulkUserImporter, read_rows
+from .links import apply_link_changes, household_pairs
+from .audit import login_audit, record_login
+from .facets import cached_facets
+from .household import cached_household, scoped_household
+from .gdpr import stream_user_archive
+from .verification import bulk_set_verification
 
 class UserViewSet(viewsets.ModelViewSet):
     """
@@ -16,29 +30,47 @@ class UserViewSet(viewsets.ModelViewSet):
     permission_classes = [IsClubOrMunicipalityAdmin]
     lookup_field = 'id'
 
+    def _use_cursor_pagination(self):
+        return self.request is not None and self.request.query_params.get('pagination') == 'cursor'
+
+    @property
+    def paginator(self):
+        """
+        Default PageNumberPagination, or keyset pagination when ?pagination=cursor is passed.
+        """
+        if self._use_cursor_pagination():
+            if not isinstance(getattr(self, '_paginator', None), UserCursorPagination):
+                self._paginator = UserCursorPagination()
+            return self._paginator
+        return super().paginator
+
+    def _values_response(self, queryset, fields):
+        """
+        Plain list for dropdowns, or a cursor-paginated page when requested.
+        """
+        if self._use_cursor_pagination():
+            page = self.paginate_queryset(queryset.values(*fields, 'date_joined'))
+            return self.get_paginated_response(page)
+        return Response(list(queryset.values(*fields)))
+
     def get_queryset(self):
         queryset = User.objects.all().order_by('-date_joined')
         user = self.request.user
 
-        if getattr(user, 'role', None) == 'MUNICIPALITY_ADMIN' and user.assigned_municipality:
-            queryset = queryset.filter(
-                Q(assigned_municipality=user.assigned_municipality) |
-                Q(assigned_club__municipality=user.assigned_municipality) |
-                Q(preferred_club__municipality=user.assigned_municipality) |
-                Q(guardian_links__youth__preferred_club__municipality=user.assigned_municipality) |
-                Q(youth_links__youth__preferred_club__municipality=user.assigned_municipality)
-            ).exclude(role='SUPER_ADMIN').distinct()
-        elif getattr(user, 'role', None) == 'CLUB_ADMIN' and user.assigned_club:
-            queryset = queryset.filter(
-                Q(assigned_club=user.assigned_club) |
-                Q(preferred_club=user.assigned_club) |
-                Q(guardian_links__youth__preferred_club=user.assigned_club) |
-                Q(youth_links__youth__preferred_club=user.assigned_club)
-            ).exclude(role__in=['SUPER_ADMIN', 'MUNICIPALITY_ADMIN']).distinct()
+        # Scope is resolved through the materialized UserScope table (see users/scope.py)
+        queryset = filter_by_admin_scope(queryset, user)
 
-        role = self.request.query_params.get('role')
-        if role:
-            queryset = queryset.filter(role=role)
+        # Deactivated users (e.g. aged-out youth, see users/lifecycle.py) are left out of lists,
+        # facets and bulk actions unless asked for; detail routes still reach them for reactivation
+        if not getattr(self, 'detail', False) and self.request.query_params.get('include_inactive') not in ('true', '1'):
+            queryset = queryset.filter(is_active=True)
+        if getattr(user, 'role', None) == 'MUNICIPALITY_ADMIN' and user.assigned_municipality_id:
+            queryset = queryset.exclude(role='SUPER_ADMIN')
+        elif getattr(user, 'role', None) == 'CLUB_ADMIN' and user.assigned_club_id:
+            queryset = queryset.exclude(role__in=['SUPER_ADMIN', 'MUNICIPALITY_ADMIN'])
+
+        # Demographic filters (role, club, age, grade, gender, verification)
+        queryset = UserDemographicFilter.from_user_list_params(self.request.query_params).apply(queryset)
 
         municipality = self.request.query_params.get('assigned_municipality')
         if municipality:
@@ -48,57 +80,10 @@ class UserViewSet(viewsets.ModelViewSet):
         if club:
             queryset = queryset.filter(assigned_club=club)
 
-        gender = self.request.query_params.get('legal_gender')
-        if gender:
-            queryset = queryset.filter(legal_gender=gender)
-
+        # Full-text search (FTS5 on SQLite, tsvector/trigram on PostgreSQL), best matches first
         search = self.request.query_params.get('search')
         if search:
-            queryset = queryset.filter(
-                Q(first_name__icontains=search) |
-                Q(last_name__icontains=search) |
-                Q(email__icontains=search)
-            )
-
-        grade_from = self.request.query_params.get('grade_from')
-        if grade_from:
-            try:
-                queryset = queryset.filter(grade__gte=int(grade_from))
-            except ValueError:
-                pass
-
-        grade_to = self.request.query_params.get('grade_to')
-        if grade_to:
-            try:
-                queryset = queryset.filter(grade__lte=int(grade_to))
-            except ValueError:
-                pass
-
-        age_from = self.request.query_params.get('age_from')
-        if age_from:
-            try:
-                age_from_int = int(age_from)
-                max_birth_date = date.today() - timedelta(days=365 * age_from_int)
-                queryset = queryset.filter(date_of_birth__lte=max_birth_date)
-            except (ValueError, TypeError):
-                pass
-
-        age_to = self.request.query_params.get('age_to')
-        if age_to:
-            try:
-                age_to_int = int(age_to)
-                min_birth_date = date.today() - timedelta(days=365 * (age_to_int + 1))
-                queryset = queryset.filter(date_of_birth__gte=min_birth_date)
-            except (ValueError, TypeError):
-                pass
-
-        verification_status = self.request.query_params.get('verification_status')
-        if verification_status:
-            queryset = queryset.filter(verification_status=verification_status)
-
-        preferred_club = self.request.query_params.get('preferred_club')
-        if preferred_club:
-            queryset = queryset.filter(preferred_club=preferred_club)
+            queryset = search_users(queryset, search, rank=True).order_by('-search_rank', '-date_joined')
 
         country = self.request.query_params.get('country')
         if country:
@@ -114,8 +99,21 @@ class UserViewSet(viewsets.ModelViewSet):
                 Q(assigned_municipality=municipality_filter)
             )
 
+        if self.action in ['list', 'retrieve']:
+            queryset = CustomUserSerializer.prefetch_related_objects(queryset)
+
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        """
+        With ?facets=true the page also carries counts per role, legal_gender, grade,
+        verification_status and preferred_club for the whole filtered set.
+        """
+        response = super().list(request, *args, **kwargs)
+        if request.query_params.get('facets') in ('true', '1') and isinstance(response.data, dict):
+            response.data['facets'] = cached_facets(request.user, request.query_params, self.get_queryset())
+        return response
+
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return UserManagementSerializer
@@ -156,53 +154,177 @@ class UserViewSet(viewsets.ModelViewSet):
         else:
             serializer.save()
 
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Streams the scoped, filtered user list as CSV (default) or NDJSON.
+        Accepts the same filters as the list. ?export_format=csv|ndjson
+        Rows are read in fixed-size id chunks, so memory stays flat for any list size.
+        """
+        export_format = request.query_params.get('export_format', 'csv')
+        if export_format not in ('csv', 'ndjson'):
+            return Response({"error": "export_format must be 'csv' or 'ndjson'."}, status=400)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        definitions = export_field_definitions(request.user)
+
+        if export_format == 'ndjson':
+            response = StreamingHttpResponse(stream_ndjson(queryset, definitions), content_type='application/x-ndjson')
+        else:
+            response = StreamingHttpResponse(stream_csv(queryset, definitions), content_type='text/csv; charset=utf-8')
+        filename = f"users-{timezone.now():%Y%m%d-%H%M}.{export_format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    @action(detail=False, methods=['post'])
+    def bulk_import(self, request):
+        """
+        Creates many users at once from an uploaded CSV/JSON file ("file")
+        or a JSON body {"rows": [...]}. Pass dry_run=true to only validate.
+        With invite_tokens=true, rows without a password return a uid/token pair
+        for reset_password_confirm instead of requiring a password up front.
+        The response has one entry per row under "results".
+        Municipality/Club Admins can only import youth and guardians in their scope.
+        """
+        upload = request.FILES.get('file')
+        try:
+            if upload:
+                fmt = request.data.get('import_format') or upload.name.rsplit('.', 1)[-1].lower()
+                rows = read_rows(upload, fmt)
+            else:
+                rows = request.data.get('rows')
+                if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+                    return Response({"error": "Upload a file or send a list of rows."}, status=400)
+        except (ValueError, UnicodeDecodeError) as exc:
+            return Response({"error": str(exc)}, status=400)
+
+        def flag(name):
+            return str(request.data.get(name, '')).lower() in ('1', 'true', 'yes')
+
+        dry_run = flag('dry_run')
+        importer = BulkUserImporter(admin=request.user, dry_run=dry_run, invite_tokens=flag('invite_tokens'))
+        report = importer.run(rows)
+        if dry_run:
+            return Response(report)
+        return Response(report, status=201 if report['created'] else 400)
+
+    @action(detail=False, methods=['post'])
+    def household_links(self, request):
+        """
+        Links or unlinks every guardian of a household to every youth of it.
+        Body: {"guardians": [ids], "youth": [ids], "action": "link" | "unlink" | "replace"}
+        "replace" makes the listed guardians the only guardians of the listed youth.
+        Youth must be in the admin's scope.
+        """
+        mode = request.data.get('action', 'link')
+        if mode not in ('link', 'unlink', 'replace'):
+            return Response({"error": "action must be 'link', 'unlink' or 'replace'."}, status=400)
+        try:
+            guardian_ids = {int(pk) for pk in request.data.get('guardians') or []}
+            youth_ids = {int(pk) for pk in request.data.get('youth') or []}
+        except (TypeError, ValueError):
+            return Response({"error": "guardians and youth must be lists of ids."}, status=400)
+        if not youth_ids or (not guardian_ids and mode != 'replace'):
+            return Response({"error": "Provide guardians and youth."}, status=400)
+
+        # One query per side to validate every id
+        found_guardians = set(
+            User.objects.filter(id__in=guardian_ids, role='GUARDIAN').values_list('id', flat=True)
+        )
+        found_youth = set(
+            filter_by_admin_scope(User.objects.filter(id__in=youth_ids, role='YOUTH_MEMBER'), request.user)
+            .values_list('id', flat=True)
+        )
+        missing = {
+            'guardians': sorted(guardian_ids - found_guardians),
+            'youth': sorted(youth_ids - found_youth),
+        }
+        if missing['guardians'] or missing['youth']:
+            return Response({"error": "Unknown or out-of-scope users.", "missing": missing}, status=400)
+
+        pairs = household_pairs(guardian_ids, youth_ids)
+        if mode == 'link':
+            added, removed = apply_link_changes(add=pairs)
+        elif mode == 'unlink':
+            added, removed = apply_link_changes(remove=pairs)
+        else:
+            current = GuardianYouthLink.objects.filter(youth_id__in=youth_ids).values_list('guardian_id', 'youth_id')
+            added, removed = apply_link_changes(
+                add=pairs, remove=[pair for pair in current if pair[0] not in guardian_ids]
+            )
+        return Response({"added": added, "removed": removed})
+
+    @action(detail=True, methods=['get'])
+    def household(self, request, id=None):
+        """
+        The family around a user: every guardian and youth connected through
+        guardian links, with their clubs and the link statuses. Members outside
+        the admin's scope are left out.
+        """
+        try:
+            user_id = int(id)
+        except (TypeError, ValueError):
+            return Response({"error": "Invalid user id."}, status=400)
+        scope = AdminScope.for_request(request)
+        if not scope.contains_user(user_id):
+            return Response({"error": "User not found."}, status=404)
+
+        household = cached_household(user_id)
+        visible = set(scope.users_in_scope([member['id'] for member in household['members']]))
+        return Response({"user": user_id, **scoped_household(household, visible)})
+
+    @action(detail=False, methods=['post'])
+    def bulk_verify(self, request):
+        """
+        Sets verification_status for many users at once.
+        Body: {"status": "VERIFIED" | "PENDING" | "UNVERIFIED", "ids": [ids]}
+        or {"status": ..., "all_matching": true} to change every user matching the
+        list filters in the query string (?role=YOUTH_MEMBER&grade=8 ...).
+        Only users in the admin's scope are changed.
+        """
+        new_status = request.data.get('status')
+        if new_status not in User.VerificationStatus.values:
+            return Response({"error": f"status must be one of {', '.join(User.VerificationStatus.values)}."}, status=400)
+
+        queryset = self.get_queryset()
+        ids = request.data.get('ids')
+        if ids is not None:
+            try:
+                ids = {int(pk) for pk in ids}
+            except (TypeError, ValueError):
+                return Response({"error": "ids must be a list of user ids."}, status=400)
+            queryset = queryset.filter(id__in=ids)
+        elif request.data.get('all_matching') is not True:
+            return Response({"error": "Provide ids, or all_matching: true to use the list filters."}, status=400)
+
+        matched = list(queryset.order_by().values_list('id', flat=True))
+        result = bulk_set_verification(matched, new_status)
+        return Response({"status": new_status, "matched": len(matched), **result})
+
+    @action(detail=True, methods=['get'])
+    def data_export(self, request, id=None):
+        """
+        Everything stored about a user (data subject access request), streamed as a zip.
+        """
+        try:
+            user_id = int(id)
+        except (TypeError, ValueError):
+            return Response({"error": "Invalid user id."}, status=400)
+        if not AdminScope.for_request(request).contains_user(user_id):
+            return Response({"error": "User not found."}, status=404)
+
+        response = StreamingHttpResponse(stream_user_archive([user_id]), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="user_{user_id}_data_{timezone.now():%Y%m%d}.zip"'
+        return response
+
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """
         Returns analytics data for the Admin Dashboard.
         Only counts Admins (excludes Youth/Guardians).
+        Computed in one aggregate query and cached (see users/stats.py).
         """
-        # Base query: Only Admins
-        admin_roles = ['SUPER_ADMIN', 'MUNICIPALITY_ADMIN', 'CLUB_ADMIN']
-        admins = User.objects.filter(role__in=admin_roles)
-
-        # 1. Total Count
-        total = admins.count()
-
-        # 2. Breakdown by Role
-        role_counts = admins.values('role').annotate(count=Count('id'))
-        # Convert to dictionary { 'SUPER_ADMIN': 5, ... }
-        roles_data = {item['role']: item['count'] for item in role_counts}
-
-        # 3. Breakdown by Gender
-        gender_counts = admins.values('legal_gender').annotate(count=Count('id'))
-        gender_data = {item['legal_gender']: item['count'] for item in gender_counts}
-
-        # 4. Activity (Last 7 Days)
-        seven_days_ago = timezone.now() - timedelta(days=7)
-        active_recently = admins.filter(last_login__gte=seven_days_ago).count()
-
-        # 5. New Admins (Last 30 Days)
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        new_recently = admins.filter(date_joined__gte=thirty_days_ago).count()
-
-        return Response({
-            "total_admins": total,
-            "roles": {
-                "super": roles_data.get('SUPER_ADMIN', 0),
-                "municipality": roles_data.get('MUNICIPALITY_ADMIN', 0),
-                "club": roles_data.get('CLUB_ADMIN', 0)
-            },
-            "gender": {
-                "male": gender_data.get('MALE', 0),
-                "female": gender_data.get('FEMALE', 0),
-                "other": gender_data.get('OTHER', 0)
-            },
-            "activity": {
-                "active_7_days": active_recently,
-                "new_30_days": new_recently
-            }
-        })
+        return Response(cached_stats('admins', 'super', compute_admin_stats))
 
     @action(detail=False, methods=['get'])
     def youth_stats(self, request):
@@ -211,36 +333,7 @@ class UserViewSet(viewsets.ModelViewSet):
         Scoped by Municipality if the user is a Municipality Admin.
         """
         user = request.user
-        youth = User.objects.filter(role='YOUTH_MEMBER')
-
-        if getattr(user, 'role', None) == 'MUNICIPALITY_ADMIN' and user.assigned_municipality:
-            youth = youth.filter(preferred_club__municipality=user.assigned_municipality)
-        elif getattr(user, 'role', None) == 'CLUB_ADMIN' and user.assigned_club:
-            youth = youth.filter(preferred_club=user.assigned_club)
-
-        total = youth.count()
-
-        grade_counts = youth.values('grade').annotate(count=Count('id')).order_by('grade')
-        grade_data = {str(item['grade']): item['count'] for item in grade_counts if item['grade'] is not None}
-
-        gender_counts = youth.values('legal_gender').annotate(count=Count('id'))
-        gender_data = {item['legal_gender']: item['count'] for item in gender_counts}
-
-        seven_days_ago = timezone.now() - timedelta(days=7)
-        active_recently = youth.filter(last_login__gte=seven_days_ago).count()
-
-        return Response({
-            "total_youth": total,
-            "grades": grade_data,
-            "gender": {
-                "male": gender_data.get('MALE', 0),
-                "female": gender_data.get('FEMALE', 0),
-                "other": gender_data.get('OTHER', 0)
-            },
-            "activity": {
-                "active_7_days": active_recently
-            }
-        })
+        return Response(cached_stats('youth', scope_key(user), lambda: compute_youth_stats(user)))
 
     @action(detail=False, methods=['get'])
     def list_guardians(self, request):
@@ -248,20 +341,11 @@ class UserViewSet(viewsets.ModelViewSet):
         Returns a list of guardians.
         Super Admin: All guardians.
         Muni Admin: Only guardians linked to youth within their municipality.
+        Unbounded; dropdowns should use typeahead instead.
         """
-        user = request.user
-        guardians = User.objects.filter(role='GUARDIAN')
-        if getattr(user, 'role', None) == 'MUNICIPALITY_ADMIN' and user.assigned_municipality:
-            guardians = guardians.filter(
-                youth_links__youth__preferred_club__municipality=user.assigned_municipality
-            ).distinct()
-        elif getattr(user, 'role', None) == 'CLUB_ADMIN' and user.assigned_club:
-            guardians = guardians.filter(
-                youth_links__youth__preferred_club=user.assigned_club
-            ).distinct()
+        guardians = filter_by_admin_scope(User.objects.filter(role='GUARDIAN', is_active=True), request.user)
 
-        values = guardians.values('id', 'first_name', 'last_name', 'email')
-        return Response(list(values))
+        return self._values_response(guardians, ['id', 'first_name', 'last_name', 'email'])
 
     @action(detail=False, methods=['get'])
     def guardian_stats(self, request):
@@ -270,79 +354,36 @@ class UserViewSet(viewsets.ModelViewSet):
         Scoped by Municipality/Club if the user is an Admin.
         """
         user = request.user
-        guardians = User.objects.filter(role='GUARDIAN')
-
-        # Filter by scope
-        if getattr(user, 'role', None) == 'MUNICIPALITY_ADMIN' and user.assigned_municipality:
-            guardians = guardians.filter(
-                youth_links__youth__preferred_club__municipality=user.assigned_municipality
-            ).distinct()
-        elif getattr(user, 'role', None) == 'CLUB_ADMIN' and user.assigned_club:
-            guardians = guardians.filter(
-                youth_links__youth__preferred_club=user.assigned_club
-            ).distinct()
-
-        # 1. Total Count
-        total = guardians.count()
-
-        # 2. Verification Status Breakdown
-        status_counts = guardians.values('verification_status').annotate(count=Count('id'))
-        status_data = {item['verification_status']: item['count'] for item in status_counts}
-
-        # 3. Activity (Last 7 Days)
-        seven_days_ago = timezone.now() - timedelta(days=7)
-        active_recently = guardians.filter(last_login__gte=seven_days_ago).count()
-
-        # 4. Connected Youth Count (scoped to this admin's youth)
-        if getattr(user, 'role', None) == 'MUNICIPALITY_ADMIN' and user.assigned_municipality:
-            youth_ids = User.objects.filter(
-                role='YOUTH_MEMBER',
-                preferred_club__municipality=user.assigned_municipality
-            ).values_list('id', flat=True)
-            total_connections = GuardianYouthLink.objects.filter(youth_id__in=youth_ids).count()
-        elif getattr(user, 'role', None) == 'CLUB_ADMIN' and user.assigned_club:
-            youth_ids = User.objects.filter(
-                role='YOUTH_MEMBER',
-                preferred_club=user.assigned_club
-            ).values_list('id', flat=True)
-            total_connections = GuardianYouthLink.objects.filter(youth_id__in=youth_ids).count()
-        else:
-            total_connections = GuardianYouthLink.objects.count()
-
-        return Response({
-            "total_guardians": total,
-            "verification": {
-                "verified": status_data.get('VERIFIED', 0),
-                "pending": status_data.get('PENDING', 0),
-                "unverified": status_data.get('UNVERIFIED', 0)
-            },
-            "activity": {
-                "active_7_days": active_recently,
-                "total_connections": total_connections
-            }
-        })
+        return Response(cached_stats('guardians', scope_key(user), lambda: compute_guardian_stats(user)))
 
     @action(detail=False, methods=['get'])
     def list_youth(self, request):
         """
         Returns a simple list of all Youth Members.
         Used for dropdowns in Guardian management.
+        Unbounded; dropdowns should use typeahead instead.
         """
-        user = request.user
-        youth = User.objects.filter(role='YOUTH_MEMBER')
-        if getattr(user, 'role', None) == 'MUNICIPALITY_ADMIN' and user.assigned_municipality:
-            youth = youth.filter(preferred_club__municipality=user.assigned_municipality)
-        elif getattr(user, 'role', None) == 'CLUB_ADMIN' and user.assigned_club:
-            youth = youth.filter(preferred_club=user.assigned_club)
+        youth = filter_by_admin_scope(User.objects.filter(role='YOUTH_MEMBER', is_active=True), request.user)
 
-        youth = youth.values('id', 'first_name', 'last_name', 'email', 'grade')
-        return Response(list(youth))
+        return self._values_response(youth, ['id', 'first_name', 'last_name', 'email', 'grade'])
+
+    @action(detail=False, methods=['get'])
+    def typeahead(self, request):
+        """
+        Top matches for dropdowns while the admin types.
+        ?q=ann&role=YOUTH_MEMBER|GUARDIAN&limit=10 (max 50)
+        Prefer this over list_youth/list_guardians, which return the whole scope.
+        """
+        term, roles, limit = parse_typeahead_params(request.query_params)
+        return Response(typeahead_users(request.user, term, roles, limit))
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated], url_path='login_history')
     def login_history(self, request):
         """
         Returns the latest 10 login events for the authenticated user.
+        Logins still queued in the audit buffer are written first, so every entry has its id.
         """
+        login_audit.flush_user(request.user.pk)
         history = UserLoginHistory.objects.filter(user=request.user).order_by('-timestamp')[:10]
         data = [
             {
@@ -369,10 +410,7 @@ class UserViewSet(viewsets.ModelViewSet):
 
         user_agent = request.META.get('HTTP_USER_AGENT', '') or ''
 
-        UserLoginHistory.objects.create(
-            user=request.user,
-            ip_address=ip_address,
-            user_agent=user_agent[:512],
-        )
+        # Queued and written in bulk (users/audit.py)
+        record_login(request.user, ip_address=ip_address, user_agent=user_agent)
 
         return Response({"status": "logged"})
\ No newline at end of file